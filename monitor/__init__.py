@@ -0,0 +1 @@
+"""서버 모니터링 공통 모듈 (GUI 비의존)"""
@@ -0,0 +1,173 @@
+"""원격 수집 에이전트 관리 (default_settings.agent, servers[].agent)
+
+점검 대상 서버에 remote_agent.py 를 SFTP 로 올려두고 점검마다 pull 명령 1회로 결과를 받는다.
+- 원격 파일 이름에 에이전트 버전과 sha256 앞부분을 넣어 내용이 바뀌면 새 파일을 올리고,
+  에이전트는 실행 시 자신의 sha256 을 확인해 다르면(전송 중 손상 등) 다시 올리도록 알림
+- 원격 샘플러가 sample_interval 초마다 측정한 값을 pull 사이 구간의 min/avg/max 로 집계해 받음
+  (cpu/memory 는 구간 평균, cpu_min/cpu_max/memory_max/load_1_max 도 결과와 저장소에 기록)
+- 개별 명령어/서비스 상태는 바뀐 항목만 받아 직전 값과 합침 (세대 번호가 어긋나면 전체를 받음)
+- python3 가 없거나 에이전트를 올릴 수 없는 서버는 기존 방식(/proc 스크립트 + 일괄 수집)으로 점검
+- 원격 샘플/세대 상태는 서버 계정별로 하나이므로 같은 서버를 여러 모니터에서 에이전트로 점검하지 않음
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shlex
+import threading
+
+from monitor.procfs import format_uptime
+from monitor.remote_agent import AGENT_VERSION, PREFIX
+
+AGENT_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'remote_agent.py')
+
+
+class AgentUnavailable(Exception):
+    """에이전트를 사용할 수 없는 서버 (python3 없음, 설치 실패, 알 수 없는 응답)"""
+
+
+class RemoteAgent:
+    """서버별 에이전트 설치/pull 명령 생성/응답 병합 (여러 워커 스레드에서 호출됨)"""
+
+    def __init__(self, enabled=False, remote_dir='.cache/system-health-monitor', sample_interval=5, idle_exit=3600):
+        self.enabled = enabled  # 기본값 (servers[].agent 로 서버별 재정의)
+        self.remote_dir = remote_dir  # 상대 경로는 원격 계정의 홈 디렉토리 기준
+        self.sample_interval = sample_interval
+        self.idle_exit = idle_exit
+        self.logger = logging.getLogger(__name__)
+
+        with open(AGENT_SOURCE_PATH, 'rb') as f:
+            self.source = f.read()
+        self.checksum = hashlib.sha256(self.source).hexdigest()
+        self.remote_path = posixpath.join(remote_dir, f'shm_agent_{AGENT_VERSION}_{self.checksum[:12]}.py')
+
+        self._bases = {}  # 서버이름 -> (세대 번호, {'cmd': {이름: 출력}, 'svc': {이름: [상태, 프로세스 수]}})
+        self._unavailable = set()  # 에이전트를 쓸 수 없는 서버 (프로그램 재시작 전까지 기존 방식으로 점검)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        """default_settings.agent 설정으로 생성 (서버별로 켤 수 있으므로 꺼져 있어도 생성)"""
+        settings = default_settings.get('agent') or {}
+        return cls(
+            enabled=settings.get('enabled', False),
+            remote_dir=settings.get('remote_dir', '.cache/system-health-monitor'),
+            sample_interval=settings.get('sample_interval', 5),
+            idle_exit=settings.get('idle_exit', 3600),
+        )
+
+    def enabled_for(self, server):
+        if not server.get('agent', self.enabled):
+            return False
+        with self._lock:
+            return server['name'] not in self._unavailable
+
+    def pull_command(self, server, command_timeout):
+        """원격에서 실행할 pull 명령 (에이전트 파일이 없거나 python3 가 없으면 상태만 출력)"""
+        with self._lock:
+            base = self._bases.get(server['name'])
+        request = {
+            'base': base[0] if base is not None else -1,
+            'commands': dict(server.get('commands') or {}),
+            'services': [service['name'] for service in server.get('services') or []
+                         if service['type'] == 'systemctl'],
+            'timeout': command_timeout,
+        }
+        encoded = base64.b64encode(json.dumps(request, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        # 샘플러는 pull 이 idle_exit 동안 없으면 종료되므로 점검 주기보다 충분히 길게 유지
+        idle_exit = max(self.idle_exit, 3 * server.get('interval', 300))
+        return (f'a={shlex.quote(self.remote_path)}; '
+                f'[ -f "$a" ] || {{ echo "{PREFIX} missing"; exit 0; }}; '
+                f'command -v python3 >/dev/null 2>&1 || {{ echo "{PREFIX} nopython"; exit 0; }}; '
+                f'exec python3 "$a" pull {self.checksum} {self.sample_interval} {idle_exit} {encoded}')
+
+    def parse(self, server, output):
+        """pull 출력 -> 응답 payload (에이전트를 다시 올려야 하면 None, 쓸 수 없으면 AgentUnavailable)"""
+        lines = [line for line in output.splitlines() if line.startswith(PREFIX + ' ')]
+        if not lines:
+            raise AgentUnavailable(f"unexpected output: {output[:80]!r}")
+        status, _, body = lines[-1][len(PREFIX) + 1:].partition(' ')
+        if status == 'ok':
+            try:
+                return json.loads(body)
+            except ValueError as e:
+                raise AgentUnavailable(f"invalid payload: {str(e)}")
+        if status in ('missing', 'checksum'):
+            return None
+        if status == 'nopython':
+            raise AgentUnavailable('python3 not found')
+        raise AgentUnavailable(f"unknown status: {status}")
+
+    def install(self, ssh, timeout=30):
+        """SFTP 로 에이전트 업로드 (임시 파일에 쓴 뒤 이름 변경)"""
+        sftp = ssh.open_sftp()
+        try:
+            sftp.get_channel().settimeout(timeout)
+            path = ''
+            for part in self.remote_dir.split('/'):
+                path = posixpath.join(path, part) if path else (part or '/')
+                try:
+                    sftp.stat(path)
+                except FileNotFoundError:
+                    sftp.mkdir(path, 0o700)
+            tmp_path = f'{self.remote_path}.tmp'
+            with sftp.open(tmp_path, 'wb') as f:
+                f.write(self.source)
+            sftp.chmod(tmp_path, 0o700)
+            sftp.posix_rename(tmp_path, self.remote_path)
+        finally:
+            sftp.close()
+
+    def mark_unavailable(self, server_name):
+        with self._lock:
+            self._unavailable.add(server_name)
+            self._bases.pop(server_name, None)
+
+    def forget(self, server_name):
+        """서버 설정이 삭제된 경우 상태 제거"""
+        with self._lock:
+            self._unavailable.discard(server_name)
+            self._bases.pop(server_name, None)
+
+    def build_results(self, server, payload):
+        """응답 payload 를 기존 수집 결과와 같은 형식의 dict 로 변환 (바뀐 항목만 온 경우 직전 값과 합침)"""
+        with self._lock:
+            base = self._bases.get(server['name'])
+            if payload['full'] or base is None:
+                state = {'cmd': {}, 'svc': {}}
+            else:
+                state = {key: dict(values) for key, values in base[1].items()}
+            for key in state:
+                state[key].update(payload.get(key) or {})
+            self._bases[server['name']] = (payload['gen'], state)
+
+        load_1, load_5, load_15 = payload['load']
+        results = {
+            'cpu': round(payload['cpu'][1], 1),
+            'memory': round(payload['memory'][1], 2),
+            'disk': round(payload['disk'][3], 1),
+            'load_avg': f'{load_1:.2f} {load_5:.2f} {load_15:.2f}',
+            'uptime': format_uptime(payload['uptime']),
+            'cpu_cores': payload['cores'],
+            'load_1': load_1,
+            'load_5': load_5,
+            'load_15': load_15,
+            'uptime_seconds': payload['uptime'],
+            # pull 사이 구간의 최소/최대 (sample_interval 해상도)
+            'cpu_min': payload['cpu'][0],
+            'cpu_max': payload['cpu'][2],
+            'memory_max': payload['memory'][2],
+            'load_1_max': payload['load_1'][2],
+            'agent_samples': payload['n'],
+        }
+        for name in server.get('commands') or {}:
+            results[name] = state['cmd'].get(name, 'ERROR')
+        if 'services' in server:
+            results['services'] = {}
+            for service in server['services']:
+                if service['type'] == 'systemctl':
+                    status, process_count = state['svc'].get(service['name'], ['', ''])
+                    results['services'][service['name']] = {'status': status, 'process_count': process_count}
+        return results
@@ -0,0 +1,392 @@
+"""임계값 알림 파이프라인
+
+점검마다 나오는 임계값 초과 항목(rules.Breach)을 (서버, 메트릭)별 상태로 추적해 상태가 바뀔 때만 알림을 만든다.
+- 상태: ok -> warning -> critical -> recovered(ok)
+- consecutive_breaches 번 연속 초과해야 경고/위험으로, consecutive_recoveries 번 연속 정상이어야 복구로 전환
+  (정상 상태에서 경고/위험이 번갈아 나오면 연속 초과로 세고 경고로 전환,
+   예: consecutive_breaches=2 에서 warning, critical -> warning 알림, 이후 critical 2회 -> critical 알림)
+- 같은 상태는 다시 알리지 않음 (repeat_interval 초가 지나면 1회 재알림, 0 이면 재알림 없음)
+- 서버별/전체 알림 수 제한 (초과분은 상태만 갱신하고 발송하지 않음)
+- 알림은 전송 스레드에서 batch_interval 초 단위로 모아 각 sink 에 한 번에 전달 (file, webhook, smtp)
+"""
+import json
+import logging
+import math
+import os
+import queue
+import smtplib
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+from datetime import datetime
+from email.message import EmailMessage
+
+from monitor.rules import LEVEL_CRITICAL, LEVEL_NAMES, LEVEL_OK, METRIC_LABELS, Breach
+
+# 점검 실패(시간 초과/오류)를 알림으로 다루기 위한 메트릭
+HOST_METRIC = 'host'
+
+Alert = namedtuple('Alert', 'time server metric label state previous value threshold')
+
+_STOP = object()
+
+
+def alert_to_dict(alert):
+    """sink 전송용 dict"""
+    return {
+        'time': datetime.fromtimestamp(alert.time).isoformat(timespec='seconds'),
+        'server': alert.server,
+        'metric': alert.metric,
+        'label': alert.label,
+        'state': alert.state,
+        'previous': alert.previous,
+        'value': None if math.isnan(alert.value) else alert.value,
+        'threshold': None if math.isnan(alert.threshold) else alert.threshold,
+    }
+
+
+def metric_label(metric):
+    """복구 알림 등 초과 항목 없이 만드는 알림의 표시 이름"""
+    if metric == HOST_METRIC:
+        return 'Host'
+    return METRIC_LABELS.get(metric, metric[4:] if metric.startswith('cmd.') else metric)
+
+
+def format_alert(alert):
+    """알림 1건 설명 문자열"""
+    line = f"[{alert.state.upper()}] {alert.server} {alert.label}"
+    if not math.isnan(alert.value):
+        line += f" {alert.value:g}"
+        if alert.state != 'recovered':
+            line += f" > {alert.threshold:g}"
+    return line + f" ({alert.previous} -> {alert.state})"
+
+
+class RateLimiter:
+    """토큰 버킷 (period 초에 최대 limit 건, limit 이 0 이면 제한 없음)"""
+
+    def __init__(self, limit, period, clock=time.monotonic):
+        self.limit = limit
+        self.period = period
+        self.clock = clock
+        self.tokens = float(limit)
+        self.updated = clock()
+
+    def allow(self):
+        if not self.limit:
+            return True
+        now = self.clock()
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.period)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class _MetricState:
+    __slots__ = ('level', 'pending', 'count', 'notified_at')
+
+    def __init__(self):
+        self.level = LEVEL_OK  # 현재 알림 상태
+        self.pending = LEVEL_OK  # 전환 대기중인 단계
+        self.count = 0  # pending 단계가 연속으로 관측된 횟수
+        self.notified_at = 0.0  # 마지막 발송 시각
+
+
+class AlertManager:
+    """(서버, 메트릭)별 알림 상태 추적 및 전송 (여러 워커 스레드에서 호출됨)"""
+
+    def __init__(self, sinks, consecutive_breaches=2, consecutive_recoveries=2, repeat_interval=0,
+                 server_rate_limit=10, global_rate_limit=60, batch_interval=10, batch_size=500,
+                 state_path=None, clock=time.time):
+        self.consecutive_breaches = max(1, int(consecutive_breaches))
+        self.consecutive_recoveries = max(1, int(consecutive_recoveries))
+        self.repeat_interval = repeat_interval
+        self.server_rate_limit = server_rate_limit  # 서버별 시간당 최대 알림 수
+        self.global_limiter = RateLimiter(global_rate_limit, 60)  # 전체 분당 최대 알림 수
+        self.server_limiters = {}
+        self.suppressed = 0  # 수 제한으로 발송하지 않은 알림 수
+        self.state_path = state_path
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._states = {}  # (서버이름, 메트릭) -> _MetricState
+        self._lock = threading.Lock()
+        self._load_state()
+        self.dispatcher = AlertDispatcher(sinks, batch_interval=batch_interval, batch_size=batch_size).start()
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        """default_settings.alerts 설정으로 생성 (enabled: false 이면 None)"""
+        settings = default_settings.get('alerts') or {}
+        if not settings.get('enabled', True):
+            return None
+        results_dir = default_settings.get('results_dir', 'results')
+        sink_settings = settings.get('sinks') or [{'type': 'file'}]
+        sinks = [create_sink(sink, results_dir) for sink in sink_settings]
+        rate_limit = settings.get('rate_limit') or {}
+        return cls(
+            sinks,
+            consecutive_breaches=settings.get('consecutive_breaches', 2),
+            consecutive_recoveries=settings.get('consecutive_recoveries', 2),
+            repeat_interval=settings.get('repeat_interval', 0),
+            server_rate_limit=rate_limit.get('per_server_per_hour', 10),
+            global_rate_limit=rate_limit.get('global_per_minute', 60),
+            batch_interval=settings.get('batch_interval', 10),
+            state_path=settings.get('state_path') or os.path.join(results_dir, 'alert_state.json'),
+        )
+
+    def observe(self, server_name, breaches, metrics=None):
+        """점검 결과 1건 반영 (breaches: 해당 서버의 rules.Breach 목록, metrics: 확인할 메트릭 한정)"""
+        now = self.clock()
+        observed = {breach.metric: breach for breach in breaches}
+        alerts = []
+        with self._lock:
+            if metrics is None:
+                # 이번에 초과한 메트릭 + 이전에 알림/전환 대기 상태였던 메트릭만 확인
+                metrics = set(observed)
+                metrics.update(metric for name, metric in self._states if name == server_name)
+            for metric in metrics:
+                breach = observed.get(metric)
+                alert = self._update(server_name, metric, breach, now)
+                if alert is not None:
+                    alerts.append(alert)
+        for alert in alerts:
+            self._send(alert)
+        return alerts
+
+    def forget(self, server_name):
+        """서버 설정이 삭제된 경우 알림 상태 제거"""
+        with self._lock:
+            for key in [key for key in self._states if key[0] == server_name]:
+                del self._states[key]
+            self.server_limiters.pop(server_name, None)
+
+    def observe_failure(self, server_name, status, message):
+        """점검 실패(시간 초과/오류)를 host 메트릭의 위험 단계로 반영"""
+        label = 'Timeout' if status == 'timeout' else 'Unreachable'
+        # 다른 메트릭은 값을 모르므로 상태를 유지
+        breach = Breach(HOST_METRIC, label, LEVEL_CRITICAL, math.nan, math.nan)
+        return self.observe(server_name, [breach], metrics=(HOST_METRIC,))
+
+    def _update(self, server_name, metric, breach, now):
+        key = (server_name, metric)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _MetricState()
+        level = breach.level if breach is not None else LEVEL_OK
+
+        if level == state.level:
+            if level == LEVEL_OK:
+                # 전환 대기중 정상으로 돌아온 경우 추적 종료
+                del self._states[key]
+                return None
+            state.pending, state.count = level, 0
+            # 같은 상태는 repeat_interval 이 지난 경우에만 재알림
+            if self.repeat_interval and now - state.notified_at >= self.repeat_interval:
+                state.notified_at = now
+                return self._alert(now, server_name, metric, breach, LEVEL_NAMES[level], LEVEL_NAMES[level])
+            return None
+
+        if state.level == LEVEL_OK and state.pending != LEVEL_OK:
+            # 정상 상태에서는 경고/위험이 번갈아 나와도 연속 초과로 집계하고, 구간 내내 유지된 낮은 단계로 전환
+            state.pending = min(state.pending, level)
+            state.count += 1
+        elif level == state.pending:
+            state.count += 1
+        else:
+            state.pending, state.count = level, 1
+        required = self.consecutive_recoveries if level == LEVEL_OK else self.consecutive_breaches
+        if state.count < required:
+            return None
+        level = state.pending
+
+        previous = LEVEL_NAMES[state.level]
+        state.level, state.count, state.notified_at = level, 0, now
+        if level == LEVEL_OK:
+            del self._states[key]
+            return self._alert(now, server_name, metric, breach, 'recovered', previous)
+        return self._alert(now, server_name, metric, breach, LEVEL_NAMES[level], previous)
+
+    def _alert(self, now, server_name, metric, breach, state, previous):
+        if breach is None:
+            label, value, threshold = metric_label(metric), math.nan, math.nan
+        else:
+            label, value, threshold = breach.label, breach.value, breach.threshold
+        return Alert(now, server_name, metric, label, state, previous, value, threshold)
+
+    def _send(self, alert):
+        with self._lock:
+            limiter = self.server_limiters.get(alert.server)
+            if limiter is None:
+                limiter = self.server_limiters[alert.server] = RateLimiter(self.server_rate_limit, 3600)
+            allowed = limiter.allow() and self.global_limiter.allow()
+            if not allowed:
+                self.suppressed += 1
+        if not allowed:
+            self.logger.info(f"Alert suppressed by rate limit: {format_alert(alert)}")
+            return
+        self.logger.warning(f"Alert: {format_alert(alert)}")
+        self.dispatcher.submit(alert)
+
+    def _load_state(self):
+        """이전 실행의 알림 상태 복원 (cron 등 1회 점검 반복 실행 시 연속 횟수 유지)"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                for server_name, metric, level, pending, count, notified_at in json.load(f):
+                    state = _MetricState()
+                    state.level, state.pending, state.count, state.notified_at = level, pending, count, notified_at
+                    self._states[(server_name, metric)] = state
+        except Exception as e:
+            self.logger.error(f"Failed to load alert state : {str(e)}")
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            rows = [[server_name, metric, state.level, state.pending, state.count, state.notified_at]
+                    for (server_name, metric), state in self._states.items()]
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            self.logger.error(f"Failed to save alert state : {str(e)}")
+
+    def close(self):
+        """대기중인 알림 전송 후 상태 저장"""
+        self.dispatcher.close()
+        self.save_state()
+
+
+class AlertDispatcher:
+    """알림을 모아 sink 에 일괄 전송하는 스레드"""
+
+    def __init__(self, sinks, batch_interval=10, batch_size=500):
+        self.sinks = list(sinks)
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, alert):
+        self._queue.put(alert)
+
+    def close(self, timeout=None):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # 첫 알림 이후 batch_interval 동안 들어온 알림을 함께 전송
+            deadline = time.monotonic() + self.batch_interval
+            while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                # 중지 요청시 남은 알림까지 모두 전송
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                batch = [alert for alert in batch if alert is not _STOP]
+            if batch:
+                self._deliver(batch)
+
+    def _deliver(self, alerts):
+        for sink in self.sinks:
+            try:
+                sink.send(alerts)
+            except Exception as e:
+                self.logger.error(f"Alert sink {type(sink).__name__} error : {str(e)}")
+
+
+class FileAlertSink:
+    """알림을 JSON Lines 파일에 추가"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alerts):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert_to_dict(alert), ensure_ascii=False) + '\n')
+
+
+class WebhookAlertSink:
+    """알림 묶음을 JSON 으로 POST ({"alerts": [...]})"""
+
+    def __init__(self, url, timeout=10, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def send(self, alerts):
+        body = json.dumps({'alerts': [alert_to_dict(alert) for alert in alerts]}, ensure_ascii=False)
+        request = urllib.request.Request(self.url, data=body.encode('utf-8'), headers=self.headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class SmtpAlertSink:
+    """알림 묶음을 메일 1통으로 전송"""
+
+    def __init__(self, host, recipients, sender, port=25, username=None, password=None, starttls=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.recipients = [recipients] if isinstance(recipients, str) else list(recipients)
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, alerts):
+        message = EmailMessage()
+        message['Subject'] = f"[서버 모니터링] 알림 {len(alerts)}건"
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content('\n'.join(
+            f"{datetime.fromtimestamp(alert.time).strftime('%Y-%m-%d %H:%M:%S')} {format_alert(alert)}"
+            for alert in alerts))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+def create_sink(settings, results_dir='results'):
+    """alerts.sinks 항목 1개로 sink 생성"""
+    settings = dict(settings)
+    sink_type = settings.pop('type', None)
+    if sink_type == 'file':
+        return FileAlertSink(settings.get('path') or os.path.join(results_dir, 'alerts.jsonl'))
+    if sink_type == 'webhook':
+        return WebhookAlertSink(settings['url'], timeout=settings.get('timeout', 10), headers=settings.get('headers'))
+    if sink_type == 'smtp':
+        return SmtpAlertSink(**settings)
+    raise ValueError(f"Unknown alert sink type: {sink_type}")
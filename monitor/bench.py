@@ -0,0 +1,454 @@
+"""로컬 SSH 대역(stand-in) 서버 묶음을 대상으로 한 점검 성능 측정
+
+실제 서버 없이 localhost 에 paramiko ServerInterface 기반 가짜 SSH 서버를 띄우고
+MonitoringEngine 으로 반복 점검해 처리량과 서버별 소요 시간을 측정한다.
+동시 점검 수, 명령어 일괄 수집, 연결 풀 등 변경 전후 비교 기준으로 사용한다.
+
+    python -m monitor.bench --hosts 200 --workers 20 --latency 0.02 --sweeps 3
+    python -m monitor.bench --hosts 200 --no-batch --no-pool --format json
+    python -m monitor.bench --hosts 1000 --workers 40 --shards 4
+
+- 가짜 서버는 포트 1개로 모든 호스트를 처리하며, 호스트는 사용자 이름(bench<N>)으로 구분
+- /proc 수집 스크립트와 systemctl/ps 명령어에는 그럴듯한 고정 형식의 출력을 반환 (원격 셸 실행 없음)
+- 개별 명령어 중 하나(build)는 줄바꿈 없이 끝나는 출력을 반환해 일괄 수집 구분자 처리를 함께 확인
+  (결과 값이 기대와 다른 서버 수를 bad_results 로 보고)
+- latency: 접속(TCP+키 교환), 인증, 채널 생성, 명령어 응답 단계마다 지연을 넣어 왕복 시간을 근사
+- failure_rate: 인증 실패 호스트 비율, hang_rate: 명령어에 응답하지 않는 호스트 비율
+- shards: 수집 프로세스(ShardPool) 수, 연결은 수집 프로세스에 유지되므로 회차마다 새로 연결하고
+  연결 시간은 획득 대기 대신 dns/tcp/kex/auth 단계 합계로 계산
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import paramiko
+
+from monitor.config import compile_config
+from monitor.engine import MonitoringEngine, setup_logging
+from monitor.procfs import SECTION_PREFIX, ProcMetricsCollector
+from monitor.ssh_pool import SSHConnectionPool
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_BATCH_SECTION = re.compile(r"printf '\\n%s\\n' '(__SHM_\w+__) (\d+)'\n\( (.*?)\n\) 2>/dev/null\n", re.DOTALL)
+_BATCH_END = re.compile(r"printf '\\n%s\\n' '(__SHM_\w+__) end'")
+_PRINTF = 'printf %s '
+_SLEEP = re.compile(r'^sleep ([\d.]+)$', re.MULTILINE)
+
+
+BUILD_OUTPUT = '42'  # build 명령어의 기대 결과
+_CONNECT_PHASES = ('dns', 'tcp', 'kex', 'auth')
+
+
+def result_ok(results):
+    """가짜 서버 점검 결과가 기대한 값인지 (일괄 수집 구분자 처리 확인용)"""
+    services = results.get('services') or {}
+    return (results.get('build') == BUILD_OUTPUT and results.get('sessions') == '0'
+            and services.get('sshd') == {'status': 'active', 'process_count': '1'})
+
+
+class _HostProfile:
+    """가짜 호스트 1대의 동작 설정"""
+
+    def __init__(self, index, fail=False, hang=False, cores=4):
+        self.index = index
+        self.fail = fail
+        self.hang = hang
+        self.cores = cores
+        self.jiffies_base = random.randint(10 ** 6, 10 ** 7)
+
+
+class _StandInServer(paramiko.ServerInterface):
+    """연결 1개를 처리하는 가짜 SSH 서버"""
+
+    def __init__(self, fleet):
+        self.fleet = fleet
+        self.host = None
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        self.fleet.delay()
+        self.host = self.fleet.hosts_by_user.get(username)
+        if self.host is None or self.host.fail:
+            return paramiko.AUTH_FAILED
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        self.fleet.delay()
+        return paramiko.OPEN_SUCCEEDED if kind == 'session' else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.fleet.execute, args=(self.host, channel, command.decode()),
+                         name='bench-exec', daemon=True).start()
+        return True
+
+
+class StandInFleet:
+    """localhost 포트 1개로 동작하는 가짜 SSH 서버 묶음"""
+
+    def __init__(self, hosts, latency=0.0, command_delay=0.0, failure_rate=0.0, hang_rate=0.0, seed=1):
+        rng = random.Random(seed)
+        self.latency = latency  # 단계별 지연(초)
+        self.command_delay = command_delay  # 명령어 1건 실행 시간(초)
+        self.hosts_by_user = {}
+        for index in range(hosts):
+            roll = rng.random()
+            self.hosts_by_user[f'bench{index}'] = _HostProfile(
+                index, fail=roll < failure_rate, hang=failure_rate <= roll < failure_rate + hang_rate)
+        self.host_key = paramiko.ECDSAKey.generate()
+        self.connections = 0
+        self._transports = []
+        self._lock = threading.Lock()
+        self._socket = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(512)
+        threading.Thread(target=self._accept_loop, name='bench-accept', daemon=True).start()
+        return self
+
+    @property
+    def port(self):
+        return self._socket.getsockname()[1]
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+        with self._lock:
+            transports, self._transports = self._transports, []
+        for transport in transports:
+            transport.close()
+
+    def server_config(self, results_dir, logs_dir, workers=10, batch=True, command_timeout=5, host_timeout=30,
+                      store=True, shards=0):
+        """가짜 서버 묶음 점검용 설정 (CompiledConfig)"""
+        servers = [{
+            'name': f'bench-{host.index}',
+            'ip': '127.0.0.1',
+            'port': self.port,
+            'username': user,
+            'password': 'bench',
+            'services': [{'name': 'sshd', 'type': 'systemctl'}],
+            'commands': {'sessions': 'who | wc -l', 'build': f'{_PRINTF}{BUILD_OUTPUT}'},
+        } for user, host in self.hosts_by_user.items()]
+        return compile_config({
+            'default_settings': {
+                'logs_dir': logs_dir,
+                'results_dir': results_dir,
+                'port': self.port,
+                'max_workers': workers,
+                'shards': shards,
+                'batch_commands': batch,
+                'timeouts': {'connect': command_timeout, 'command': command_timeout, 'host': host_timeout},
+                'connection_pool': {'max_size': max(len(servers), 1)},
+                'metric_store': {'enabled': store},
+                'alerts': {'enabled': False},
+                'health': {'enabled': False},  # 실패 서버도 매 회차 점검 (차단하면 회차별 비교가 안됨)
+            },
+            'servers': servers,
+        })
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                sock, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._start_transport, args=(sock,), name='bench-conn', daemon=True).start()
+
+    def _start_transport(self, sock):
+        # TCP 연결 + 키 교환 왕복 근사
+        self.delay()
+        self.delay()
+        transport = paramiko.Transport(sock)
+        transport.add_server_key(self.host_key)
+        with self._lock:
+            self.connections += 1
+            self._transports.append(transport)
+        try:
+            transport.start_server(server=_StandInServer(self))
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+
+    def execute(self, host, channel, command):
+        """명령어(또는 일괄 수집 스크립트)에 대한 가짜 출력 전송"""
+        try:
+            self.delay()
+            if host.hang:
+                # 응답하지 않는 호스트: 클라이언트가 채널을 닫을 때까지 대기
+                while not channel.closed and not self._stopped.is_set():
+                    time.sleep(0.1)
+                return
+            sections = _BATCH_SECTION.findall(command)
+            if sections:
+                for marker, idx, cmd in sections:
+                    output = self._respond(host, cmd)
+                    channel.sendall(f"\n{marker} {idx}\n{output}".encode())
+                end = _BATCH_END.search(command)
+                if end:
+                    channel.sendall(f"\n{end.group(1)} end\n".encode())
+            else:
+                channel.sendall(self._respond(host, command).encode())
+            channel.send_exit_status(0)
+            # 요청 응답(exec 성공)보다 close 가 먼저 도착하지 않도록 EOF 만 보내고 클라이언트가 닫기를 기다림
+            channel.shutdown_write()
+            closing_deadline = time.monotonic() + 5
+            while not channel.closed and time.monotonic() < closing_deadline and not self._stopped.is_set():
+                time.sleep(0.01)
+        except (OSError, EOFError, paramiko.SSHException):
+            pass
+        finally:
+            channel.close()
+
+    def _respond(self, host, cmd):
+        if self.command_delay:
+            time.sleep(self.command_delay)
+        if SECTION_PREFIX in cmd:
+            return self._proc_output(host, cmd)
+        if cmd.startswith('systemctl is-active'):
+            return 'active\n'
+        if cmd.startswith('ps aux'):
+            return '1\n'
+        if cmd.startswith(_PRINTF):
+            return cmd[len(_PRINTF):]  # 줄바꿈 없이 끝나는 출력
+        return '0\n'
+
+    def _proc_output(self, host, cmd):
+        """/proc 수집 스크립트 출력 (procfs.ProcMetricsCollector.parse 형식)"""
+        lines = [f'{SECTION_PREFIX}stat'] + self._cpu_lines(host)
+        lines += [f'{SECTION_PREFIX}meminfo', 'MemTotal:       16384000 kB', 'MemFree:         2048000 kB',
+                  'MemAvailable:    8192000 kB', 'Buffers:          512000 kB', 'Cached:          4096000 kB']
+        lines += [f'{SECTION_PREFIX}loadavg', f'{0.1 * host.cores:.2f} 0.30 0.20 1/300 12345']
+        lines += [f'{SECTION_PREFIX}uptime', f'{86400 + host.index}.00 100000.00']
+        lines += [f'{SECTION_PREFIX}statfs', '4096 26214400 13107200 12058624']
+        sleep = _SLEEP.search(cmd)
+        if sleep and 'stat2' in cmd:
+            time.sleep(float(sleep.group(1)))
+            lines += [f'{SECTION_PREFIX}stat2'] + self._cpu_lines(host)
+        return '\n'.join(lines) + '\n'
+
+    def _cpu_lines(self, host):
+        # 경과 시간에 비례해 증가하는 jiffies (CPU 약 25% 사용)
+        ticks = host.jiffies_base + int(time.monotonic() * 100 * host.cores)
+        busy, idle = ticks // 4, ticks - ticks // 4
+        lines = [f'cpu  {busy} 0 0 {idle} 0 0 0 0 0 0']
+        per_core_busy, per_core_idle = busy // host.cores, idle // host.cores
+        lines += [f'cpu{core} {per_core_busy} 0 0 {per_core_idle} 0 0 0 0 0 0' for core in range(host.cores)]
+        return lines
+
+
+class _TimingPool(SSHConnectionPool):
+    """연결 획득 시간을 기록하는 연결 풀"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquire_times = {}  # 사용자 이름(호스트) -> 마지막 연결 획득 시간(초)
+
+    def acquire(self, connect_params, timer=None):
+        started = time.perf_counter()
+        try:
+            return super().acquire(connect_params, timer)
+        finally:
+            self.acquire_times[connect_params['username']] = time.perf_counter() - started
+
+
+class _TimedEngine(MonitoringEngine):
+    """서버별 점검 소요 시간을 기록하는 엔진"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.host_times = {}  # 서버이름 -> (점검 시간, 연결 획득 시간)
+
+    def monitor_server(self, server):
+        started = time.perf_counter()
+        try:
+            return super().monitor_server(server)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.host_times[server['name']] = (elapsed, self.ssh_pool.acquire_times.get(server['username'], 0.0))
+
+    # 수집 프로세스 사용 시에는 monitor_server 대신 shard 에서 전달된 단계별 시간으로 기록
+
+    def finish_check(self, server, results, timer):
+        try:
+            return super().finish_check(server, results, timer)
+        finally:
+            self._record_shard_time(server, timer)
+
+    def report_failure(self, server, status, detail, timer):
+        try:
+            return super().report_failure(server, status, detail, timer)
+        finally:
+            self._record_shard_time(server, timer)
+
+    def _record_shard_time(self, server, timer):
+        if self.shard_pool is not None:
+            connect = sum(timer.phases.get(phase, 0.0) for phase in _CONNECT_PHASES)
+            self.host_times[server['name']] = (time.perf_counter() - timer.started, connect)
+
+
+def percentile(values, pct):
+    """정렬된 값 목록의 백분위수 (선형 보간)"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def max_rss_mb():
+    """프로세스 최대 RSS (MB), 측정할 수 없으면 None"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_benchmark(hosts=100, workers=10, sweeps=2, latency=0.0, command_delay=0.0, failure_rate=0.0,
+                  hang_rate=0.0, batch=True, reuse_pool=True, store=True, command_timeout=5, trace_memory=False,
+                  work_dir=None, seed=1, shards=0):
+    """가짜 서버 묶음을 sweeps 회 점검하고 회차별 측정 결과 목록 반환"""
+    work_dir = work_dir or tempfile.mkdtemp(prefix='monitor-bench-')
+    logs_dir = os.path.join(work_dir, 'logs')
+    setup_logging(logs_dir, console=False)
+    fleet = StandInFleet(hosts, latency=latency, command_delay=command_delay, failure_rate=failure_rate,
+                         hang_rate=hang_rate, seed=seed).start()
+    compiled = fleet.server_config(os.path.join(work_dir, 'results'), logs_dir, workers=workers, batch=batch,
+                                   command_timeout=command_timeout, store=store, shards=shards)
+    if trace_memory:
+        tracemalloc.start()
+    pool = None
+    proc_collector = ProcMetricsCollector()  # 2회차부터는 직전 CPU 샘플 사용 (연속 점검과 동일)
+    reports = []
+    try:
+        for sweep in range(1, sweeps + 1):
+            if pool is None or not reuse_pool:
+                if pool is not None:
+                    pool.close_all()
+                pool = _TimingPool(max_size=max(hosts, 1))
+            failures = {'timeout': 0, 'error': 0}
+            bad_results = []
+
+            def on_failure(name, status, message):
+                failures[status] += 1
+
+            def on_result(name, results):
+                if not result_ok(results):
+                    bad_results.append(name)
+
+            connections_before = fleet.connections
+            engine = _TimedEngine(compiled.config, ssh_pool=pool, proc_collector=proc_collector, rules=compiled.rules,
+                                  on_result=on_result, on_failure=on_failure)
+            started = time.perf_counter()
+            engine.run()
+            wall = time.perf_counter() - started
+
+            host_times = sorted(elapsed for elapsed, _ in engine.host_times.values())
+            total_host = sum(host_times)
+            total_connect = sum(connect for _, connect in engine.host_times.values())
+            report = {
+                'sweep': sweep,
+                'hosts': hosts,
+                'shards': shards,
+                'wall_seconds': round(wall, 3),
+                'hosts_per_sec': round(hosts / wall, 1) if wall else 0.0,
+                'p50_ms': round(percentile(host_times, 50) * 1000, 1),
+                'p95_ms': round(percentile(host_times, 95) * 1000, 1),
+                'p99_ms': round(percentile(host_times, 99) * 1000, 1),
+                'connect_share': round(total_connect / total_host, 3) if total_host else 0.0,
+                'new_connections': fleet.connections - connections_before,
+                'timeouts': failures['timeout'],
+                'errors': failures['error'],
+                'bad_results': len(bad_results),
+                'max_rss_mb': max_rss_mb(),
+            }
+            if trace_memory:
+                report['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                tracemalloc.reset_peak()
+            if report['max_rss_mb'] is not None:
+                report['max_rss_mb'] = round(report['max_rss_mb'], 1)
+            reports.append(report)
+    finally:
+        if pool is not None:
+            pool.close_all()
+        if trace_memory:
+            tracemalloc.stop()
+        fleet.stop()
+    return reports
+
+
+def format_report(report):
+    shards = f" ({report['shards']} shards)" if report.get('shards', 0) > 1 else ''
+    line = (f"sweep {report['sweep']}: {report['hosts']} hosts{shards} in {report['wall_seconds']:.2f}s "
+            f"({report['hosts_per_sec']:.1f} hosts/s) p50={report['p50_ms']:.0f}ms p95={report['p95_ms']:.0f}ms "
+            f"p99={report['p99_ms']:.0f}ms connect={report['connect_share'] * 100:.0f}% "
+            f"new_conn={report['new_connections']} timeout={report['timeouts']} error={report['errors']} "
+            f"bad={report['bad_results']}")
+    if report['max_rss_mb'] is not None:
+        line += f" rss={report['max_rss_mb']:.0f}MB"
+    if 'traced_peak_mb' in report:
+        line += f" traced_peak={report['traced_peak_mb']:.1f}MB"
+    return line
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m monitor.bench', description='가짜 SSH 서버 묶음 대상 점검 성능 측정')
+    parser.add_argument('--hosts', type=int, default=100, help='가짜 서버 수')
+    parser.add_argument('--workers', type=int, default=10, help='동시 점검 서버 수')
+    parser.add_argument('--sweeps', type=int, default=2, help='반복 점검 횟수 (2회차부터 연결 풀 재사용)')
+    parser.add_argument('--latency', type=float, default=0.0, help='단계별 네트워크 지연 (초)')
+    parser.add_argument('--command-delay', type=float, default=0.0, help='명령어 1건 실행 시간 (초)')
+    parser.add_argument('--fail', type=float, default=0.0, help='인증 실패 서버 비율 (0~1)')
+    parser.add_argument('--hang', type=float, default=0.0, help='응답하지 않는 서버 비율 (0~1)')
+    parser.add_argument('--command-timeout', type=float, default=5, help='접속/명령어 제한 시간 (초)')
+    parser.add_argument('--shards', type=int, default=0, help='수집 프로세스 수 (0/1 이면 단일 프로세스)')
+    parser.add_argument('--no-batch', action='store_true', help='명령어 일괄 수집 끄기')
+    parser.add_argument('--no-pool', action='store_true', help='회차마다 연결 풀을 새로 만들기 (연결 재사용 안함)')
+    parser.add_argument('--no-store', action='store_true', help='시계열 저장소 기록 끄기')
+    parser.add_argument('--tracemalloc', action='store_true', help='Python 메모리 할당 최대치 측정 (느려짐)')
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help='출력 형식')
+    parser.add_argument('--seed', type=int, default=1, help='실패/무응답 서버 선택용 난수 시드')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    reports = run_benchmark(
+        hosts=args.hosts, workers=args.workers, sweeps=args.sweeps, latency=args.latency,
+        command_delay=args.command_delay, failure_rate=args.fail, hang_rate=args.hang,
+        batch=not args.no_batch, reuse_pool=not args.no_pool, store=not args.no_store,
+        command_timeout=args.command_timeout, trace_memory=args.tracemalloc, seed=args.seed, shards=args.shards,
+    )
+    for report in reports:
+        print(json.dumps(report) if args.format == 'json' else format_report(report), flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""GUI 없이 실행하는 CLI (cron, 서비스 등록용)
+
+    python -m monitor                 # 전체 서버 1회 점검
+    python -m monitor --daemon        # 서버별 interval 로 중지(Ctrl+C, SIGTERM)될 때까지 반복 점검 (설정 파일 변경 자동 반영)
+    python -m monitor --format json   # 결과를 JSON Lines 로 출력
+    python -m monitor --profile sweep.pstats  # 점검 전체 cProfile
+
+종료 코드 (1회 점검): 0 정상, 1 임계값(경고/위험) 초과 서버 있음, 2 점검 오류/시간 초과/연속 실패로 차단된 서버 있음
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+from datetime import datetime
+
+from monitor.config import DEFAULT_CONFIG_PATH, ConfigError, ConfigWatcher, load_compiled_config
+from monitor.engine import MonitoringEngine, setup_logging
+from monitor.rules import LEVEL_NAMES, breach_to_dict, max_level
+
+
+class ResultPrinter:
+    """엔진 이벤트를 표준출력으로 기록 (여러 스레드에서 호출됨)"""
+
+    def __init__(self, output_format, servers):
+        self.output_format = output_format
+        self.servers = {server['name']: server for server in servers}
+        self.engine = None
+        self.counts = {'ok': 0, 'warning': 0, 'critical': 0, 'timeout': 0, 'error': 0, 'skipped': 0}
+        self._lock = threading.Lock()
+
+    def on_result(self, server_name, results):
+        warnings = self.engine.check_thresholds(self.servers.get(server_name, {'name': server_name}), results)
+        status = LEVEL_NAMES[max_level(warnings)]
+        if self.output_format == 'json':
+            line = json.dumps({
+                'event': 'result',
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'server': server_name,
+                'status': status,
+                'warnings': [breach_to_dict(breach) for breach in warnings],
+                'results': results,
+            }, ensure_ascii=False, default=str)
+        else:
+            line = (f"[{status.upper()}] {server_name} "
+                    f"cpu={results['cpu']:.1f}% memory={results['memory']:.2f}% disk={results['disk']:.1f}% "
+                    f"load={results['load_avg']}")
+            if warnings:
+                line += ' exceeded=' + ','.join(f"{breach.label}({LEVEL_NAMES[breach.level]})" for breach in warnings)
+        self._print(status, line)
+
+    def on_failure(self, server_name, status, message):
+        # 서버별 시간 초과/오류/차단 (JSON 이벤트에 서버 이름 포함)
+        if self.output_format == 'json':
+            line = json.dumps({
+                'event': status,
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'server': server_name,
+                'message': message,
+            }, ensure_ascii=False)
+        else:
+            line = f"[{status.upper()}] {message}"
+        self._print(status, line)
+
+    def on_error(self, message):
+        # 서버와 무관한 점검 전체 오류
+        if self.output_format == 'json':
+            line = json.dumps({
+                'event': 'error',
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'message': message,
+            }, ensure_ascii=False)
+        else:
+            line = f"[ERROR] {message}"
+        self._print('error', line)
+
+    def print_summary(self):
+        total = len(self.servers)
+        if self.output_format == 'json':
+            self._print(None, json.dumps({'event': 'summary', 'servers': total, **self.counts}))
+        else:
+            self._print(None, f"servers={total} ok={self.counts['ok']} warning={self.counts['warning']} "
+                              f"critical={self.counts['critical']} timeout={self.counts['timeout']} error={self.counts['error']} "
+                              f"skipped={self.counts['skipped']}")
+
+    def exit_code(self):
+        if self.counts['error'] or self.counts['timeout'] or self.counts['skipped']:
+            return 2
+        if self.counts['warning'] or self.counts['critical']:
+            return 1
+        return 0
+
+    def _print(self, status, line):
+        with self._lock:
+            if status is not None:
+                self.counts[status] += 1
+            print(line, flush=True)
+
+
+def select_servers(config, names=None, workers=None, shards=None):
+    """--servers, --workers, --shards 옵션 적용"""
+    if names is not None:
+        config = {**config, 'servers': [server for server in config['servers'] if server['name'] in names]}
+    if workers:
+        config = {**config, 'default_settings': {**config['default_settings'], 'max_workers': workers}}
+    if shards is not None:
+        config = {**config, 'default_settings': {**config['default_settings'], 'shards': shards}}
+    return config
+
+
+def watch_config(args, compiled, engine, printer, names):
+    """설정 파일 변경을 감지해 추가/삭제/변경된 서버만 실행중인 엔진에 반영"""
+    watcher = ConfigWatcher(args.config, compiled)
+    while not engine.stop_event.wait(args.reload_interval):
+        try:
+            changed = watcher.poll()
+        except Exception as e:
+            engine.logger.error(f"Config reload failed, keeping previous config: {str(e)}")
+            continue
+        if changed is None:
+            continue
+        compiled, diff = changed
+        if names is not None:
+            # --servers 로 지정한 서버만 대상
+            diff = diff._replace(**{field: [name for name in getattr(diff, field) if name in names]
+                                    for field in ('added', 'removed', 'changed')})
+        printer.servers = {name: server for name, server in compiled.servers_by_name.items()
+                           if names is None or name in names}
+        engine.request_reload(compiled, diff)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m monitor', description='서버 자원 점검 (GUI 없이 실행)')
+    parser.add_argument('-c', '--config', default=DEFAULT_CONFIG_PATH, help='설정 파일 경로 (기본: servers.yaml)')
+    parser.add_argument('--daemon', action='store_true', help='서버별 interval 로 중지될 때까지 반복 점검')
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help='출력 형식')
+    parser.add_argument('--servers', help='점검할 서버 이름 (쉼표로 구분, 기본: 전체)')
+    parser.add_argument('--workers', type=int, help='동시 점검 서버 수 (default_settings.max_workers 대신 사용)')
+    parser.add_argument('--shards', type=int,
+                        help='수집 프로세스 수 (default_settings.shards 대신 사용, 0/1 이면 단일 프로세스)')
+    parser.add_argument('--reload-interval', type=float, default=2,
+                        help='--daemon 실행시 설정 파일 변경 확인 주기 (초, 0 이면 확인 안함)')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='점검 전체를 cProfile 로 측정해 PATH 에 저장 (python -m pstats PATH 로 확인)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='콘솔 로그 출력 안함 (로그 파일에는 기록)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # 설정 오류는 점검 시작 전에 보고
+    try:
+        compiled = load_compiled_config(args.config)
+    except ConfigError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+
+    names = None
+    if args.servers:
+        names = {name.strip() for name in args.servers.split(',') if name.strip()}
+        unknown = names - set(compiled.servers_by_name)
+        if unknown:
+            print(f"Unknown server: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 2
+    config = select_servers(compiled.config, names, args.workers, args.shards)
+
+    setup_logging(config['default_settings']['logs_dir'], console=not args.quiet)
+
+    printer = ResultPrinter(args.format, config['servers'])
+    engine = MonitoringEngine(
+        config,
+        continuous=args.daemon,
+        rules=compiled.rules,
+        profile_path=args.profile,
+        on_result=printer.on_result,
+        on_error=printer.on_error,
+        on_failure=printer.on_failure,
+    )
+    printer.engine = engine
+
+    def request_stop(signum, frame):
+        # 시그널 핸들러에서는 잠금을 잡지 않도록 별도 스레드에서 중지 처리
+        threading.Thread(target=engine.stop, daemon=True).start()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    if args.daemon and args.reload_interval > 0:
+        threading.Thread(target=watch_config, args=(args, compiled, engine, printer, names),
+                         name='config-watcher', daemon=True).start()
+
+    engine.run()
+    if args.daemon:
+        return 0
+    printer.print_summary()
+    return printer.exit_code()
@@ -0,0 +1,355 @@
+"""servers.yaml 설정 파일 로드
+
+- libyaml 이 설치되어 있으면 C 로더(CSafeLoader) 사용
+- 로드 시 전체 설정을 검증해 오타/누락을 점검 시작 전에 ConfigError 로 보고
+- 서버별 설정에 기본값(port, interval, timeouts, batch_commands)을 병합하고 임계값 규칙을 미리 컴파일
+- 파일 내용(sha256)이 같으면 컴파일된 설정을 메모리 캐시에서 재사용
+  (설정에 비밀번호가 포함되므로 디스크에는 캐시하지 않음)
+- ConfigWatcher 로 파일 변경을 감지해 추가/삭제/변경된 서버만 반영
+"""
+import hashlib
+import os
+import re
+from collections import namedtuple
+
+import yaml
+
+from monitor.rules import RuleEngine, compile_rules
+
+DEFAULT_CONFIG_PATH = 'servers.yaml'
+DEFAULT_INTERVAL = 300  # 연속 점검 주기 기본값 (초)
+
+# 제한 시간 기본값 (초), default_settings.timeouts 및 서버별 timeouts 로 재정의
+DEFAULT_TIMEOUTS = {
+    'connect': 10,  # TCP 연결, SSH 배너, 인증 각각의 제한 시간
+    'command': 30,  # 명령어 1건 (일괄 수집 시 명령어별로 적용)
+    'host': 120,  # 서버 1대 전체 점검
+}
+
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+DEFAULT_SETTINGS_KEYS = {
+    'logs_dir', 'results_dir', 'port', 'result_formats', 'max_workers', 'batch_commands', 'timeouts',
+    'connection_pool', 'interval', 'start_jitter', 'metric_store', 'log_tail', 'alerts', 'thresholds',
+    'self_metrics', 'health', 'shards', 'agent',
+}
+SERVER_KEYS = {
+    'name', 'ip', 'port', 'username', 'password', 'key_filename', 'interval', 'timeouts', 'batch_commands',
+    'thresholds', 'services', 'commands', 'log_watches', 'agent',
+}
+SERVICE_TYPES = {'systemctl'}
+
+ConfigDiff = namedtuple('ConfigDiff', 'added removed changed defaults_changed')
+
+_compiled_cache = {}  # 파일 경로 -> CompiledConfig
+
+
+class ConfigError(ValueError):
+    """설정 파일 검증 실패 (errors: 항목별 오류 메시지 목록)"""
+
+    def __init__(self, errors, path=None):
+        self.errors = list(errors)
+        self.path = path
+        shown = self.errors[:20]
+        more = f"\n  ... {len(self.errors) - len(shown)} more" if len(self.errors) > len(shown) else ''
+        location = f" {path}" if path else ''
+        super().__init__(f"Invalid config{location}:\n  " + '\n  '.join(shown) + more)
+
+
+class CompiledConfig:
+    """검증과 기본값 병합이 끝난 설정
+
+    config 는 엔진/GUI 에 그대로 전달하는 dict 이며, servers 의 각 항목에는 기본값이 채워져 있다.
+    """
+
+    def __init__(self, config, digest=None):
+        self.config = config
+        self.digest = digest
+        self.servers_by_name = {server['name']: server for server in config['servers']}
+        self.rules = RuleEngine(config)
+
+    def diff(self, new):
+        """이 설정 -> new 설정으로 바뀐 서버 목록"""
+        old_servers, new_servers = self.servers_by_name, new.servers_by_name
+        return ConfigDiff(
+            added=[name for name in new_servers if name not in old_servers],
+            removed=[name for name in old_servers if name not in new_servers],
+            changed=[name for name in new_servers if name in old_servers and new_servers[name] != old_servers[name]],
+            defaults_changed=self.config['default_settings'] != new.config['default_settings'],
+        )
+
+
+def load_config(path=DEFAULT_CONFIG_PATH):
+    """설정 파일을 읽어 검증된 dict 로 반환"""
+    return load_compiled_config(path).config
+
+
+def load_compiled_config(path=DEFAULT_CONFIG_PATH, use_cache=True):
+    """설정 파일을 읽어 CompiledConfig 로 반환 (파일 내용이 같으면 캐시 재사용)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return compile_config_bytes(data, path, use_cache=use_cache)
+
+
+def compile_config_bytes(data, path=DEFAULT_CONFIG_PATH, use_cache=True):
+    digest = hashlib.sha256(data).hexdigest()
+    if use_cache:
+        cached = _compiled_cache.get(path)
+        if cached is not None and cached.digest == digest:
+            return cached
+
+    try:
+        raw = yaml.load(data, Loader=_YAML_LOADER)
+    except yaml.YAMLError as e:
+        raise ConfigError([f"YAML parse error: {str(e)}"], path) from None
+    compiled = compile_config(raw, digest, path)
+
+    if use_cache:
+        _compiled_cache[path] = compiled
+    return compiled
+
+
+def compile_config(raw, digest=None, path=None):
+    """설정 dict 검증 및 서버별 기본값 병합 -> CompiledConfig"""
+    errors = validate_config(raw)
+    if errors:
+        raise ConfigError(errors, path)
+
+    # 서버 dict 만 새로 만들어 기본값 병합 (원본 dict 는 변경하지 않음)
+    config = {**raw, 'servers': [dict(server) for server in raw['servers']]}
+    default_settings = config['default_settings']
+    timeouts = {**DEFAULT_TIMEOUTS, **(default_settings.get('timeouts') or {})}
+    for server in config['servers']:
+        server.setdefault('port', default_settings['port'])
+        server.setdefault('interval', default_settings.get('interval', DEFAULT_INTERVAL))
+        server.setdefault('batch_commands', default_settings.get('batch_commands', True))
+        server['timeouts'] = {**timeouts, **(server.get('timeouts') or {})}
+    try:
+        return CompiledConfig(config, digest)
+    except ValueError as e:
+        raise ConfigError([str(e)], path) from None
+
+
+def validate_config(config):
+    """설정 검증 -> 오류 메시지 목록 (없으면 빈 목록)"""
+    if not isinstance(config, dict):
+        return ['top level must be a mapping with default_settings and servers']
+    errors = []
+    default_settings = config.get('default_settings')
+    if not isinstance(default_settings, dict):
+        errors.append('default_settings: missing or not a mapping')
+        default_settings = {}
+    else:
+        _check_keys(errors, 'default_settings', default_settings, DEFAULT_SETTINGS_KEYS)
+        for key in ('logs_dir', 'results_dir'):
+            if not isinstance(default_settings.get(key), str):
+                errors.append(f"default_settings.{key}: required string")
+        _check_port(errors, 'default_settings.port', default_settings.get('port'), required=True)
+        _check_common(errors, 'default_settings', default_settings)
+        if 'max_workers' in default_settings and not _is_int(default_settings['max_workers'], minimum=1):
+            errors.append('default_settings.max_workers: must be an integer >= 1')
+        if 'shards' in default_settings and not _is_int(default_settings['shards'], minimum=0):
+            errors.append('default_settings.shards: must be an integer >= 0')
+        if 'start_jitter' in default_settings and not _is_number(default_settings['start_jitter'], minimum=0):
+            errors.append('default_settings.start_jitter: must be a number >= 0')
+        self_metrics = default_settings.get('self_metrics')
+        if self_metrics is not None and not isinstance(self_metrics, dict):
+            errors.append('default_settings.self_metrics: must be a mapping')
+        elif self_metrics:
+            _check_port(errors, 'default_settings.self_metrics.http_port', self_metrics.get('http_port'))
+        health = default_settings.get('health')
+        if health is not None and not isinstance(health, dict):
+            errors.append('default_settings.health: must be a mapping')
+        elif health:
+            for key in ('backoff_max', 'slow_factor', 'fast_factor', 'near_ratio', 'min_interval'):
+                if key in health and not _is_number(health[key], minimum=0, exclusive=True):
+                    errors.append(f"default_settings.health.{key}: must be a number > 0")
+            for key in ('circuit_failures', 'stable_checks'):
+                if key in health and not _is_int(health[key], minimum=1):
+                    errors.append(f"default_settings.health.{key}: must be an integer >= 1")
+        agent = default_settings.get('agent')
+        if agent is not None and not isinstance(agent, dict):
+            errors.append('default_settings.agent: must be a mapping')
+        elif agent:
+            if 'enabled' in agent and not isinstance(agent['enabled'], bool):
+                errors.append('default_settings.agent.enabled: must be true or false')
+            if 'remote_dir' in agent and (not isinstance(agent['remote_dir'], str) or not agent['remote_dir']):
+                errors.append('default_settings.agent.remote_dir: must be a non-empty string')
+            for key in ('sample_interval', 'idle_exit'):
+                if key in agent and not _is_number(agent[key], minimum=0, exclusive=True):
+                    errors.append(f"default_settings.agent.{key}: must be a number > 0")
+        formats = default_settings.get('result_formats', ['text'])
+        if not isinstance(formats, list) or not set(formats) <= {'text', 'jsonl'}:
+            errors.append("default_settings.result_formats: must be a list of 'text', 'jsonl'")
+
+    servers = config.get('servers')
+    if not isinstance(servers, list):
+        errors.append('servers: missing or not a list')
+        return errors
+    default_thresholds = default_settings.get('thresholds')
+    if isinstance(default_thresholds, dict):
+        _check_thresholds(errors, 'default_settings.thresholds', default_thresholds, None)
+    else:
+        default_thresholds = None
+
+    seen = set()
+    for i, server in enumerate(servers):
+        where = f"servers[{i}]"
+        if not isinstance(server, dict):
+            errors.append(f"{where}: must be a mapping")
+            continue
+        name = server.get('name')
+        if not isinstance(name, str) or not name:
+            errors.append(f"{where}.name: required string")
+        else:
+            where = f"servers[{i}] ({name})"
+            if name in seen:
+                errors.append(f"{where}: duplicate server name")
+            seen.add(name)
+        _validate_server(errors, where, server)
+        if isinstance(server.get('thresholds'), dict):
+            _check_thresholds(errors, f"{where}.thresholds", default_thresholds, server['thresholds'])
+    return errors
+
+
+def _check_thresholds(errors, where, default_thresholds, server_thresholds):
+    try:
+        compile_rules(default_thresholds, server_thresholds)
+    except ValueError as e:
+        errors.append(f"{where}: {str(e)}")
+
+
+def _validate_server(errors, where, server):
+    _check_keys(errors, where, server, SERVER_KEYS)
+    for key in ('ip', 'username'):
+        if not isinstance(server.get(key), str) or not server.get(key):
+            errors.append(f"{where}.{key}: required string")
+    if 'key_filename' not in server and 'password' not in server:
+        errors.append(f"{where}: password or key_filename required")
+    _check_port(errors, f"{where}.port", server.get('port'))
+    _check_common(errors, where, server)
+    if 'agent' in server and not isinstance(server['agent'], bool):
+        errors.append(f"{where}.agent: must be true or false")
+
+    check_names = set()
+    commands = server.get('commands') or {}
+    if not isinstance(commands, dict):
+        errors.append(f"{where}.commands: must be a mapping of name: command")
+    else:
+        for cmd_name, cmd in commands.items():
+            if not isinstance(cmd, str):
+                errors.append(f"{where}.commands.{cmd_name}: command must be a string")
+            check_names.add(cmd_name)
+
+    services = server.get('services') or []
+    if not isinstance(services, list):
+        errors.append(f"{where}.services: must be a list")
+        services = []
+    for j, service in enumerate(services):
+        if not isinstance(service, dict) or not isinstance(service.get('name'), str):
+            errors.append(f"{where}.services[{j}]: name required")
+        elif service.get('type') not in SERVICE_TYPES:
+            errors.append(f"{where}.services[{j}] ({service['name']}): unknown type {service.get('type')!r}")
+
+    watches = server.get('log_watches') or []
+    if not isinstance(watches, list):
+        errors.append(f"{where}.log_watches: must be a list")
+        watches = []
+    for j, watch in enumerate(watches):
+        if not isinstance(watch, dict) or not isinstance(watch.get('name'), str) \
+                or not isinstance(watch.get('path'), str):
+            errors.append(f"{where}.log_watches[{j}]: name and path required")
+            continue
+        if watch['name'] in check_names:
+            errors.append(f"{where}.log_watches[{j}]: name {watch['name']!r} already used by a command")
+        check_names.add(watch['name'])
+        if watch.get('pattern') is not None:
+            try:
+                re.compile(watch['pattern'])
+            except (re.error, TypeError) as e:
+                errors.append(f"{where}.log_watches[{j}].pattern: {str(e)}")
+
+
+def _check_common(errors, where, settings):
+    """default_settings 와 서버 설정에 공통으로 쓰는 항목 검증"""
+    if 'interval' in settings and not _is_number(settings['interval'], minimum=0, exclusive=True):
+        errors.append(f"{where}.interval: must be a number > 0")
+    if 'batch_commands' in settings and not isinstance(settings['batch_commands'], bool):
+        errors.append(f"{where}.batch_commands: must be true or false")
+    timeouts = settings.get('timeouts')
+    if timeouts is not None:
+        if not isinstance(timeouts, dict):
+            errors.append(f"{where}.timeouts: must be a mapping")
+        else:
+            for key, value in timeouts.items():
+                if key not in DEFAULT_TIMEOUTS:
+                    errors.append(f"{where}.timeouts.{key}: unknown timeout")
+                elif not _is_number(value, minimum=0, exclusive=True):
+                    errors.append(f"{where}.timeouts.{key}: must be a number > 0")
+    if settings.get('thresholds') is not None and not isinstance(settings['thresholds'], dict):
+        errors.append(f"{where}.thresholds: must be a mapping")
+
+
+def _check_keys(errors, where, settings, known):
+    for key in settings:
+        if key not in known:
+            errors.append(f"{where}.{key}: unknown setting")
+
+
+def _check_port(errors, where, value, required=False):
+    if value is None and not required:
+        return
+    if not _is_int(value, minimum=1) or value > 65535:
+        errors.append(f"{where}: must be a port number (1-65535)")
+
+
+def _is_int(value, minimum=None):
+    return isinstance(value, int) and not isinstance(value, bool) and (minimum is None or value >= minimum)
+
+
+def _is_number(value, minimum=None, exclusive=False):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    if minimum is None:
+        return True
+    return value > minimum if exclusive else value >= minimum
+
+
+class ConfigWatcher:
+    """설정 파일 변경 감지 (주기적으로 poll 호출)"""
+
+    def __init__(self, path, compiled):
+        self.path = path
+        self.compiled = compiled
+        self._stat = self._file_stat()
+        self._failed_digest = None  # 검증에 실패한 내용은 다시 보고하지 않음
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def poll(self):
+        """파일이 바뀌었으면 다시 로드 -> (CompiledConfig, ConfigDiff), 바뀌지 않았으면 None
+
+        새 내용이 잘못된 경우 ConfigError 를 1회 발생시키고 기존 설정을 유지한다.
+        """
+        file_stat = self._file_stat()
+        if file_stat is None or file_stat == self._stat:
+            return None
+        self._stat = file_stat
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in (self.compiled.digest, self._failed_digest):
+            return None
+        try:
+            compiled = compile_config_bytes(data, self.path)
+        except ConfigError:
+            self._failed_digest = digest
+            raise
+        diff = self.compiled.diff(compiled)
+        self.compiled = compiled
+        return compiled, diff
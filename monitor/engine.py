@@ -0,0 +1,822 @@
+"""서버 점검 엔진 (Qt 비의존)
+
+GUI(MonitoringThread)와 CLI 가 공통으로 사용하는 점검 실행부.
+진행 상황과 결과는 생성자에 전달한 콜백으로 통지된다.
+"""
+import cProfile
+import logging
+import os
+import pstats
+import queue
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime
+
+import paramiko
+
+from monitor.agent import AgentUnavailable, RemoteAgent
+from monitor.alerts import AlertManager
+from monitor.config import DEFAULT_INTERVAL, DEFAULT_TIMEOUTS
+from monitor.health import STATUS_SKIPPED, HostHealthTracker
+from monitor.logtail import LogTailCollector
+from monitor.procfs import ProcMetricsCollector
+from monitor.rules import RuleEngine, describe
+from monitor.scheduler import PollScheduler
+from monitor.shards import ShardPool
+from monitor.ssh_pool import SSHConnectionPool
+from monitor.stats import CollectorStats, PhaseTimer
+from monitor.store import MetricStore
+from monitor.writer import ResultWriter
+
+PROC_METRICS_KEY = '__proc__'  # 점검 항목 중 /proc 메트릭 수집 스크립트의 결과 키
+TIMEOUT_RESULT = 'TIMEOUT'  # 제한 시간을 넘긴 개별 명령어/서비스 점검 결과
+
+
+class CommandTimeout(TimeoutError):
+    """명령어 실행 제한 시간 초과"""
+
+
+class HostTimeout(TimeoutError):
+    """서버 1대 전체 점검 제한 시간 초과"""
+
+
+def _ignore(*args):
+    pass
+
+
+def command_label(key):
+    """점검 항목 키 -> 명령어별 소요 시간 집계 이름"""
+    if key == PROC_METRICS_KEY:
+        return 'proc'
+    if isinstance(key, tuple):
+        return f'service.{key[0]}.{key[1]}'
+    return f'cmd.{key}'
+
+
+def is_timeout_error(error):
+    """접속/배너/인증/명령어 제한 시간 초과 여부"""
+    if isinstance(error, TimeoutError):
+        return True
+    # paramiko 는 배너/인증 시간 초과를 SSHException 메시지로만 구분함
+    return isinstance(error, paramiko.SSHException) and 'timeout' in str(error).lower()
+
+
+def classify_failure(error):
+    """점검 실패 예외 -> ('timeout' 또는 'error', 메시지)"""
+    if is_timeout_error(error):
+        return 'timeout', str(error) or type(error).__name__
+    return 'error', str(error)
+
+
+def setup_logging(logs_dir, console=True):
+    """로깅 설정 (날짜별 로그 파일 + 콘솔)"""
+    os.makedirs(logs_dir, exist_ok=True)
+    today = datetime.now().strftime('%Y%m%d')
+    log_file = os.path.join(logs_dir, f'monitoring_{today}.log')
+    
+    handlers = [logging.FileHandler(log_file, encoding='utf-8')]
+    if console:
+        handlers.append(logging.StreamHandler())
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+
+class MonitoringEngine:
+    """서버 점검 실행 (1회 점검 또는 연속 점검)"""
+    
+    def __init__(self, server_config, ssh_pool=None, continuous=False, proc_collector=None, metric_store=None,
+                 rules=None, alert_manager=None, log_tailer=None, stats=None, profile_path=None, health=None,
+                 on_progress=None, on_count=None, on_result=None, on_finished=None, on_error=None,
+                 on_failure=None):
+        self.server_config = server_config
+        self.continuous = continuous  # True 이면 서버별 interval 로 중지될 때까지 반복 점검
+        self.is_running = True
+        self.stop_event = threading.Event()
+        
+        # 이벤트 콜백 (GUI 에서는 Qt 시그널, CLI 에서는 출력 함수)
+        self.on_progress = on_progress or _ignore  # (메시지)
+        self.on_count = on_count or _ignore  # (완료 서버 수, 전체 서버 수)
+        self.on_result = on_result or _ignore  # (서버이름, 결과데이터)
+        self.on_finished = on_finished or _ignore  # ()
+        self.on_error = on_error or _ignore  # (에러 메시지) 서버와 무관한 점검 전체 오류, 서버별 오류는 on_failure
+        self.on_failure = on_failure or _ignore  # (서버이름, 'timeout'/'error'/'skipped', 메시지)
+        self.reload_queue = queue.Queue()  # 연속 점검중 반영할 설정 (CompiledConfig, ConfigDiff)
+        self.active_channels = set()  # 실행중인 명령어 채널 (중지 시 닫아서 즉시 종료)
+        self.channels_lock = threading.Lock()
+        
+        # 로그 및 결과 디렉토리 설정
+        self.logs_dir = self.server_config['default_settings']['logs_dir']
+        self.results_dir = self.server_config['default_settings']['results_dir']
+        
+        # 동시 점검 서버 수 (1이면 순차 점검)
+        self.max_workers = max(1, int(self.server_config['default_settings'].get('max_workers', 10)))
+        
+        # 점검 명령어를 하나의 스크립트로 묶어 1회 왕복으로 수집 (서버별 batch_commands 로 재정의 가능)
+        self.batch_commands = self.server_config['default_settings'].get('batch_commands', True)
+        
+        # 접속/명령어/서버별 제한 시간
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(self.server_config['default_settings'].get('timeouts') or {})}
+        
+        # 다중 프로세스 수집 (run 동안 default_settings.shards 가 2 이상이면 생성)
+        self.shard_pool = None
+        
+        # SSH 연결 풀 (전달받으면 점검간 재사용, 없으면 이번 점검에서만 사용)
+        self.owns_pool = ssh_pool is None
+        if self.owns_pool:
+            ssh_pool = SSHConnectionPool.from_settings(self.server_config['default_settings'])
+        self.ssh_pool = ssh_pool
+        
+        # CPU 사용률 계산용 직전 /proc/stat 샘플 보관 (전달받으면 점검간 유지)
+        self.proc_collector = proc_collector if proc_collector is not None else ProcMetricsCollector()
+        
+        # 로그 파일 증분 수집 오프셋 (전달받으면 점검간 SFTP 세션/오프셋 유지, 오프셋은 파일로도 저장)
+        self.owns_tailer = log_tailer is None
+        self.log_tailer = log_tailer if log_tailer is not None else LogTailCollector.from_settings(
+            self.server_config['default_settings'])
+        
+        # 원격 수집 에이전트 (서버별 설치 여부/직전 응답 유지, default_settings.agent 또는 servers[].agent 로 사용)
+        self.agent = RemoteAgent.from_settings(self.server_config['default_settings'])
+        
+        # 시계열 저장소 (전달받지 않으면 이번 점검에서만 열고 닫음, 설정에서 끈 경우 None)
+        self.owns_store = metric_store is None
+        if self.owns_store:
+            metric_store = MetricStore.from_settings(self.server_config['default_settings'])
+        self.metric_store = metric_store
+        
+        # 임계값 규칙 (설정 로드 시 컴파일한 것을 전달받으면 재사용)
+        self.rules = rules if rules is not None else RuleEngine(self.server_config)
+        
+        # 임계값 알림 (전달받으면 점검간 상태 유지, 설정에서 끈 경우 None)
+        self.owns_alerts = alert_manager is None
+        if self.owns_alerts:
+            alert_manager = AlertManager.from_settings(self.server_config['default_settings'])
+        self.alert_manager = alert_manager
+        
+        # 서버별 연속 실패/차단/점검 주기 조정 상태 (전달받으면 점검간 유지, 설정에서 끈 경우 None)
+        self.health = health if health is not None else HostHealthTracker.from_settings(
+            self.server_config['default_settings'])
+        
+        # 단계별 소요 시간 집계 (전달받으면 점검간 누적, 설정에서 끈 경우 None)
+        self.owns_stats = stats is None
+        if self.owns_stats:
+            stats = CollectorStats.from_settings(self.server_config['default_settings'])
+        self.stats = stats
+        
+        # 점검 전체 cProfile (워커 스레드별 프로파일을 합쳐 profile_path 에 저장)
+        self_metrics = self.server_config['default_settings'].get('self_metrics') or {}
+        self.profile_path = profile_path or self_metrics.get('profile')
+        self.profile_stats = None
+        self.profile_lock = threading.Lock()
+        
+        # 결과 파일 기록 스레드
+        self.result_writer = ResultWriter.from_settings(self.server_config['default_settings'],
+                                                        metric_store=self.metric_store)
+        
+        # 디렉토리 생성
+        os.makedirs(self.logs_dir, exist_ok=True)
+        os.makedirs(self.results_dir, exist_ok=True)
+        
+        # 로깅 설정
+        setup_logging(self.logs_dir)
+        self.logger = logging.getLogger(__name__)
+
+    def stop(self):
+        """모니터링 중지 (실행중인 명령어 채널을 닫아 워커가 즉시 종료되도록 함)"""
+        self.is_running = False
+        self.stop_event.set()
+        self.cancel_channels()
+        shard_pool = self.shard_pool
+        if shard_pool is not None:
+            shard_pool.cancel()
+        
+    def cancel_channels(self):
+        """실행중인 명령어 채널 종료 (SSH 연결은 풀에 유지됨)"""
+        with self.channels_lock:
+            channels = list(self.active_channels)
+        for channel in channels:
+            try:
+                channel.close()
+            except Exception as e:
+                self.logger.error(f'Error closing ssh channel : {str(e)}')
+
+    def run(self):
+        """모니터링 실행"""
+        executor = None
+        try:
+            servers = self.server_config['servers']
+            self.result_writer.start()
+            
+            # 서버별 점검을 worker pool 에서 병렬 수행 (shards 설정 시 수집 프로세스에 나눠 수행)
+            self.shard_pool = ShardPool.from_settings(self, self.server_config['default_settings'])
+            if self.shard_pool is not None:
+                executor = self.shard_pool
+            else:
+                executor = ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(servers), 1)),
+                                              thread_name_prefix='monitor')
+            if self.continuous:
+                self.profiled(self.run_scheduled, executor, servers)
+            else:
+                self.profiled(self.run_sweep, executor, servers)
+            
+            if self.is_running:
+                self.on_progress("모니터링 완료")
+            self.on_finished()
+            
+        except Exception as e:
+            self.on_error(f"모니터링 오류: {str(e)}")
+        finally:
+            if executor is not None:
+                # 중지된 경우 대기중인 서버 점검은 취소
+                executor.shutdown(wait=self.is_running, cancel_futures=True)
+            self.shard_pool = None
+            if self.owns_tailer:
+                self.log_tailer.close()  # SFTP 세션 종료 후 오프셋 저장
+            else:
+                self.log_tailer.save_state()
+            if self.owns_pool:
+                self.ssh_pool.close_all()
+            self.result_writer.close()  # 대기중인 결과 기록 후 종료
+            if self.health is not None:
+                self.health.save_state()
+            if self.metric_store is not None:
+                if self.owns_store:
+                    self.metric_store.close()
+                else:
+                    self.metric_store.flush()
+            if self.alert_manager is not None:
+                if self.owns_alerts:
+                    self.alert_manager.close()  # 대기중인 알림 전송 후 상태 저장
+                else:
+                    self.alert_manager.save_state()
+            if self.stats is not None:
+                if self.owns_stats:
+                    self.stats.close()
+                else:
+                    self.stats.write_textfile()
+            if self.profile_stats is not None:
+                self.save_profile()
+
+    def profiled(self, func, *args):
+        """profile_path 가 지정된 경우 cProfile 로 실행 (스레드마다 따로 측정 후 합침)"""
+        if not self.profile_path:
+            return func(*args)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            with self.profile_lock:
+                if self.profile_stats is None:
+                    self.profile_stats = pstats.Stats(profile)
+                else:
+                    self.profile_stats.add(profile)
+
+    def save_profile(self):
+        try:
+            os.makedirs(os.path.dirname(self.profile_path) or '.', exist_ok=True)
+            with self.profile_lock:
+                self.profile_stats.dump_stats(self.profile_path)
+            self.logger.info(f"Profile saved: {self.profile_path}")
+        except Exception as e:
+            self.logger.error(f"Failed to save profile : {str(e)}")
+
+    def run_sweep(self, executor, servers):
+        """전체 서버 1회 점검"""
+        total = len(servers)
+        completed = 0
+        started = time.perf_counter()
+        
+        # 1회 점검/수동 점검은 요청한 서버를 모두 점검 (연속 실패 차단/backoff 는 연속 점검 모드에만 적용)
+        futures = {}
+        for idx, server in enumerate(servers, start=1):
+            futures[self.submit_check(executor, idx, server)] = server
+        self.on_count(completed, total)
+        
+        for future in as_completed(futures):
+            if not self.is_running:
+                break
+            
+            server = futures[future]
+            results = future.result()
+            if results:
+                self.on_result(server['name'], results)
+            completed += 1
+            self.on_count(completed, total)
+        if self.stats is not None and self.is_running:
+            self.stats.observe_sweep(time.perf_counter() - started, total)
+
+    def run_scheduled(self, executor, servers):
+        """서버별 interval 에 따라 중지될 때까지 반복 점검 (연속 점검 모드)"""
+        default_settings = self.server_config['default_settings']
+        scheduler = PollScheduler(
+            servers,
+            default_interval=default_settings.get('interval', DEFAULT_INTERVAL),
+            start_jitter=default_settings.get('start_jitter', 30),
+        )
+        servers_by_name = {server['name']: server for server in servers}
+        poll_counts = dict.fromkeys(servers_by_name, 0)
+        in_flight = {}  # 진행중인 점검 (future -> 서버이름)
+        checked = set()  # 1회 이상 점검 완료된 서버
+        self.on_count(0, len(servers))
+        
+        while self.is_running:
+            if not self.reload_queue.empty():
+                self.apply_reload(scheduler, servers_by_name, poll_counts, checked)
+            running = set(in_flight.values())
+            for name in scheduler.pop_due():
+                if name in running:
+                    # 이전 점검이 아직 끝나지 않았으면 이번 회차는 쌓지 않고 건너뜀
+                    scheduler.mark_skipped(name)
+                    self.logger.warning(f"[{name}] Previous check still running, skipping this interval")
+                    continue
+                if self.is_paused(name):
+                    # 저장된 차단 상태가 남아있는 서버는 차단 시간이 지난 뒤 1회 시험 점검
+                    scheduler.reschedule(name, self.health.interval(name, scheduler.intervals[name]))
+                    continue
+                poll_counts[name] += 1
+                future = self.submit_check(executor, poll_counts[name], servers_by_name[name])
+                in_flight[future] = name
+            
+            # 다음 점검 예정 시각 또는 점검 완료까지 대기 (중지 요청 확인을 위해 최대 1초)
+            timeout = scheduler.time_until_next()
+            timeout = 1.0 if timeout is None else min(timeout, 1.0)
+            if in_flight:
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                self.stop_event.wait(timeout)
+                done = set()
+            
+            for future in done:
+                name = in_flight.pop(future)
+                if not self.is_running:
+                    break
+                results = future.result()
+                if results:
+                    self.on_result(name, results)
+                if name in servers_by_name:
+                    checked.add(name)
+                    if self.health is not None:
+                        # 실패 backoff/차단, 임계값 근접 여부에 따라 다음 1회의 점검 시각 조정
+                        scheduler.reschedule(name, self.health.interval(name, scheduler.intervals[name]))
+                self.on_count(len(checked), len(servers_by_name))
+
+    def request_reload(self, compiled, diff):
+        """변경된 설정 반영 요청 (연속 점검 모드에서 다음 스케줄 확인 시 적용, 다른 스레드에서 호출 가능)"""
+        self.reload_queue.put((compiled, diff))
+
+    def apply_reload(self, scheduler, servers_by_name, poll_counts, checked):
+        """쌓인 설정 변경 내역을 스케줄러/서버 목록에 반영 (추가/삭제/변경된 서버만)"""
+        while True:
+            try:
+                compiled, diff = self.reload_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.server_config = compiled.config
+            self.rules = compiled.rules
+            self.update_settings(compiled.config['default_settings'])
+            if self.shard_pool is not None:
+                for name in diff.removed:
+                    self.shard_pool.forget(name)
+                if diff.defaults_changed:
+                    self.shard_pool.update_settings(compiled.config['default_settings'])
+            if diff.defaults_changed:
+                # 연결 풀/저장소/결과 형식 등은 재시작해야 적용됨
+                self.logger.info("default_settings changed: thresholds, timeouts and intervals applied, "
+                                 "other settings apply after restart")
+
+            for name in diff.removed:
+                scheduler.remove(name)
+                servers_by_name.pop(name, None)
+                poll_counts.pop(name, None)
+                checked.discard(name)
+                self.proc_collector.forget(name)
+                self.log_tailer.forget(name)
+                self.agent.forget(name)
+                if self.stats is not None:
+                    self.stats.forget(name)
+                if self.health is not None:
+                    self.health.forget(name)
+                if self.alert_manager is not None:
+                    self.alert_manager.forget(name)
+            for name in diff.added:
+                server = compiled.servers_by_name[name]
+                servers_by_name[name] = server
+                poll_counts[name] = 0
+                scheduler.add(server)
+            for name in diff.changed:
+                server = compiled.servers_by_name[name]
+                servers_by_name[name] = server
+                scheduler.set_interval(name, server.get('interval', scheduler.default_interval))
+            self.logger.info(f"Config reloaded: {len(diff.added)} added, {len(diff.removed)} removed, "
+                             f"{len(diff.changed)} changed")
+            self.on_count(len(checked), len(servers_by_name))
+
+    def update_settings(self, default_settings):
+        """재시작 없이 반영되는 설정 (제한 시간, 일괄 수집 여부)"""
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(default_settings.get('timeouts') or {})}
+        self.batch_commands = default_settings.get('batch_commands', True)
+
+    def is_paused(self, server_name):
+        """연속 실패로 차단된 서버인지 확인 (연속 점검 모드 전용, 차단 중이면 skipped 로 통지)"""
+        if self.health is None:
+            return False
+        open_until = self.health.is_open(server_name)
+        if open_until is None:
+            return False
+        message = self.health.skip_message(server_name, open_until)
+        self.logger.info(message)
+        if self.stats is not None:
+            self.stats.count_check(STATUS_SKIPPED)
+        self.on_failure(server_name, STATUS_SKIPPED, message)
+        return True
+
+    def check_server(self, idx, server):
+        """worker pool 에서 실행되는 단일 서버 점검"""
+        if not self.is_running:
+            return None
+        
+        self.log_start(idx, server)
+        self.on_progress(f"서버 {server['name']} 점검중...")
+        return self.profiled(self.monitor_server, server)
+
+    def submit_check(self, executor, idx, server):
+        """서버 점검 요청 -> Future (수집 프로세스 사용 시 해당 shard 로 전달)"""
+        if executor is self.shard_pool:
+            return self.shard_pool.submit(idx, server)
+        return executor.submit(self.check_server, idx, server)
+
+    def log_start(self, idx, server):
+        self.logger.info('-----------------------------------------------')
+        self.logger.info(f"[ {idx} ] START ::: Checking server {server['name']}")
+
+    def get_timeouts(self, server):
+        """서버별 제한 시간 (서버 설정 우선)"""
+        return {**self.timeouts, **(server.get('timeouts') or {})}
+
+    def stream_command(self, ssh, cmd, deadline=None, timer=None, label=None):
+        """명령어를 새 채널에서 실행하며 표준출력을 조각(bytes) 단위로 반환하는 generator
+
+        출력이 없는 동안에도 0.5초마다 빈 조각을 반환하므로 호출측에서 경과 시간을 확인할 수 있다.
+        deadline(time.monotonic 기준)을 넘기면 채널을 닫고 CommandTimeout 을 발생시킨다.
+        timer 를 전달하면 채널 열기(channel)와 실행(command, label 별) 소요 시간을 기록한다.
+        """
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            raise paramiko.SSHException('SSH session not active')
+        started = time.perf_counter()
+        channel = transport.open_session(timeout=self.timeouts['connect'])
+        if timer is not None:
+            timer.record('channel', time.perf_counter() - started)
+            started = time.perf_counter()
+        with self.channels_lock:
+            self.active_channels.add(channel)
+        try:
+            channel.settimeout(0.5)
+            channel.exec_command(cmd)
+            while self.is_running:
+                if channel.recv_stderr_ready():
+                    channel.recv_stderr(32768)  # 표준에러는 버림 (읽지 않으면 채널 window 가 차서 멈춤)
+                try:
+                    data = channel.recv(32768)
+                except socket.timeout:
+                    data = b''
+                    if channel.exit_status_ready() and not channel.recv_ready():
+                        break
+                else:
+                    if not data:
+                        break
+                if deadline is not None and time.monotonic() > deadline:
+                    raise CommandTimeout(f'Command timed out: {cmd[:80]}')
+                yield data
+        finally:
+            with self.channels_lock:
+                self.active_channels.discard(channel)
+            channel.close()
+            if timer is not None:
+                timer.record('command', time.perf_counter() - started, label)
+
+    def run_command(self, ssh, cmd, deadline=None, timer=None, label=None):
+        """명령어 1건 실행 후 표준출력 반환 (deadline 초과 시 CommandTimeout)"""
+        output = b''.join(self.stream_command(ssh, cmd, deadline, timer, label))
+        return output.decode(errors='replace').strip()
+
+    def run_batch(self, ssh, server, checks, command_timeout, deadline, timer=None):
+        """모든 점검 명령어를 구분자로 묶은 하나의 스크립트로 실행 (1회 왕복)
+
+        반환값은 ({결과 키: 출력}, 제한 시간을 넘긴 결과 키 set) 이며,
+        실패 시 빈 dict 를 반환해 개별 실행으로 대체되도록 한다.
+        명령어 하나가 command_timeout 을 넘기면 그 명령어는 시간 초과로 기록하고
+        이후 명령어들은 개별 실행으로 재수집된다. (출력이 전혀 없으면 첫 항목을 시간 초과로 기록)
+        """
+        # 명령어 출력과 겹치지 않도록 실행마다 임의의 구분자 사용
+        marker = f"__SHM_{uuid.uuid4().hex[:12]}__"
+        script = []
+        # 출력이 줄바꿈으로 끝나지 않는 명령어 뒤에서도 구분자가 줄 맨 앞에 오도록 앞에 줄바꿈을 붙임
+        for idx, (_, cmd) in enumerate(checks):
+            script.append(f"printf '\\n%s\\n' '{marker} {idx}'")
+            script.append(f"( {cmd}\n) 2>/dev/null")
+        script.append(f"printf '\\n%s\\n' '{marker} end'")
+
+        chunks = []
+        markers_seen = 0
+        section_started = time.monotonic()
+        stalled = False
+        try:
+            stream = self.stream_command(ssh, '\n'.join(script), deadline, timer, 'batch')
+            try:
+                for data in stream:
+                    now = time.monotonic()
+                    if data:
+                        chunks.append(data)
+                        # 새 구분자가 나오면 다음 명령어가 시작된 것
+                        count = b''.join(chunks).count(marker.encode())
+                        if count != markers_seen:
+                            markers_seen = count
+                            section_started = now
+                    if now - section_started > command_timeout:
+                        stalled = True
+                        break
+            finally:
+                stream.close()
+        except CommandTimeout:
+            stalled = True
+        except Exception as e:
+            if self.is_running:
+                self.logger.warning(f"[{server['name']}] Batch collection failed, falling back to per-command: {str(e)}")
+            return {}, set()
+        if not self.is_running:
+            return {}, set()
+        output = b''.join(chunks).decode(errors='replace').strip()
+
+        sections = {}
+        current = None
+        for line in output.splitlines():
+            if line.startswith(marker):
+                tag = line[len(marker):].strip()
+                current = int(tag) if tag.isdigit() else None
+                if current is not None:
+                    sections[current] = []
+            elif current is not None:
+                sections[current].append(line)
+
+        outputs = {}
+        for idx, (key, _) in enumerate(checks):
+            if idx in sections:
+                # 다음 구분자 앞에 붙인 줄바꿈(빈 줄)은 strip 으로 제거됨
+                outputs[key] = '\n'.join(sections[idx]).strip()
+        timed_out = set()
+        if not output.endswith(f"{marker} end"):
+            # 마지막 구분자가 없으면 스크립트가 중간에 끊긴 것이므로 마지막 섹션은 신뢰하지 않음
+            if sections:
+                last_key = checks[max(sections)][0]
+                outputs.pop(last_key, None)
+                if stalled:
+                    # 제한 시간을 넘긴 명령어는 다시 실행하지 않음
+                    timed_out.add(last_key)
+                    self.logger.warning(f"[{server['name']}] Command timed out in batch: {checks[max(sections)][1][:80]}")
+            elif stalled:
+                # 첫 구분자도 받지 못했으면 서버가 응답하지 않는 것이므로 첫 항목(/proc 메트릭)을 시간 초과로 처리
+                timed_out.add(checks[0][0])
+                self.logger.warning(f"[{server['name']}] Batch produced no output within {command_timeout}s")
+            self.logger.warning(f"[{server['name']}] Batch collection incomplete "
+                                f"({len(outputs)}/{len(checks)}), re-running missing checks")
+        return outputs, timed_out
+
+    def get_connect_params(self, server):
+        """서버 설정으로 SSH 접속 파라미터 생성"""
+        connect_params = {
+            'hostname': server['ip'],
+            'username': server['username'],
+            'port': server.get('port', self.server_config['default_settings']['port'])
+        }
+        
+        if 'key_filename' in server:
+            connect_params['key_filename'] = server['key_filename']
+        else:
+            connect_params['password'] = server['password']
+        
+        # 응답 없는 서버에서 무한 대기하지 않도록 접속 단계별 제한 시간 지정
+        connect_timeout = self.get_timeouts(server)['connect']
+        connect_params['timeout'] = connect_timeout
+        connect_params['banner_timeout'] = connect_timeout
+        connect_params['auth_timeout'] = connect_timeout
+        return connect_params
+
+    def collect_results(self, ssh, server, deadline, timer=None):
+        """연결된 서버에서 점검 항목 수집 (중지 요청 시 None, deadline 초과 시 HostTimeout)"""
+        if self.agent.enabled_for(server):
+            results = self.collect_with_agent(ssh, server, deadline, timer)
+            if results is not None or not self.is_running:
+                return results
+
+        # 시스템 메트릭 수집 (/proc 직접 읽기) 및 서버별 개별 명령어
+        commands = dict(server.get('commands') or {})
+
+        # 점검 항목 목록 (결과 키, 명령어)
+        checks = [(PROC_METRICS_KEY, self.proc_collector.build_command(server['name']))]
+        checks.extend(commands.items())
+        for service in server.get('services') or []:
+            service_name = service['name']
+            if service['type'] == 'systemctl':
+                checks.append(((service_name, 'status'), f"systemctl is-active {service_name}"))
+                checks.append(((service_name, 'process_count'),
+                               f"ps aux | grep -E '{service_name}' | grep -v grep | wc -l"))
+
+        # 일괄 수집 (단일 채널), 실패하거나 누락된 항목은 개별 명령어로 재수집
+        command_timeout = self.get_timeouts(server)['command']
+        outputs, timed_out = {}, set()
+        if server.get('batch_commands', self.batch_commands):
+            outputs, timed_out = self.run_batch(ssh, server, checks, command_timeout, deadline, timer)
+        # 시스템 메트릭을 못 얻으면 나머지 항목을 실행하지 않고 서버 전체를 시간 초과로 처리
+        # (응답 없는 서버에서 항목마다 command 제한 시간을 기다리며 워커를 붙잡지 않도록)
+        if PROC_METRICS_KEY in timed_out:
+            raise HostTimeout('system metrics collection timed out')
+        for key, cmd in checks:
+            if not self.is_running:
+                return None
+            if key in outputs or key in timed_out:
+                continue
+            if time.monotonic() > deadline:
+                raise HostTimeout(f"host check exceeded {self.get_timeouts(server)['host']}s")
+            try:
+                outputs[key] = self.run_command(ssh, cmd, min(deadline, time.monotonic() + command_timeout),
+                                                timer, command_label(key))
+            except CommandTimeout:
+                if key == PROC_METRICS_KEY:
+                    raise HostTimeout('system metrics collection timed out')
+                self.logger.warning(f"[{server['name']}] Command timed out: {cmd[:80]}")
+                timed_out.add(key)
+        if not self.is_running:
+            return None
+
+        # 개별 명령어/서비스는 TIMEOUT 으로 표시
+        for key in timed_out:
+            outputs[key] = TIMEOUT_RESULT
+
+        results = self.proc_collector.parse(server['name'], outputs[PROC_METRICS_KEY])
+        results.update((key, outputs[key]) for key in commands)
+        if server.get('log_watches'):
+            results.update(self.collect_log_watches(ssh, server, command_timeout, deadline, timer))
+
+        # 서비스 상태 확인
+        if 'services' in server:
+            results['services'] = {}
+            for service in server['services']:
+                service_name = service['name']
+                if service['type'] == 'systemctl':
+                    results['services'][service_name] = {
+                        'status': outputs[(service_name, 'status')],
+                        'process_count': outputs[(service_name, 'process_count')]
+                    }
+        return results
+
+    def collect_with_agent(self, ssh, server, deadline, timer=None):
+        """원격 에이전트 pull 1회로 수집 (에이전트를 쓸 수 없으면 None 을 반환해 기존 방식으로 수집)"""
+        timeouts = self.get_timeouts(server)
+        payload = None
+        for attempt in range(2):
+            # 개별 명령어는 에이전트가 command 제한 시간으로 실행하므로 pull 전체는 서버 제한 시간까지 대기
+            output = self.run_command(ssh, self.agent.pull_command(server, timeouts['command']), deadline,
+                                      timer, 'agent')
+            if not self.is_running:
+                return None
+            try:
+                payload = self.agent.parse(server, output)
+            except AgentUnavailable as e:
+                self.agent.mark_unavailable(server['name'])
+                self.logger.warning(f"[{server['name']}] Remote agent unavailable, using shell collection: {str(e)}")
+                return None
+            if payload is not None or attempt:
+                break
+            # 에이전트가 없거나 체크섬이 다르면 올린 뒤 1회 재시도
+            started = time.perf_counter()
+            try:
+                self.agent.install(ssh, timeouts['connect'])
+            except Exception as e:
+                if not self.is_running:
+                    return None
+                self.agent.mark_unavailable(server['name'])
+                self.logger.warning(f"[{server['name']}] Remote agent install failed, using shell collection: {str(e)}")
+                return None
+            if timer is not None:
+                timer.record('command', time.perf_counter() - started, 'agent.install')
+            self.logger.info(f"[{server['name']}] Remote agent installed: {self.agent.remote_path}")
+        if payload is None:
+            self.agent.mark_unavailable(server['name'])
+            self.logger.warning(f"[{server['name']}] Remote agent not runnable after install, using shell collection")
+            return None
+
+        results = self.agent.build_results(server, payload)
+        if server.get('log_watches'):
+            results.update(self.collect_log_watches(ssh, server, timeouts['command'], deadline, timer))
+        return results
+
+    def collect_log_watches(self, ssh, server, command_timeout, deadline, timer=None):
+        """log_watches 로그 파일의 새로 추가된 줄 수 (SFTP 오프셋 커서)"""
+        try:
+            if timer is None:
+                return self.log_tailer.collect(ssh, server, deadline, timeout=command_timeout)
+            with timer.phase('log_tail'):
+                return self.log_tailer.collect(ssh, server, deadline, timeout=command_timeout)
+        except Exception as e:
+            if not self.is_running:
+                raise
+            timed_out = is_timeout_error(e)
+            self.logger.warning(f"[{server['name']}] Log watch failed: {str(e) or type(e).__name__}")
+            return {watch['name']: TIMEOUT_RESULT if timed_out else 'ERROR' for watch in server['log_watches']}
+
+    def check_thresholds(self, server, results):
+        """임계값 초과 항목 목록 반환 (rules.Breach 목록)"""
+        try:
+            return self.rules.evaluate(server['name'], results)
+        except Exception as e:
+            self.logger.error(f"Error checking thresholds for server {server['name']}: {str(e)}")
+            return []
+
+    def monitor_server(self, server):
+        """단일 서버 모니터링"""
+        timer = PhaseTimer(self.stats, server['name'])  # 단계별 소요 시간
+        try:
+            results = self.collect_server(server, timer)
+            if results is None:
+                return None
+            return self.finish_check(server, results, timer)
+        except Exception as e:
+            if not self.is_running:
+                # 중지 요청으로 연결이 끊긴 경우는 에러로 보고하지 않음
+                return None
+            self.report_failure(server, *classify_failure(e), timer)
+            return None
+
+    def collect_server(self, server, timer):
+        """SSH 연결 후 점검 항목 수집 (중지 요청 시 None, 실패 시 예외 발생)"""
+        deadline = time.monotonic() + self.get_timeouts(server)['host']
+        
+        # SSH 연결 (연결 풀에 살아있는 연결이 있으면 재사용)
+        connect_params = self.get_connect_params(server)
+        ssh, reused = self.ssh_pool.acquire(connect_params, timer)
+        try:
+            return self.collect_results(ssh, server, deadline, timer)
+        except (paramiko.SSHException, EOFError, OSError) as e:
+            if not reused or not self.is_running or isinstance(e, TimeoutError):
+                raise
+            # 재사용한 연결이 원격에서 끊어져 있던 경우 1회 재연결 후 재시도
+            self.logger.info(f"[{server['name']}] Pooled connection lost ({str(e)}), reconnecting")
+            self.ssh_pool.discard(connect_params)
+            ssh, _ = self.ssh_pool.acquire(connect_params, timer)
+            return self.collect_results(ssh, server, deadline, timer)
+        finally:
+            # 사용이 끝난 연결만 LRU/유휴 정리 대상이 됨 (제거된 연결은 무시됨)
+            self.ssh_pool.release(connect_params, ssh)
+
+    def finish_check(self, server, results, timer):
+        """수집된 결과의 임계값 확인, 알림, 결과 기록"""
+        # 임계값 초과 항목 확인
+        exceeded = self.check_thresholds(server, results)
+        if self.health is not None:
+            self.health.record_success(server['name'], self.rules.max_ratio(server['name'], results))
+        if self.alert_manager is not None:
+            # 상태 전환시에만 알림 (매 점검 초과 내역은 info 로그로만 기록)
+            self.alert_manager.observe(server['name'], exceeded)
+        if exceeded:
+            log = self.logger.info if self.alert_manager is not None else self.logger.warning
+            log(
+                f"[{server['name']}] Resource usage warning: "
+                f"{', '.join(describe(breach) for breach in exceeded)}"
+            )
+        
+        # 결과 파일/시계열 저장소 기록은 writer 스레드에서 일괄 처리
+        timer.finish('ok')
+        self.result_writer.submit(server, results, exceeded,
+                                  timings=timer.phases if self.stats is not None else None)
+        self.logger.info(f"END ::: Checking server {server['name']} {timer.summary()}")
+        return results
+
+    def report_failure(self, server, status, detail, timer):
+        """점검 실패 기록 및 통지 (status: 'timeout' 또는 'error')"""
+        if status == 'timeout':
+            # 시간 초과는 에러 팝업 없이 별도 상태로 통지
+            message = f"{server['name']} monitoring timeout: {detail}"
+            timer.finish('timeout')
+            self.logger.warning(f"{message} {timer.summary()}")
+            self.notify_failure(server['name'], 'timeout', message)
+            return
+        error_msg = f"{server['name']} monitoring error: {detail}"
+        timer.finish('error')
+        self.notify_failure(server['name'], 'error', error_msg)
+        self.logger.error(error_msg)
+
+    def notify_failure(self, server_name, status, message):
+        """점검 실패 (시간 초과/오류) 통지 및 알림/backoff 상태 반영"""
+        if self.health is not None:
+            self.health.record_failure(server_name, message)
+        if self.alert_manager is not None:
+            self.alert_manager.observe_failure(server_name, status, message)
+        self.on_failure(server_name, status, message)
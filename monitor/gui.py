@@ -0,0 +1,749 @@
+"""서버 모니터링 GUI (PyQt6)"""
+import sys
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
+                           QHBoxLayout, QTableView, QHeaderView, QAbstractItemView, QComboBox, QLineEdit,
+                           QTextEdit, QPushButton, QLabel, QMessageBox, QProgressBar, QCheckBox, QTabWidget,
+                           QTableWidget, QTableWidgetItem)
+from PyQt6.QtCore import (Qt, QThread, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex,
+                          QSortFilterProxyModel)
+from PyQt6.QtGui import QColor
+from datetime import datetime
+import logging
+
+from monitor.alerts import AlertManager
+from monitor.config import DEFAULT_CONFIG_PATH, ConfigError, ConfigWatcher, load_compiled_config
+from monitor.logtail import LogTailCollector
+from monitor.engine import MonitoringEngine
+from monitor.health import HostHealthTracker
+from monitor.history import GROWTH_METRICS, WINDOW_LABELS, HistoryReport
+from monitor.procfs import ProcMetricsCollector
+from monitor.rules import LEVEL_CRITICAL, LEVEL_NAMES, max_level
+from monitor.ssh_pool import SSHConnectionPool
+from monitor.stats import PHASES, CollectorStats
+from monitor.store import MetricStore
+
+
+class MonitoringThread(QThread):
+    """서버 모니터링을 위한 작업 스레드 (MonitoringEngine 이벤트를 Qt 시그널로 전달)"""
+    progress_signal = pyqtSignal(str)  # 진행 상황 시그널
+    count_signal = pyqtSignal(int, int)  # 진행 건수 시그널 (완료 서버 수, 전체 서버 수)
+    result_signal = pyqtSignal(str, dict)  # 결과 시그널 (서버이름, 결과데이터)
+    finished_signal = pyqtSignal()  # 완료 시그널
+    error_signal = pyqtSignal(str)  # 에러 시그널
+    failure_signal = pyqtSignal(str, str, str)  # 서버 점검 실패 시그널 (서버이름, 'timeout'/'error', 메시지)
+    
+    def __init__(self, server_config, **engine_options):
+        super().__init__()
+        self.engine = MonitoringEngine(
+            server_config,
+            on_progress=self.progress_signal.emit,
+            on_count=self.count_signal.emit,
+            on_result=self.result_signal.emit,
+            on_finished=self.finished_signal.emit,
+            on_error=self.error_signal.emit,
+            on_failure=self.failure_signal.emit,
+            **engine_options
+        )
+
+    def stop(self):
+        """모니터링 중지"""
+        self.engine.stop()
+
+    def run(self):
+        """모니터링 실행"""
+        self.engine.run()
+
+
+class ServerTableModel(QAbstractTableModel):
+    """서버 목록 모델 (서버이름 -> 행 인덱스로 O(1) 갱신)"""
+    COLUMNS = ['상태', '서버', 'CPU(%)', '메모리(%)', '디스크(%)', '부하 평균', '점검 시각']
+    NAME_COLUMN = 1
+    STATUS_COLORS = {
+        'OK': QColor(Qt.GlobalColor.darkGreen),
+        'WARNING': QColor(204, 153, 0),
+        'CRITICAL': QColor(Qt.GlobalColor.red),
+        'TIMEOUT': QColor(255, 140, 0),
+        'ERROR': QColor(Qt.GlobalColor.darkRed),
+        'SKIPPED': QColor(Qt.GlobalColor.gray),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []  # [{'name', 'status', 'results', 'checked_at'}]
+        self.row_index = {}  # 서버이름 -> 행 번호
+
+    def set_servers(self, server_names):
+        """서버 목록 교체 (목록에 남아있는 서버의 상태/결과는 유지)"""
+        self.beginResetModel()
+        previous = {row['name']: row for row in self.rows}
+        self.rows = [previous.get(name) or {'name': name, 'status': '', 'results': None, 'checked_at': None}
+                     for name in server_names]
+        self.row_index = {row['name']: i for i, row in enumerate(self.rows)}
+        self.endResetModel()
+
+    def reset_statuses(self):
+        """점검 상태 초기화"""
+        for row in self.rows:
+            row.update(status='', results=None, checked_at=None)
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, len(self.COLUMNS) - 1))
+
+    def update_rows(self, updates):
+        """여러 서버의 상태/결과를 한 번에 갱신 (updates: 서버이름 -> (상태, 결과, 점검 시각))"""
+        changed = []
+        for server_name, (status, results, checked_at) in updates.items():
+            row_number = self.row_index.get(server_name)
+            if row_number is None:
+                continue
+            self.rows[row_number].update(status=status, results=results, checked_at=checked_at)
+            changed.append(row_number)
+        if changed:
+            # 변경된 행 범위 전체를 한 번의 시그널로 통지
+            self.dataChanged.emit(self.index(min(changed), 0),
+                                  self.index(max(changed), len(self.COLUMNS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.STATUS_COLORS.get(row['status'])
+        if role == Qt.ItemDataRole.UserRole:
+            return self.sort_value(row, column)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        results = row['results']
+        if column == 0:
+            return f"[{row['status']}]" if row['status'] else ''
+        if column == 1:
+            return row['name']
+        if results is None:
+            return ''
+        if column == 2:
+            return f"{results['cpu']:.1f}"
+        if column == 3:
+            return f"{results['memory']:.2f}"
+        if column == 4:
+            return f"{results['disk']:.1f}"
+        if column == 5:
+            return results['load_avg']
+        if column == 6:
+            return row['checked_at'].strftime('%H:%M:%S') if row['checked_at'] else ''
+        return None
+
+    def sort_value(self, row, column):
+        """정렬용 값 (숫자 컬럼은 숫자로 비교)"""
+        results = row['results']
+        if column == 0:
+            return row['status']
+        if column == 1:
+            return row['name']
+        if results is None:
+            return -1.0
+        if column == 2:
+            return float(results['cpu'])
+        if column == 3:
+            return float(results['memory'])
+        if column == 4:
+            return float(results['disk'])
+        if column == 5:
+            return float(results.get('load_1', 0.0))
+        if column == 6:
+            return row['checked_at'].timestamp() if row['checked_at'] else -1.0
+        return None
+
+
+class ServerFilterProxyModel(QSortFilterProxyModel):
+    """상태/서버이름으로 서버 목록 필터링"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.status_filter = ''  # '' 이면 전체, 'NONE' 이면 미점검
+        self.name_filter = ''
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+        self.setDynamicSortFilter(True)
+
+    def set_status_filter(self, status):
+        self.status_filter = status
+        self.invalidateFilter()
+
+    def set_name_filter(self, text):
+        self.name_filter = text.strip().lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        row = self.sourceModel().rows[source_row]
+        if self.status_filter:
+            status = row['status'] or 'NONE'
+            if status != self.status_filter:
+                return False
+        return not self.name_filter or self.name_filter in row['name'].lower()
+
+
+class ServerMonitorGUI(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.monitoring_thread = None
+        self.server_results = {}  # 서버별 결과 저장
+        self.pending_results = {}  # 화면에 아직 반영되지 않은 결과 (서버이름 -> 결과)
+        self.servers_by_name = {}  # 서버이름 -> 서버 설정
+        self.rules = None  # 설정 로드 시 컴파일한 임계값 규칙
+        self.config_watcher = None  # 설정 파일 변경 감지
+        self.selected_server = None
+        self.ssh_pool = None  # 점검간 재사용되는 SSH 연결 풀
+        self.proc_collector = ProcMetricsCollector()  # 점검간 CPU 사용률 계산용 샘플 유지
+        self.metric_store = None  # 점검 결과 시계열 저장소
+        self.alert_manager = None  # 점검간 알림 상태 유지
+        self.log_tailer = None  # 점검간 로그 파일 오프셋/SFTP 세션 유지
+        self.stats = None  # 점검 단계별 소요 시간 집계
+        self.health = None  # 점검간 서버별 연속 실패/차단 상태 유지
+        self.failures = {}  # 오류 탭에 표시할 실패 (서버이름 또는 '(전체)' -> (상태, 메시지, 발생 시각))
+        self.failures_changed = False
+        self.logger = logging.getLogger(__name__)
+        self.initUI()
+        self.load_config()
+
+    def initUI(self):
+        """UI 초기화"""
+        self.setWindowTitle('서버 모니터링 시스템')
+        self.setGeometry(100, 100, 1200, 800)
+
+        # 메인 위젯 설정
+        main_widget = QWidget()
+        self.setCentralWidget(main_widget)
+        layout = QVBoxLayout()
+        main_widget.setLayout(layout)
+
+        # 상단 컨테이너
+        top_container = QWidget()
+        top_layout = QHBoxLayout()
+        top_container.setLayout(top_layout)
+
+        # 좌측 패널 (서버 목록)
+        left_panel = QWidget()
+        left_layout = QVBoxLayout()
+        left_panel.setLayout(left_layout)
+        
+        left_layout.addWidget(QLabel("서버 목록"))
+        
+        # 상태/이름 필터
+        filter_layout = QHBoxLayout()
+        self.status_filter = QComboBox()
+        for label, status in (('전체', ''), ('OK', 'OK'), ('WARNING', 'WARNING'), ('CRITICAL', 'CRITICAL'),
+                              ('TIMEOUT', 'TIMEOUT'),
+                              ('ERROR', 'ERROR'), ('SKIPPED (차단)', 'SKIPPED'), ('미점검', 'NONE')):
+            self.status_filter.addItem(label, status)
+        self.status_filter.currentIndexChanged.connect(
+            lambda _: self.server_proxy.set_status_filter(self.status_filter.currentData()))
+        self.name_filter = QLineEdit()
+        self.name_filter.setPlaceholderText('서버 이름 검색')
+        self.name_filter.textChanged.connect(lambda text: self.server_proxy.set_name_filter(text))
+        filter_layout.addWidget(self.status_filter)
+        filter_layout.addWidget(self.name_filter)
+        left_layout.addLayout(filter_layout)
+        
+        # 서버 목록 (model/view, 정렬 가능)
+        self.server_model = ServerTableModel(self)
+        self.server_proxy = ServerFilterProxyModel(self)
+        self.server_proxy.setSourceModel(self.server_model)
+        self.server_table = QTableView()
+        self.server_table.setModel(self.server_proxy)
+        self.server_table.setSortingEnabled(True)
+        self.server_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.server_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.server_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.server_table.verticalHeader().setVisible(False)
+        self.server_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.server_table.horizontalHeader().setStretchLastSection(True)
+        self.server_table.clicked.connect(self.on_server_clicked)
+        left_layout.addWidget(self.server_table)
+        
+        # 결과 시그널은 모아서 주기적으로 화면에 반영
+        self.config_timer = QTimer(self)
+        self.config_timer.setInterval(2000)
+        self.config_timer.timeout.connect(self.reload_config)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(250)
+        self.refresh_timer.timeout.connect(self.flush_pending_results)
+
+        # 우측 패널 (상세 정보, 수집 통계)
+        right_panel = QTabWidget()
+        self.detail_text = QTextEdit()
+        self.detail_text.setReadOnly(True)
+        right_panel.addTab(self.detail_text, "상세 정보")
+        self.stats_text = QTextEdit()
+        self.stats_text.setReadOnly(True)
+        right_panel.addTab(self.stats_text, "수집 통계")
+        
+        # 점검 실패는 팝업 대신 오류 탭에 서버별로 모아서 표시 (복구되면 제거)
+        self.failure_table = QTableWidget(0, 5)
+        self.failure_table.setHorizontalHeaderLabels(['서버', '상태', '연속 실패', '발생 시각', '메시지'])
+        self.failure_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.failure_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.failure_table.verticalHeader().setVisible(False)
+        self.failure_table.horizontalHeader().setStretchLastSection(True)
+        self.failure_table.setSortingEnabled(True)
+        right_panel.addTab(self.failure_table, "오류")
+        
+        # 추이 탭 (시계열 저장소 롤업 기반 기간 통계, 증가 추세 상위 서버)
+        trend_panel = QWidget()
+        trend_layout = QVBoxLayout()
+        trend_panel.setLayout(trend_layout)
+        window_layout = QHBoxLayout()
+        self.trend_window = QComboBox()
+        for window, label in WINDOW_LABELS.items():
+            self.trend_window.addItem(label, window)
+        self.trend_window.currentIndexChanged.connect(lambda _: self.show_trends())
+        window_layout.addWidget(QLabel("기간"))
+        window_layout.addWidget(self.trend_window)
+        window_layout.addStretch(1)
+        trend_layout.addLayout(window_layout)
+        self.trend_text = QTextEdit()
+        self.trend_text.setReadOnly(True)
+        trend_layout.addWidget(self.trend_text)
+        right_panel.addTab(trend_panel, "추이")
+        self.trend_panel = trend_panel
+        right_panel.currentChanged.connect(lambda _: self.show_collector_stats())
+        right_panel.currentChanged.connect(lambda _: self.show_trends())
+        self.right_tabs = right_panel
+        
+        # 수집 통계 탭은 보이는 동안만 주기적으로 갱신
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(2000)
+        self.stats_timer.timeout.connect(self.show_collector_stats)
+        self.stats_timer.start()
+
+        # 패널 추가
+        top_layout.addWidget(left_panel, 1)
+        top_layout.addWidget(right_panel, 2)
+
+        # 하단 컨테이너
+        bottom_container = QWidget()
+        bottom_layout = QHBoxLayout()
+        bottom_container.setLayout(bottom_layout)
+
+        # 진행바
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        # 버튼
+        self.continuous_check = QCheckBox('연속 점검')  # 서버별 interval 로 반복 점검
+        self.start_button = QPushButton('점검 시작')
+        self.start_button.clicked.connect(self.start_monitoring)
+        self.stop_button = QPushButton('점검 중지')
+        self.stop_button.clicked.connect(self.stop_monitoring)
+        self.stop_button.setEnabled(False)
+        self.exit_button = QPushButton('종료')
+        self.exit_button.clicked.connect(self.close)
+
+        bottom_layout.addWidget(self.progress_bar)
+        bottom_layout.addWidget(self.continuous_check)
+        bottom_layout.addWidget(self.start_button)
+        bottom_layout.addWidget(self.stop_button)
+        bottom_layout.addWidget(self.exit_button)
+
+        # 레이아웃에 추가
+        layout.addWidget(top_container)
+        layout.addWidget(bottom_container)
+
+    def load_config(self):
+        """설정 파일 로드"""
+        try:
+            compiled = load_compiled_config(DEFAULT_CONFIG_PATH)
+            self.apply_config(compiled)
+            
+            # 설정 파일이 바뀌면 변경된 서버만 반영
+            self.config_watcher = ConfigWatcher(DEFAULT_CONFIG_PATH, compiled)
+            self.config_timer.start()
+                
+        except Exception as e:
+            QMessageBox.critical(self, '오류', f'설정 파일 로드 실패: {str(e)}')
+
+    def apply_config(self, compiled):
+        """검증/컴파일된 설정 적용 (서버이름 -> 설정 인덱스, 임계값 규칙, 서버 목록)"""
+        self.config = compiled.config
+        self.servers_by_name = compiled.servers_by_name
+        self.rules = compiled.rules
+        self.server_model.set_servers(list(self.servers_by_name))
+
+    def reload_config(self):
+        """설정 파일 변경 확인 (config_timer), 점검중이면 추가/삭제/변경된 서버만 엔진에 전달"""
+        try:
+            changed = self.config_watcher.poll()
+        except ConfigError as e:
+            self.logger.error(f"Config reload failed, keeping previous config: {str(e)}")
+            self.show_error(f'설정 파일 재로드 실패 (이전 설정 유지): {str(e)}')
+            return
+        except Exception as e:
+            self.logger.error(f"Config reload failed: {str(e)}")
+            return
+        if changed is None:
+            return
+        compiled, diff = changed
+        for name in diff.removed:
+            self.server_results.pop(name, None)
+            self.pending_results.pop(name, None)
+        self.apply_config(compiled)
+        if self.monitoring_thread is not None and self.monitoring_thread.isRunning():
+            self.monitoring_thread.engine.request_reload(compiled, diff)
+        if self.selected_server in diff.removed:
+            self.selected_server = None
+            self.detail_text.clear()
+        self.logger.info(f"Config reloaded: {len(diff.added)} added, {len(diff.removed)} removed, "
+                         f"{len(diff.changed)} changed")
+
+    def start_monitoring(self):
+        """모니터링 시작"""
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.continuous_check.setEnabled(False)
+        self.server_results.clear()
+        self.pending_results.clear()
+        self.failures.clear()
+        self.failures_changed = True
+        self.progress_bar.setMaximum(max(len(self.config['servers']), 1))
+        self.progress_bar.setValue(0)
+        
+        # 서버 목록 초기화
+        self.server_model.reset_statuses()
+        self.refresh_timer.start()
+        
+        # 모니터링 스레드 생성 및 시작
+        if self.ssh_pool is None:
+            self.ssh_pool = SSHConnectionPool.from_settings(self.config['default_settings'])
+        self.open_metric_store()
+        if self.alert_manager is None:
+            self.alert_manager = AlertManager.from_settings(self.config['default_settings'])
+        if self.log_tailer is None:
+            self.log_tailer = LogTailCollector.from_settings(self.config['default_settings'])
+        if self.stats is None:
+            self.stats = CollectorStats.from_settings(self.config['default_settings'])
+        if self.health is None:
+            self.health = HostHealthTracker.from_settings(self.config['default_settings'])
+        self.monitoring_thread = MonitoringThread(self.config, ssh_pool=self.ssh_pool,
+                                                  continuous=self.continuous_check.isChecked(),
+                                                  proc_collector=self.proc_collector,
+                                                  metric_store=self.metric_store,
+                                                  rules=self.rules,
+                                                  alert_manager=self.alert_manager,
+                                                  log_tailer=self.log_tailer,
+                                                  stats=self.stats,
+                                                  health=self.health)
+        self.monitoring_thread.progress_signal.connect(self.update_progress)
+        self.monitoring_thread.count_signal.connect(self.update_count)
+        self.monitoring_thread.result_signal.connect(self.update_server_result)
+        self.monitoring_thread.finished_signal.connect(self.monitoring_finished)
+        self.monitoring_thread.error_signal.connect(self.show_error)
+        self.monitoring_thread.failure_signal.connect(self.update_server_failure)
+        self.monitoring_thread.start()
+
+    def open_metric_store(self):
+        """시계열 저장소 (처음 사용할 때 열고 점검간 유지, 설정에서 끈 경우 None)"""
+        if self.metric_store is None:
+            self.metric_store = MetricStore.from_settings(self.config['default_settings'])
+        return self.metric_store
+
+    def stop_monitoring(self):
+        """모니터링 중지"""
+        if self.monitoring_thread and self.monitoring_thread.isRunning():
+            self.monitoring_thread.stop()
+            if not self.monitoring_thread.wait(msecs=5000):  # 5초 timeout
+                self.logger.warning("모니터링 스레드 강제 종료")
+                self.monitoring_thread.terminate()  # 강제 종료
+            self.monitoring_thread = None  # GC 수행되도록
+            self.refresh_timer.stop()
+            self.flush_pending_results()
+            self.update_progress("모니터링 중지됨")
+            self.start_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
+            self.continuous_check.setEnabled(True)
+
+    def update_progress(self, message):
+        """진행 상황 업데이트"""
+        self.progress_bar.setFormat(f"{message} (%v/%m)")
+
+    def update_count(self, completed, total):
+        """완료 서버 수 / 전체 서버 수로 진행바 갱신"""
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(completed)
+
+    def update_server_result(self, server_name, results):
+        """서버 결과 수신 (화면 반영은 flush_pending_results 에서 일괄 처리)"""
+        self.server_results[server_name] = results
+        self.pending_results[server_name] = (None, results, datetime.now())
+        if self.failures.pop(server_name, None) is not None:
+            self.failures_changed = True
+
+    def update_server_failure(self, server_name, status, message):
+        """서버 점검 실패 (시간 초과/오류/차단) 상태 표시, 직전 결과는 유지"""
+        now = datetime.now()
+        self.pending_results[server_name] = (status.upper(), self.server_results.get(server_name), now)
+        self.failures[server_name] = (status.upper(), message, now)
+        self.failures_changed = True
+        self.statusBar().showMessage(message, 10000)
+
+    def flush_pending_results(self):
+        """쌓인 결과를 서버 목록/상세 정보/오류 탭에 한 번에 반영"""
+        if self.failures_changed:
+            self.show_failures()
+        if not self.pending_results:
+            return
+        pending, self.pending_results = self.pending_results, {}
+        
+        # 새 결과가 있는 서버들의 임계값을 한 번에 평가
+        breaches = self.check_thresholds(
+            [(server_name, results) for server_name, (status, results, _) in pending.items() if status is None])
+        
+        updates = {}
+        for server_name, (status, results, checked_at) in pending.items():
+            if status is None:
+                status = LEVEL_NAMES[max_level(breaches.get(server_name, []))].upper()
+            updates[server_name] = (status, results, checked_at)
+        self.server_model.update_rows(updates)
+        
+        if self.selected_server in pending:
+            self.show_server_details(self.selected_server)
+
+    def check_thresholds(self, items):
+        """임계값 체크 ([(서버이름, 결과), ...] -> {서버이름: [Breach, ...]})"""
+        try:
+            return self.rules.evaluate_many(items)
+        except Exception as e:
+            self.logger.error(f"Failed to check thresholds: {str(e)}")
+            return {}
+
+    def on_server_clicked(self, index):
+        """서버 목록 클릭"""
+        server_name = index.siblingAtColumn(ServerTableModel.NAME_COLUMN).data()
+        self.selected_server = server_name
+        self.show_server_details(server_name)
+        self.show_trends()
+
+    def show_server_details(self, server_name):
+        """서버 상세 정보 표시"""
+        if server_name in self.server_results:
+            results = self.server_results[server_name]
+            
+            # 서버 설정 (load_config 에서 만든 인덱스 사용), 임계값 초과 항목
+            server_config = self.servers_by_name.get(server_name)
+            breaches = {breach.metric: breach
+                        for breach in self.check_thresholds([(server_name, results)]).get(server_name, [])}
+            
+            def highlight(metric, text):
+                # 경고는 주황, 위험은 빨강으로 표시
+                breach = breaches.get(metric)
+                if breach is None:
+                    return text
+                color = 'red' if breach.level == LEVEL_CRITICAL else 'darkorange'
+                return f'<span style="color: {color}">{text}</span>'
+                        
+            details = f"<h3>=== {server_name} 상세 정보 ===</h3>"
+            cpu_usage = float(results['cpu'])
+            memory_usage = float(results['memory'])
+            disk_usage = float(results['disk'])
+            details += f"<p>CPU 사용률: {highlight('cpu', f'{cpu_usage}%')}</p>"
+            details += f"<p>메모리 사용률: {highlight('memory', f'{memory_usage:.2f}%')}</p>"
+            details += f"<p>디스크 사용률: {highlight('disk', f'{disk_usage:.1f}%')}</p>"
+            details += f"<p>부하 평균: {highlight('load_per_core', results['load_avg'])}</p>"
+            details += f'<p>가동 시간: {results["uptime"]}</p>'
+            details += '<br>'
+            
+            # 서버별 개별 명령어/로그 감시 결과 표시
+            check_names = list((server_config or {}).get('commands') or {})
+            check_names += [watch['name'] for watch in (server_config or {}).get('log_watches') or []]
+            if check_names:
+                details += '<h4>=== 개별 점검 결과 ===</h4>'
+                for cmd_name in check_names:
+                    if cmd_name in results:
+                        details += f'<p><b>{cmd_name}:</b><br>'
+                        details += f"&nbsp;&nbsp;결과: {highlight(f'cmd.{cmd_name}', results[cmd_name])}</p>"
+                details += '<br>'
+            
+            if 'services' in results:
+                details += '<h4>=== 서비스 상태 ===</h4>'
+                for service_name, service_info in results['services'].items():
+                    details += f'<p><b>{service_name}:</b><br>'
+                    status = service_info['status']
+                    if status != 'active':
+                        details += f'&nbsp;&nbsp;상태: <span style="color: red">{status}</span><br>'
+                    else:
+                        details += f'&nbsp;&nbsp;상태: {status}<br>'
+                    details += f'&nbsp;&nbsp;프로세스 수: {service_info["process_count"]}</p>'
+            
+            self.detail_text.setText(details)
+        else:
+            self.detail_text.setText("점검 결과가 없습니다.")
+
+    def show_collector_stats(self):
+        """수집 통계 탭 표시 (단계별/명령어별 소요 시간, 점검 시간이 긴 서버)"""
+        if self.right_tabs.currentWidget() is not self.stats_text:
+            return
+        if self.stats is None:
+            self.stats_text.setText("수집 통계가 없습니다. (점검 시작 후 표시, self_metrics.enabled: false 이면 표시 안함)")
+            return
+        snapshot = self.stats.snapshot()
+
+        def table(title, rows):
+            html = f'<h4>=== {title} ===</h4>'
+            html += ('<table border="1" cellspacing="0" cellpadding="3">'
+                     '<tr><th>항목</th><th>횟수</th><th>평균</th><th>p50</th><th>p95</th><th>최대</th></tr>')
+            for name, summary in rows:
+                values = ''.join(f'<td align="right">{summary[key] * 1000:.1f}ms</td>'
+                                 for key in ('avg', 'p50', 'p95', 'max'))
+                html += f'<tr><td>{name}</td><td align="right">{summary["count"]}</td>{values}</tr>'
+            return html + '</table><br>'
+
+        checks = snapshot['checks']
+        connections = snapshot['connections']
+        details = "<h3>=== 수집 통계 ===</h3>"
+        details += (f"<p>점검: 정상 {checks.get('ok', 0)}, 시간 초과 {checks.get('timeout', 0)}, "
+                    f"오류 {checks.get('error', 0)}<br>"
+                    f"연결: 새 연결 {connections.get('new', 0)}, 재사용 {connections.get('reused', 0)}")
+        if snapshot['last_sweep'] is not None:
+            seconds, hosts = snapshot['last_sweep']
+            details += f"<br>마지막 전체 점검: 서버 {hosts}대, {seconds:.1f}초"
+        details += '</p>'
+        phases = snapshot['phases']
+        details += table('단계별 소요 시간', [(phase, phases[phase]) for phase in PHASES if phase in phases])
+        details += table('명령어별 소요 시간', list(snapshot['commands'].items()))
+        details += table('점검 시간이 긴 서버', snapshot['slowest_hosts'])
+        
+        # 스크롤 위치 유지
+        scroll = self.stats_text.verticalScrollBar().value()
+        self.stats_text.setHtml(details)
+        self.stats_text.verticalScrollBar().setValue(scroll)
+
+    def show_trends(self):
+        """추이 탭 표시 (선택한 서버의 기간 통계와 sparkline, 전체 서버 증가 추세 top 10)"""
+        if self.right_tabs.currentWidget() is not self.trend_panel:
+            return
+        try:
+            store = self.open_metric_store()
+        except Exception as e:
+            self.trend_text.setText(f"시계열 저장소를 열 수 없습니다: {str(e)}")
+            return
+        if store is None:
+            self.trend_text.setText("시계열 저장소가 꺼져 있습니다. (metric_store.enabled: false)")
+            return
+        report = HistoryReport(store)
+        window = self.trend_window.currentData()
+        label = WINDOW_LABELS[window]
+
+        details = ''
+        if self.selected_server:
+            details += f"<h3>=== {self.selected_server} 추이 ({label}) ===</h3>"
+            summary = report.server_summary(self.selected_server, window)
+            if summary:
+                details += ('<table border="1" cellspacing="0" cellpadding="3">'
+                            '<tr><th>항목</th><th>최소</th><th>평균</th><th>최대</th><th>p95</th><th>최근</th>'
+                            '<th>추이</th></tr>')
+                for row in summary:
+                    values = ''.join(f'<td align="right">{row[key]:.2f}</td>'
+                                     for key in ('min', 'avg', 'max', 'p95', 'last'))
+                    details += (f'<tr><td>{row["metric"]}</td>{values}'
+                                f'<td style="font-family: monospace">{row["spark"]}</td></tr>')
+                details += '</table><br>'
+            else:
+                details += '<p>저장된 값이 없습니다.</p>'
+        else:
+            details += '<p>서버 목록에서 서버를 선택하면 기간 통계가 표시됩니다.</p>'
+
+        for metric in GROWTH_METRICS:
+            details += f'<h4>=== {metric} 증가 추세 상위 서버 ({label}) ===</h4>'
+            growth = report.top_growth(metric, window)
+            if not growth:
+                details += '<p>저장된 값이 없습니다.</p>'
+                continue
+            details += ('<table border="1" cellspacing="0" cellpadding="3">'
+                        '<tr><th>서버</th><th>증가량</th><th>최근 평균</th></tr>')
+            for server_name, value, last in growth:
+                details += (f'<tr><td>{server_name}</td><td align="right">{value:+.2f}</td>'
+                            f'<td align="right">{last:.2f}</td></tr>')
+            details += '</table><br>'
+        self.trend_text.setHtml(details)
+
+    def monitoring_finished(self):
+        """모니터링 완료 처리"""
+        self.refresh_timer.stop()
+        self.flush_pending_results()
+        self.start_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.continuous_check.setEnabled(True)
+        self.progress_bar.setValue(self.progress_bar.maximum())
+
+    def show_error(self, message):
+        """에러 메시지 표시 (팝업 없이 상태 표시줄과 오류 탭에 표시)"""
+        self.statusBar().showMessage(message, 10000)
+        # 서버 점검 오류는 update_server_failure 에서 서버별로 기록되므로 여기서는 점검 전체 오류만 표시
+        self.failures['(전체)'] = ('ERROR', message, datetime.now())
+        self.show_failures()
+
+    def show_failures(self):
+        """오류 탭 갱신 (서버별 마지막 실패, 연속 실패 횟수)"""
+        self.failures_changed = False
+        table = self.failure_table
+        table.setSortingEnabled(False)
+        table.setRowCount(len(self.failures))
+        for row, (server_name, (status, message, occurred_at)) in enumerate(self.failures.items()):
+            failures = self.health.failures(server_name) if self.health is not None else 0
+            count_item = QTableWidgetItem()
+            count_item.setData(Qt.ItemDataRole.DisplayRole, failures)
+            status_item = QTableWidgetItem(status)
+            status_item.setForeground(ServerTableModel.STATUS_COLORS.get(status, QColor(Qt.GlobalColor.black)))
+            table.setItem(row, 0, QTableWidgetItem(server_name))
+            table.setItem(row, 1, status_item)
+            table.setItem(row, 2, count_item)
+            table.setItem(row, 3, QTableWidgetItem(occurred_at.strftime('%H:%M:%S')))
+            table.setItem(row, 4, QTableWidgetItem(message))
+        table.setSortingEnabled(True)
+        index = self.right_tabs.indexOf(table)
+        self.right_tabs.setTabText(index, f"오류 ({len(self.failures)})" if self.failures else "오류")
+
+    def closeEvent(self, event):
+        """프로그램 종료 시 처리"""
+        try:
+            self.stop_monitoring()
+            if self.log_tailer is not None:
+                self.log_tailer.close()  # SFTP 세션은 SSH 연결보다 먼저 종료
+            if self.ssh_pool is not None:
+                self.ssh_pool.close_all()
+            if self.metric_store is not None:
+                self.metric_store.close()
+            if self.alert_manager is not None:
+                self.alert_manager.close()
+            if self.stats is not None:
+                self.stats.close()
+            if self.health is not None:
+                self.health.save_state()
+            # 추가 정리 작업
+            if hasattr(self, 'logger'):
+                handlers = self.logger.handlers[:]
+                for handler in handlers:
+                    handler.close()
+                    self.logger.removeHandler(handler)
+        except Exception as e:
+            self.logger.info(f'Close event error : {str(e)}')
+        finally:
+            event.accept()
+
+
+def run_gui(argv=None):
+    """GUI 실행"""
+    app = QApplication(argv if argv is not None else sys.argv)
+    ex = ServerMonitorGUI()
+    ex.show()
+    return app.exec()
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""서버별 점검 상태 추적 (실패 backoff, 차단, 점검 주기 자동 조정)
+
+- 실패(시간 초과/오류)가 이어지면 연속 점검 모드의 점검 주기를 2배씩 늘림 (backoff_max 까지)
+- 연속 circuit_failures 회 실패하면 backoff_max 동안 차단(점검하지 않음), 이후 1회 시험 점검해
+  성공하면 정상 주기로 복귀, 실패하면 다시 차단
+- 정상 점검이 stable_checks 회 이어지고 임계값과 거리가 있는 서버는 점검 주기를 slow_factor 배로 늘리고,
+  경고 임계값의 near_ratio 이상인 서버는 fast_factor 배로 줄임 (min_interval 이상)
+- 상태는 state_path(JSON)에 저장되어 재시작해도 연속 점검 모드의 차단 상태가 유지됨
+  (1회 점검/GUI 수동 점검은 차단과 관계없이 모든 서버를 점검하고, 결과만 상태에 반영)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+STATUS_SKIPPED = 'skipped'  # 차단되어 점검하지 않은 서버의 실패 상태
+
+
+class _HostState:
+    __slots__ = ('failures', 'stable', 'near', 'open_until', 'last_error')
+
+    def __init__(self, failures=0, stable=0, near=False, open_until=0.0, last_error=''):
+        self.failures = failures  # 연속 실패 횟수
+        self.stable = stable  # 연속 안정 점검 횟수
+        self.near = near  # 직전 점검에서 임계값 근접/초과 여부
+        self.open_until = open_until  # 차단 해제 시각 (time.time 기준, 0 이면 차단 안됨)
+        self.last_error = last_error
+
+
+class HostHealthTracker:
+    """서버별 연속 실패/안정 상태 추적 (여러 워커 스레드에서 호출됨)"""
+
+    def __init__(self, backoff_max=3600, circuit_failures=5, adaptive=True, stable_checks=3, slow_factor=2.0,
+                 fast_factor=0.5, near_ratio=0.9, min_interval=30, state_path=None, clock=time.time):
+        self.backoff_max = backoff_max
+        self.circuit_failures = max(1, int(circuit_failures))
+        self.adaptive = adaptive
+        self.stable_checks = max(1, int(stable_checks))
+        self.slow_factor = slow_factor
+        self.fast_factor = fast_factor
+        self.near_ratio = near_ratio
+        self.min_interval = min_interval
+        self.state_path = state_path
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._states = {}  # 서버이름 -> _HostState
+        self._lock = threading.Lock()
+        self._load_state()
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        """default_settings.health 설정으로 생성 (enabled: false 이면 None)"""
+        settings = default_settings.get('health') or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            backoff_max=settings.get('backoff_max', 3600),
+            circuit_failures=settings.get('circuit_failures', 5),
+            adaptive=settings.get('adaptive', True),
+            stable_checks=settings.get('stable_checks', 3),
+            slow_factor=settings.get('slow_factor', 2.0),
+            fast_factor=settings.get('fast_factor', 0.5),
+            near_ratio=settings.get('near_ratio', 0.9),
+            min_interval=settings.get('min_interval', 30),
+            state_path=settings.get('state_path') or os.path.join(default_settings.get('results_dir', 'results'),
+                                                                  'host_health.json'),
+        )
+
+    def record_success(self, server_name, ratio=0.0):
+        """정상 점검 반영 (ratio: 경고 임계값에 가장 가까운 항목의 값/기준 비율)"""
+        near = ratio >= self.near_ratio
+        with self._lock:
+            state = self._states.get(server_name)
+            if state is None:
+                state = self._states[server_name] = _HostState()
+            if state.failures:
+                self.logger.info(f"[{server_name}] Recovered after {state.failures} consecutive failures")
+            state.failures = 0
+            state.open_until = 0.0
+            state.last_error = ''
+            state.near = near
+            state.stable = 0 if near else state.stable + 1
+
+    def record_failure(self, server_name, message=''):
+        """실패 반영, circuit_failures 회 연속 실패하면 backoff_max 동안 차단"""
+        with self._lock:
+            state = self._states.get(server_name)
+            if state is None:
+                state = self._states[server_name] = _HostState()
+            state.failures += 1
+            state.stable = 0
+            state.near = False
+            state.last_error = message
+            if state.failures >= self.circuit_failures:
+                state.open_until = self.clock() + self.backoff_max
+                opened = state.failures == self.circuit_failures
+            else:
+                opened = False
+        if opened:
+            self.logger.warning(f"[{server_name}] {self.circuit_failures} consecutive failures, "
+                                f"pausing checks for {self.backoff_max}s")
+
+    def is_open(self, server_name):
+        """차단 중이면 해제 시각(time.time 기준), 아니면 None"""
+        with self._lock:
+            state = self._states.get(server_name)
+            if state is None or state.open_until <= self.clock():
+                return None
+            return state.open_until
+
+    def failures(self, server_name):
+        with self._lock:
+            state = self._states.get(server_name)
+            return state.failures if state is not None else 0
+
+    def interval(self, server_name, base):
+        """다음 점검까지의 주기 (연속 점검 모드)"""
+        with self._lock:
+            state = self._states.get(server_name)
+            if state is None:
+                return base
+            if state.failures:
+                limit = max(base, self.backoff_max)
+                if state.failures >= self.circuit_failures:
+                    return limit
+                return min(base * 2 ** state.failures, limit)
+            if not self.adaptive:
+                return base
+            if state.near:
+                return max(base * self.fast_factor, min(base, self.min_interval))
+            if state.stable >= self.stable_checks:
+                return base * self.slow_factor
+            return base
+
+    def skip_message(self, server_name, open_until):
+        return (f"{server_name} check skipped: {self.failures(server_name)} consecutive failures, "
+                f"paused until {datetime.fromtimestamp(open_until).strftime('%H:%M:%S')}")
+
+    def forget(self, server_name):
+        """서버 설정이 삭제된 경우 상태 제거"""
+        with self._lock:
+            self._states.pop(server_name, None)
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                data = json.load(f)
+            self._states = {name: _HostState(**values) for name, values in data.items()}
+        except Exception as e:
+            self.logger.error(f"Failed to load host health state : {str(e)}")
+
+    def save_state(self):
+        """연속 실패/차단 상태 저장 (정상 상태인 서버는 저장하지 않음)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            data = {name: {'failures': state.failures, 'open_until': state.open_until, 'last_error': state.last_error}
+                    for name, state in self._states.items() if state.failures}
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            self.logger.error(f"Failed to save host health state : {str(e)}")
@@ -0,0 +1,303 @@
+"""서버별 추이/기간 통계 보고서 (시계열 저장소 롤업 사용)
+
+- 서버별: 메트릭마다 기간(일/주/월) min/avg/max/p95 와 sparkline
+- 전체 서버: 기간 동안 증가 추세가 큰 서버 top N (1시간/1일 롤업의 (metric_id, ts) 인덱스 사용)
+- 기존 텍스트 결과 파일(results/YYYYMMDD/*.txt)을 저장소로 가져오는 1회성 importer
+
+min/avg/max 는 롤업을 합쳐 계산하고, p95 는 일 단위는 원본 값, 주/월 단위는 1시간 평균 값으로 계산한다.
+
+python -m monitor.history show abc-server --window week
+python -m monitor.history top --metric disk --window month -n 20
+python -m monitor.history import    # results_dir 의 텍스트 결과 파일 가져오기
+"""
+import argparse
+import logging
+import math
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+from monitor.config import DEFAULT_CONFIG_PATH, ConfigError, load_compiled_config
+from monitor.store import MetricStore
+
+WINDOWS = {'day': 86400, 'week': 7 * 86400, 'month': 30 * 86400}  # 기간 -> 길이(초)
+WINDOW_LABELS = {'day': '일', 'week': '주', 'month': '월'}
+_WINDOW_RESOLUTION = {'day': '1h', 'week': '1h', 'month': '1d'}  # 기간별 sparkline/min/avg/max 해상도
+TREND_METRICS = ('cpu', 'memory', 'disk', 'load_1')
+GROWTH_METRICS = ('cpu', 'disk')
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+_HEADER = re.compile(r'^=== System Monitoring at (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) ===$')
+_SERVER = re.compile(r'^Server: (.+) \(([^()]*)\)$')
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+_USAGE_FIELDS = {'CPU Usage': 'cpu', 'Memory Usage': 'memory', 'Disk Usage': 'disk'}
+
+
+def sparkline(values, width=None):
+    """값 목록 -> 유니코드 막대 문자열 (width 보다 길면 구간 평균으로 줄임)"""
+    values = [value for value in values if value is not None]
+    if not values:
+        return ''
+    if width and len(values) > width:
+        step = len(values) / width
+        values = [sum(chunk) / len(chunk) for chunk in
+                  (values[int(i * step):max(int((i + 1) * step), int(i * step) + 1)] for i in range(width))]
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK_CHARS[0] * len(values)
+    scale = (len(SPARK_CHARS) - 1) / (high - low)
+    return ''.join(SPARK_CHARS[int((value - low) * scale + 0.5)] for value in values)
+
+
+def percentile(values, pct):
+    """nearest-rank 백분위수"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))]
+
+
+def trend_slope(points):
+    """(ts, 값) 목록의 최소제곱 기울기 (초당 변화량)"""
+    if len(points) < 2:
+        return 0.0
+    mean_ts = sum(ts for ts, _ in points) / len(points)
+    mean_value = sum(value for _, value in points) / len(points)
+    variance = sum((ts - mean_ts) ** 2 for ts, _ in points)
+    if not variance:
+        return 0.0
+    return sum((ts - mean_ts) * (value - mean_value) for ts, value in points) / variance
+
+
+class HistoryReport:
+    """저장소 롤업 기반 기간 통계/추이 조회"""
+
+    def __init__(self, store, clock=time.time):
+        self.store = store
+        self.clock = clock
+
+    def window_range(self, window, end=None):
+        end = int(end if end is not None else self.clock())
+        return end - WINDOWS[window], end
+
+    def server_summary(self, server_name, window='day', metrics=TREND_METRICS, end=None, spark_width=48):
+        """서버의 메트릭별 기간 통계 -> [{'metric', 'min', 'avg', 'max', 'p95', 'last', 'count', 'spark'}]"""
+        start, end = self.window_range(window, end)
+        resolution = _WINDOW_RESOLUTION[window]
+        summary = []
+        for metric in metrics:
+            rows = self.store.query(server_name, metric, start, end, resolution=resolution)
+            if not rows:
+                continue
+            count = sum(row[4] for row in rows)
+            summary.append({
+                'metric': metric,
+                'min': min(row[1] for row in rows),
+                'avg': sum(row[2] * row[4] for row in rows) / count,
+                'max': max(row[3] for row in rows),
+                'p95': self._p95(server_name, metric, window, start, end, rows),
+                'last': rows[-1][2],
+                'count': count,
+                'spark': sparkline([row[2] for row in rows], spark_width),
+            })
+        return summary
+
+    def top_growth(self, metric, window='week', limit=10, end=None):
+        """기간 동안 증가 추세(최소제곱 기울기 x 기간)가 큰 서버 -> [(서버이름, 증가량, 마지막 평균)]"""
+        start, end = self.window_range(window, end)
+        series = self.store.fleet_query(metric, start, end, resolution=_WINDOW_RESOLUTION[window])
+        growth = []
+        for server_name, rows in series.items():
+            if len(rows) < 2:
+                continue
+            slope = trend_slope([(row[0], row[2]) for row in rows])
+            growth.append((server_name, slope * WINDOWS[window], rows[-1][2]))
+        growth.sort(key=lambda item: item[1], reverse=True)
+        return growth[:limit]
+
+    def _p95(self, server_name, metric, window, start, end, rows):
+        if window == 'day' and start >= self.clock() - self.store.retention['raw']:
+            values = [value for _, value in self.store.query(server_name, metric, start, end, resolution='raw')]
+            if values:
+                return percentile(values, 95)
+        if _WINDOW_RESOLUTION[window] != '1h':
+            hourly = self.store.query(server_name, metric, start, end, resolution='1h')
+            if hourly:
+                rows = hourly
+        return percentile([row[2] for row in rows], 95)
+
+
+def format_summary(server_name, window, summary):
+    """server_summary 결과 -> 텍스트 표"""
+    lines = [f"=== {server_name} ({WINDOW_LABELS[window]}) ===",
+             f"{'metric':<10} {'min':>8} {'avg':>8} {'max':>8} {'p95':>8} {'last':>8}  trend"]
+    for row in summary:
+        values = ' '.join(f"{row[key]:>8.2f}" for key in ('min', 'avg', 'max', 'p95', 'last'))
+        lines.append(f"{row['metric']:<10} {values}  {row['spark']}")
+    if not summary:
+        lines.append("(저장된 값 없음)")
+    return '\n'.join(lines)
+
+
+def format_growth(metric, window, growth):
+    """top_growth 결과 -> 텍스트 표"""
+    lines = [f"=== {metric} 증가 추세 top {len(growth)} ({WINDOW_LABELS[window]}) ===",
+             f"{'server':<30} {'growth':>9} {'last':>8}"]
+    lines += [f"{server_name:<30} {value:>+9.2f} {last:>8.2f}" for server_name, value, last in growth]
+    return '\n'.join(lines)
+
+
+def parse_text_report(path):
+    """텍스트 결과 파일 -> [(ts, 서버이름, 결과 dict)] (writer.format_text_report 와 이전 버전 형식)"""
+    records = []
+    record = None
+    section = None
+    service = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            header = _HEADER.match(line)
+            if header:
+                ts = datetime.strptime(header.group(1), '%Y-%m-%d %H:%M:%S').timestamp()
+                record = {'ts': ts, 'server': None, 'results': {}}
+                records.append(record)
+                section = service = None
+                continue
+            if record is None or not line.strip():
+                continue
+            results = record['results']
+            if line.startswith('====='):
+                record = None
+            elif line == '=== Additional Checks ===':
+                section = 'checks'
+            elif line == '=== Service Status ===':
+                section = 'services'
+                results['services'] = {}
+            elif line == '!!! WARNINGS !!!':
+                section = 'warnings'
+            elif section is None:
+                _parse_usage_line(line, record)
+            elif section == 'checks':
+                name, sep, value = line.partition(': ')
+                if sep:
+                    results[name] = value.strip()
+            elif section == 'services':
+                if not line.startswith(' ') and line.endswith(':'):
+                    service = results['services'][line[:-1]] = {'status': '', 'process_count': ''}
+                elif service is not None:
+                    key, _, value = line.strip().partition(': ')
+                    if key == 'Status':
+                        service['status'] = value
+                    elif key == 'Process Count':
+                        service['process_count'] = value
+    return [(record['ts'], record['server'], record['results']) for record in records
+            if record['server'] and record['results']]
+
+
+def _parse_usage_line(line, record):
+    """기본 항목 줄 (Server, CPU/Memory/Disk Usage, Load Average)"""
+    server = _SERVER.match(line)
+    if server:
+        record['server'] = server.group(1)
+        return
+    key, sep, value = line.partition(': ')
+    if not sep:
+        return
+    results = record['results']
+    if key in _USAGE_FIELDS:
+        number = _NUMBER.search(value)
+        if number:
+            results[_USAGE_FIELDS[key]] = float(number.group())
+    elif key == 'Load Average':
+        loads = _NUMBER.findall(value)
+        if len(loads) >= 3:
+            results['load_1'], results['load_5'], results['load_15'] = (float(load) for load in loads[:3])
+
+
+def import_text_results(store, results_dir, on_progress=None):
+    """results_dir/YYYYMMDD/<서버>_<ip>.txt 결과를 저장소로 가져오기 -> {서버이름: 가져온 결과 수}
+
+    서버별로 최근 날짜부터 날짜 폴더 단위 트랜잭션으로 기록하고, 저장소에 이미 있는 가장 오래된 시각 이후의 결과는
+    건너뛰므로 중간에 중단되거나 반복 실행해도 중복되지 않는다.
+    """
+    files = {}  # 파일 이름 -> [경로] (최근 날짜 순)
+    days = sorted((entry.name for entry in os.scandir(results_dir)
+                   if entry.is_dir() and re.fullmatch(r'\d{8}', entry.name)), reverse=True)
+    for day in days:
+        for entry in os.scandir(os.path.join(results_dir, day)):
+            if entry.is_file() and entry.name.endswith('.txt'):
+                files.setdefault(entry.name, []).append(entry.path)
+
+    imported = {}  # 서버이름 -> 가져온 결과 수
+    cutoffs = {}  # 서버이름 -> 가져오기 전 저장소의 가장 오래된 시각
+    for filename, paths in sorted(files.items()):
+        for path in paths:
+            try:
+                records = parse_text_report(path)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Failed to read {path} : {str(e)}")
+                continue
+            for server_name in sorted({name for _, name, _ in records}):
+                if server_name not in cutoffs:
+                    cutoffs[server_name] = store.first_timestamp(server_name) or math.inf
+                count = store.backfill(server_name, [(ts, results) for ts, name, results in records
+                                                     if name == server_name], before=cutoffs[server_name])
+                imported[server_name] = imported.get(server_name, 0) + count
+        if on_progress is not None:
+            on_progress(filename, imported)
+    return imported
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m monitor.history', description='시계열 저장소 기간 통계/추이 보고서')
+    parser.add_argument('-c', '--config', default=DEFAULT_CONFIG_PATH, help='설정 파일 경로 (기본: servers.yaml)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    show = commands.add_parser('show', help='서버별 기간 통계와 추이')
+    show.add_argument('servers', nargs='*', help='서버 이름 (기본: 전체)')
+    show.add_argument('--window', choices=tuple(WINDOWS), default='day', help='기간')
+    show.add_argument('--metrics', help='메트릭 이름 (쉼표로 구분, 기본: cpu,memory,disk,load_1)')
+    top = commands.add_parser('top', help='증가 추세가 큰 서버')
+    top.add_argument('--metric', default='disk', help='메트릭 이름 (기본: disk)')
+    top.add_argument('--window', choices=tuple(WINDOWS), default='week', help='기간')
+    top.add_argument('-n', '--limit', type=int, default=10, help='표시할 서버 수')
+    backfill = commands.add_parser('import', help='텍스트 결과 파일을 저장소로 가져오기 (1회)')
+    backfill.add_argument('results_dir', nargs='?', help='결과 폴더 (기본: default_settings.results_dir)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        compiled = load_compiled_config(args.config)
+    except ConfigError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    default_settings = compiled.config['default_settings']
+    store = MetricStore.from_settings(default_settings)
+    if store is None:
+        print("metric_store is disabled (default_settings.metric_store.enabled)", file=sys.stderr)
+        return 2
+    try:
+        report = HistoryReport(store)
+        if args.command == 'show':
+            metrics = [name.strip() for name in args.metrics.split(',')] if args.metrics else TREND_METRICS
+            for server_name in args.servers or store.server_names():
+                print(format_summary(server_name, args.window,
+                                     report.server_summary(server_name, args.window, metrics)) + '\n')
+        elif args.command == 'top':
+            print(format_growth(args.metric, args.window, report.top_growth(args.metric, args.window, args.limit)))
+        else:
+            results_dir = args.results_dir or default_settings['results_dir']
+            imported = import_text_results(store, results_dir)
+            for server_name, count in sorted(imported.items()):
+                print(f"{server_name}: {count}")
+            print(f"imported {sum(imported.values())} results for {len(imported)} servers from {results_dir}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""원격 로그 파일 증분 수집 (SFTP 오프셋 커서)
+
+서버별 log_watches 에 지정한 로그 파일을 매 점검마다 전부 다시 읽지 않고,
+직전 점검에서 읽은 위치(offset) 이후에 추가된 바이트만 읽어 줄 수(또는 패턴 일치 줄 수)를 센다.
+
+    log_watches:
+      - name: alerts_count                       # 결과 키 (개별 명령어 결과와 같은 방식으로 표시/저장)
+        path: "/var/ossec/logs/alerts/*.log"     # 파일명에 glob 패턴 사용 가능
+        pattern: "rule"                          # 정규식, 생략하면 모든 줄
+
+- 결과 값은 직전 점검 이후 새로 추가된 (일치하는) 줄 수
+- 처음 보는 watch 는 현재 파일 끝에서 시작 (기존 내용은 세지 않음), 이후 새로 생긴 파일은 처음부터 읽음
+- 로테이션 감지: 파일 크기가 줄었거나 파일 앞부분(fingerprint)이 바뀌면 새 파일로 보고 처음부터 읽음,
+  이때 <path>.1 이 이전 파일이면 남은 부분을 먼저 읽음
+- 1회에 max_bytes_per_check 까지만 읽고, 그 안에 줄바꿈이 없는 아주 긴 줄은 잘린 1줄로 세고 줄 끝까지 건너뜀
+- SFTP 세션은 SSH 연결(풀)마다 열어둔 채 재사용
+- 오프셋은 state_path(JSON)에 저장되어 재시작 후에도 이어서 읽음
+"""
+import fnmatch
+import json
+import logging
+import os
+import posixpath
+import re
+import stat
+import threading
+import time
+
+FINGERPRINT_SIZE = 64  # 로테이션 감지에 사용하는 파일 앞부분 크기
+READ_SIZE = 32768
+
+
+class LogTailCollector:
+    """서버별 로그 파일 증분 수집 (점검간 오프셋 유지, 여러 워커 스레드에서 호출됨)"""
+
+    def __init__(self, state_path=None, max_bytes_per_check=8 * 1024 * 1024, save_interval=30):
+        self.state_path = state_path
+        self.max_bytes_per_check = max_bytes_per_check  # 1회 점검에서 파일 1개당 읽는 최대 크기 (나머지는 다음 점검에)
+        self.save_interval = save_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._cursors = {}  # 'server\twatch' -> {파일 경로: {'offset', 'fingerprint'}}
+        self._patterns = {}  # 정규식 문자열 -> 컴파일된 bytes 정규식
+        self._sftp_clients = {}  # SSH transport -> SFTP 세션
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+        self._load_state()
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        settings = default_settings.get('log_tail') or {}
+        return cls(
+            state_path=settings.get('state_path') or os.path.join(default_settings.get('results_dir', 'results'),
+                                                                  'log_offsets.json'),
+            max_bytes_per_check=settings.get('max_bytes_per_check', 8 * 1024 * 1024),
+        )
+
+    def collect(self, ssh, server, deadline=None, timeout=30):
+        """서버의 log_watches 전체 수집 -> {watch 이름: 새로 추가된 줄 수 (문자열)}"""
+        sftp = self._sftp(ssh, timeout)
+        results = {}
+        for watch in server.get('log_watches') or []:
+            key = f"{server['name']}\t{watch['name']}"
+            with self._lock:
+                cursors = self._cursors.get(key)
+                first_run = cursors is None
+                cursors = dict(cursors or {})
+            matcher = self._pattern(watch.get('pattern'))
+            count = 0
+            paths = self._expand(sftp, watch['path'])
+            for path, attrs in paths.items():
+                count += self._read_new(sftp, path, attrs, cursors, matcher, first_run, deadline)
+            # 사라진 파일의 커서는 정리
+            cursors = {path: cursor for path, cursor in cursors.items() if path in paths}
+            with self._lock:
+                self._cursors[key] = cursors
+            results[watch['name']] = str(count)
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save_state()
+        return results
+
+    def forget(self, server_name):
+        """서버 설정이 삭제된 경우 커서 제거"""
+        with self._lock:
+            for key in [key for key in self._cursors if key.split('\t', 1)[0] == server_name]:
+                del self._cursors[key]
+
+    def _sftp(self, ssh, timeout):
+        transport = ssh.get_transport()
+        with self._lock:
+            # 풀에서 닫힌 연결의 세션 정리
+            for closed in [t for t in self._sftp_clients if not t.is_active()]:
+                del self._sftp_clients[closed]
+            sftp = self._sftp_clients.get(transport)
+        if sftp is not None and not sftp.get_channel().closed:
+            return sftp
+        sftp = ssh.open_sftp()
+        sftp.get_channel().settimeout(timeout)
+        with self._lock:
+            self._sftp_clients[transport] = sftp
+        return sftp
+
+    def _pattern(self, pattern):
+        if not pattern:
+            return None
+        compiled = self._patterns.get(pattern)
+        if compiled is None:
+            compiled = self._patterns[pattern] = re.compile(pattern.encode('utf-8'))
+        return compiled
+
+    def _expand(self, sftp, path):
+        """경로의 파일명 glob 패턴 전개 -> {파일 경로: SFTPAttributes}"""
+        directory, name = posixpath.split(path)
+        if not any(ch in name for ch in '*?['):
+            try:
+                return {path: sftp.stat(path)}
+            except FileNotFoundError:
+                return {}
+        try:
+            entries = sftp.listdir_attr(directory or '.')
+        except FileNotFoundError:
+            return {}
+        return {
+            posixpath.join(directory, entry.filename): entry
+            for entry in entries
+            if fnmatch.fnmatchcase(entry.filename, name) and stat.S_ISREG(entry.st_mode or 0)
+        }
+
+    def _read_new(self, sftp, path, attrs, cursors, matcher, first_run, deadline):
+        """파일 1개의 새로 추가된 부분을 읽어 줄 수 반환 (cursors 갱신)"""
+        size = attrs.st_size or 0
+        cursor = cursors.get(path)
+        if cursor is None:
+            # 첫 실행이면 현재 끝에서 시작, 이후 새로 생긴 파일은 처음부터
+            cursors[path] = {'offset': size if first_run else 0, 'fingerprint': ''}
+            if first_run:
+                cursors[path]['fingerprint'] = self._fingerprint(sftp, path, size)
+                return 0
+            cursor = cursors[path]
+
+        count = 0
+        with sftp.open(path, 'rb') as f:
+            head = self._read_head(f, size)
+            if cursor['offset'] > size or not head.startswith(bytes.fromhex(cursor['fingerprint'])):
+                # 로테이션 또는 truncate: 이전 파일(<path>.1)의 남은 부분을 읽고 처음부터 다시 시작
+                self.logger.info(f"Log file rotated: {path}")
+                count += self._read_rotated(sftp, path, cursor, matcher, deadline)
+                cursor['offset'] = 0
+                cursor.pop('midline', None)
+            cursor['fingerprint'] = head.hex()
+            f.seek(cursor['offset'])
+            lines, cursor['offset'], midline = self._count(f, cursor['offset'], size, matcher, deadline,
+                                                           cursor.get('midline', False))
+            if midline:
+                cursor['midline'] = True
+            else:
+                cursor.pop('midline', None)
+            count += lines
+        return count
+
+    def _read_rotated(self, sftp, path, cursor, matcher, deadline):
+        rotated_path = path + '.1'
+        try:
+            rotated_size = sftp.stat(rotated_path).st_size or 0
+            with sftp.open(rotated_path, 'rb') as f:
+                head = self._read_head(f, rotated_size)
+                if not head.startswith(bytes.fromhex(cursor['fingerprint'])) or rotated_size < cursor['offset']:
+                    return 0
+                f.seek(cursor['offset'])
+                return self._count(f, cursor['offset'], rotated_size, matcher, deadline,
+                                   cursor.get('midline', False))[0]
+        except FileNotFoundError:
+            return 0
+
+    def _count(self, f, offset, size, matcher, deadline, midline=False):
+        """offset 부터 size 까지 완성된 줄만 세기 -> (줄 수, 마지막 줄바꿈 다음 위치, 줄 중간에서 끝났는지)
+
+        midline 이면 offset 이 이미 센 긴 줄의 중간이므로 첫 줄바꿈까지는 세지 않고 건너뛴다.
+        max_bytes_per_check 안에 줄바꿈이 없으면 (아주 긴 줄) 읽은 부분까지를 잘린 1줄로 세고 넘어간다.
+        """
+        end = min(size, offset + self.max_bytes_per_check)
+        count = 0
+        partial = b''
+        position = offset
+        while position < end:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            chunk = f.read(min(READ_SIZE, end - position))
+            if not chunk:
+                break
+            position += len(chunk)
+            data = partial + chunk
+            if midline:
+                first_newline = data.find(b'\n')
+                if first_newline < 0:
+                    partial = b''
+                    continue
+                data, midline = data[first_newline + 1:], False
+            last_newline = data.rfind(b'\n')
+            if last_newline < 0:
+                partial = data
+                continue
+            complete, partial = data[:last_newline + 1], data[last_newline + 1:]
+            if matcher is None:
+                count += complete.count(b'\n')
+            else:
+                count += sum(1 for line in complete.splitlines() if matcher.search(line))
+        if partial and len(partial) >= self.max_bytes_per_check:
+            # 줄바꿈 없이 1회 최대 크기를 다 채운 경우 같은 위치에 멈춰 있지 않도록 잘린 1줄로 처리
+            if matcher is None or matcher.search(partial):
+                count += 1
+            return count, position, True
+        # 줄바꿈으로 끝나지 않은 마지막 줄은 다음 점검에서 다시 읽음
+        return count, position - len(partial), midline
+
+    def _read_head(self, f, size):
+        f.seek(0)
+        return f.read(min(FINGERPRINT_SIZE, size))
+
+    def _fingerprint(self, sftp, path, size):
+        with sftp.open(path, 'rb') as f:
+            return self._read_head(f, size).hex()
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                self._cursors = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Failed to load log offsets : {str(e)}")
+
+    def close(self):
+        """열린 SFTP 세션을 닫고 오프셋 저장 (점검 종료 시, SSH 연결을 닫기 전에 호출)"""
+        with self._lock:
+            clients = list(self._sftp_clients.values())
+            self._sftp_clients.clear()
+        for sftp in clients:
+            try:
+                sftp.close()
+            except Exception as e:
+                self.logger.error(f"Error closing sftp session : {str(e)}")
+        self.save_state()
+
+    def save_state(self):
+        """오프셋 저장 (재시작 후 이어서 읽기)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            data = json.dumps(self._cursors, ensure_ascii=False)
+            self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            self.logger.error(f"Failed to save log offsets : {str(e)}")
@@ -0,0 +1,178 @@
+"""/proc 기반 경량 시스템 메트릭 수집
+
+top/free/df/awk 파이프라인 대신 /proc/stat, /proc/meminfo, /proc/loadavg, /proc/uptime 와
+루트 파일시스템 statvfs 정보를 하나의 원격 스크립트로 읽는다.
+파일 읽기는 셸 내장 read 로 처리하므로 원격 서버에서는 stat 1개 프로세스만 생성된다.
+
+CPU 사용률은 같은 서버의 직전 점검 /proc/stat 값과의 차이로 계산한다.
+직전 값이 없거나 오래된 경우에는 스크립트 안에서 짧은 간격으로 두 번 읽어 계산한다.
+"""
+import threading
+import time
+
+# 섹션 구분자 (/proc 파일 내용에는 나오지 않는 문자열)
+SECTION_PREFIX = '@@proc:'
+
+_READ_FILE = (
+    'shm_read(){{ echo "{prefix}$1"; while IFS= read -r l || [ -n "$l" ]; do echo "$l"; done < "$2"; }}\n'
+    'shm_cpu(){{ echo "{prefix}$1"; while IFS= read -r l; do case $l in cpu*) echo "$l";; *) break;; esac; '
+    'done < /proc/stat; }}\n'
+).format(prefix=SECTION_PREFIX)
+
+_SCRIPT = (
+    _READ_FILE
+    + 'shm_cpu stat\n'
+    + 'shm_read meminfo /proc/meminfo\n'
+    + 'shm_read loadavg /proc/loadavg\n'
+    + 'shm_read uptime /proc/uptime\n'
+    + f'echo "{SECTION_PREFIX}statfs"; stat -f -c "%S %b %f %a" /\n'
+)
+
+# 직전 샘플이 없을 때 스크립트 안에서 CPU 를 두 번 읽는 간격(초)
+_SAMPLE_INTERVAL = 0.5
+
+
+class ProcMetricsCollector:
+    """서버별 직전 /proc/stat 샘플을 보관하며 원격 스크립트 생성과 결과 파싱을 담당"""
+
+    def __init__(self, max_sample_age=900):
+        self.max_sample_age = max_sample_age  # 이보다 오래된 직전 샘플은 CPU 계산에 사용하지 않음(초)
+        self._cpu_samples = {}  # 서버이름 -> (수집 시각, (전체 jiffies, idle jiffies))
+        self._lock = threading.Lock()
+
+    def build_command(self, server_name):
+        """원격에서 실행할 메트릭 수집 스크립트"""
+        if self._fresh_sample(server_name) is not None:
+            return _SCRIPT
+        # 직전 샘플이 없으면 짧은 간격으로 /proc/stat 을 한 번 더 읽음
+        return _SCRIPT + f'sleep {_SAMPLE_INTERVAL}\nshm_cpu stat2\n'
+
+    def parse(self, server_name, output):
+        """수집 스크립트 출력을 숫자 메트릭 dict 로 변환
+
+        반환값 단위: cpu/memory/disk 는 %, load_* 는 1/5/15분 부하, uptime_seconds 는 초
+        """
+        sections = _split_sections(output)
+        missing = [name for name in ('stat', 'meminfo', 'loadavg', 'uptime', 'statfs') if name not in sections]
+        if missing:
+            raise ValueError(f"/proc collection incomplete, missing: {', '.join(missing)}")
+
+        now = time.monotonic()
+        totals, cores = _parse_cpu(sections['stat'])
+        if 'stat2' in sections:
+            previous = totals
+            totals, _ = _parse_cpu(sections['stat2'])
+        else:
+            previous = self._fresh_sample(server_name)
+        with self._lock:
+            self._cpu_samples[server_name] = (now, totals)
+
+        load_1, load_5, load_15 = (float(value) for value in sections['loadavg'][0].split()[:3])
+        uptime_seconds = float(sections['uptime'][0].split()[0])
+
+        return {
+            'cpu': _cpu_percent(previous, totals),
+            'memory': _memory_percent(sections['meminfo']),
+            'disk': _disk_percent(sections['statfs']),
+            'load_avg': f'{load_1:.2f} {load_5:.2f} {load_15:.2f}',
+            'uptime': format_uptime(uptime_seconds),
+            'cpu_cores': cores,
+            'load_1': load_1,
+            'load_5': load_5,
+            'load_15': load_15,
+            'uptime_seconds': uptime_seconds,
+        }
+
+    def forget(self, server_name):
+        with self._lock:
+            self._cpu_samples.pop(server_name, None)
+
+    def _fresh_sample(self, server_name):
+        with self._lock:
+            sample = self._cpu_samples.get(server_name)
+        if sample is None or time.monotonic() - sample[0] > self.max_sample_age:
+            return None
+        return sample[1]
+
+
+def format_uptime(seconds):
+    """uptime -p 와 같은 형식의 가동 시간 문자열"""
+    minutes = int(seconds // 60)
+    days, minutes = divmod(minutes, 60 * 24)
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if days:
+        parts.append(f"{days} day{'s' if days != 1 else ''}")
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if minutes or not parts:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return 'up ' + ', '.join(parts)
+
+
+def _split_sections(output):
+    sections = {}
+    current = None
+    for line in output.splitlines():
+        if line.startswith(SECTION_PREFIX):
+            current = line[len(SECTION_PREFIX):].strip()
+            sections[current] = []
+        elif current is not None and line.strip():
+            sections[current].append(line)
+    return {name: lines for name, lines in sections.items() if lines}
+
+
+def _parse_cpu(lines):
+    """/proc/stat cpu 라인 -> ((전체 jiffies, idle jiffies), 코어 수)"""
+    totals = None
+    cores = 0
+    for line in lines:
+        fields = line.split()
+        if fields[0] == 'cpu':
+            # user nice system idle iowait irq softirq steal (guest 는 user 에 포함되어 있어 제외)
+            values = [int(value) for value in fields[1:9]]
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            totals = (sum(values), idle)
+        else:
+            cores += 1
+    if totals is None:
+        raise ValueError('/proc/stat has no aggregate cpu line')
+    return totals, max(cores, 1)
+
+
+def _cpu_percent(previous, current):
+    if previous is None:
+        # 비교할 샘플이 없으면 부팅 이후 평균 사용률
+        total, idle = current
+    else:
+        total = current[0] - previous[0]
+        idle = current[1] - previous[1]
+    if total <= 0:
+        return 0.0
+    return round(max(0.0, min(100.0, (total - idle) * 100.0 / total)), 1)
+
+
+def _memory_percent(lines):
+    meminfo = {}
+    for line in lines:
+        key, _, value = line.partition(':')
+        fields = value.split()
+        if fields:
+            meminfo[key] = int(fields[0])
+    total = meminfo['MemTotal']
+    available = meminfo.get('MemAvailable')
+    if available is None:
+        # 구형 커널 (3.14 이전)
+        available = meminfo.get('MemFree', 0) + meminfo.get('Buffers', 0) + meminfo.get('Cached', 0)
+    if total <= 0:
+        return 0.0
+    return round((total - available) * 100.0 / total, 2)
+
+
+def _disk_percent(lines):
+    """statvfs (block size, blocks, free, available) -> df 와 같은 방식의 사용률"""
+    _, blocks, free, available = (int(value) for value in lines[0].split()[:4])
+    used = blocks - free
+    if used + available <= 0:
+        return 0.0
+    return round(used * 100.0 / (used + available), 1)
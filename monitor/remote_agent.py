@@ -0,0 +1,314 @@
+"""원격 수집 에이전트 (점검 대상 서버에서 실행되는 스크립트)
+
+monitor.agent 가 SFTP 로 서버에 올리고 (파일 이름에 버전/체크섬 포함) 점검마다 pull 로 실행한다.
+- pull 시 샘플러가 없으면 백그라운드로 시작 (sample_interval 초마다 /proc 을 읽어 samples 파일에 1줄 추가)
+- pull 은 직전 pull 이후 쌓인 샘플을 min/avg/max/last 로 집계하고 samples 파일을 비움
+  (pull 도중 측정된 샘플은 다음 pull 에 포함, 샘플이 없으면(샘플러를 방금 시작한 경우 등) 직접 1회 측정해 n=1)
+- 개별 명령어/서비스 상태는 pull 시점에 확인하고, 직전에 보낸 값과 달라진 항목만 전송
+  (서비스 프로세스 수는 ps/grep 대신 /proc/*/cmdline 을 직접 읽음)
+- idle_exit 초 동안 pull 이 없으면 샘플러는 스스로 종료
+
+구버전 python3 에서도 동작하도록 f-string 등 3.6 이후 문법과 외부 패키지를 사용하지 않는다.
+
+    python3 shm_agent_<버전>_<체크섬>.py pull <sha256> <sample_interval> <idle_exit> <base64 JSON 요청>
+
+출력: "@@agent ok <JSON>" 또는 "@@agent checksum <실제 sha256>"
+"""
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+AGENT_VERSION = 1
+PREFIX = '@@agent'
+METRICS = ('cpu', 'memory', 'disk', 'load_1')  # 샘플 줄의 값 순서 (시각 다음)
+
+
+def read_cpu():
+    """/proc/stat -> ((전체 jiffies, idle jiffies), 코어 수)"""
+    totals = None
+    cores = 0
+    with open('/proc/stat') as f:
+        for line in f:
+            if not line.startswith('cpu'):
+                break
+            fields = line.split()
+            if fields[0] == 'cpu':
+                values = [int(value) for value in fields[1:9]]
+                totals = (sum(values), values[3] + (values[4] if len(values) > 4 else 0))
+            else:
+                cores += 1
+    return totals, max(cores, 1)
+
+
+def cpu_percent(previous, current):
+    total = current[0] - previous[0]
+    idle = current[1] - previous[1]
+    if total <= 0:
+        return 0.0
+    return max(0.0, min(100.0, (total - idle) * 100.0 / total))
+
+
+def memory_percent():
+    meminfo = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            fields = value.split()
+            if fields:
+                meminfo[key] = int(fields[0])
+    total = meminfo.get('MemTotal', 0)
+    available = meminfo.get('MemAvailable')
+    if available is None:
+        available = meminfo.get('MemFree', 0) + meminfo.get('Buffers', 0) + meminfo.get('Cached', 0)
+    return (total - available) * 100.0 / total if total > 0 else 0.0
+
+
+def disk_percent():
+    st = os.statvfs('/')
+    used = st.f_blocks - st.f_bfree
+    if used + st.f_bavail <= 0:
+        return 0.0
+    return used * 100.0 / (used + st.f_bavail)
+
+
+def read_loadavg():
+    with open('/proc/loadavg') as f:
+        return [float(value) for value in f.read().split()[:3]]
+
+
+def read_uptime():
+    with open('/proc/uptime') as f:
+        return float(f.read().split()[0])
+
+
+def run(args, timeout, shell=False):
+    """명령 실행 후 표준출력 반환 (시간 초과 시 None)"""
+    # 시간 초과 시 하위 프로세스까지 종료하도록 별도 프로세스 그룹으로 실행
+    process = subprocess.Popen(args, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        output = process.communicate(timeout=timeout)[0]
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(process.pid, 9)
+        except OSError:
+            pass
+        process.communicate()
+        return None
+    return output.decode('utf-8', 'replace').strip()
+
+
+class Agent:
+    def __init__(self, path, interval, idle_exit):
+        self.path = os.path.abspath(path)
+        self.directory = os.path.dirname(self.path)
+        self.interval = interval
+        self.idle_exit = idle_exit
+        self.samples_path = os.path.join(self.directory, 'samples')
+        self.lock_path = os.path.join(self.directory, 'samples.lock')  # 샘플 추가/가져오기 상호 배제
+        self.pid_path = os.path.join(self.directory, 'sampler.pid')
+        self.stamp_path = os.path.join(self.directory, 'pulled')
+        self.sent_path = os.path.join(self.directory, 'sent.json')
+
+    # 샘플러 (백그라운드)
+
+    def sample_loop(self):
+        with open(self.pid_path, 'w') as f:
+            f.write(str(os.getpid()))
+        previous = None
+        try:
+            while time.time() - self._pulled_at() < self.idle_exit:
+                totals, _ = read_cpu()
+                if previous is not None:
+                    line = '%d %.1f %.2f %.1f %.2f\n' % (time.time(), cpu_percent(previous, totals),
+                                                         memory_percent(), disk_percent(), read_loadavg()[0])
+                    with open(self.lock_path, 'a') as lock:
+                        fcntl.flock(lock, fcntl.LOCK_EX)
+                        with open(self.samples_path, 'a') as f:
+                            f.write(line)
+                previous = totals
+                time.sleep(self.interval)
+        finally:
+            if self._sampler_pid() == os.getpid():
+                os.unlink(self.pid_path)
+
+    def ensure_sampler(self):
+        """이 버전의 샘플러가 실행중이 아니면 시작 (다른 버전 샘플러는 종료)"""
+        pid = self._sampler_pid()
+        if pid is not None:
+            try:
+                with open('/proc/%d/cmdline' % pid, 'rb') as f:
+                    cmdline = f.read()
+            except (IOError, OSError):
+                cmdline = b''
+            if os.path.basename(self.path).encode() in cmdline:
+                return False
+            if cmdline:
+                try:
+                    os.kill(pid, 15)
+                except OSError:
+                    pass
+        devnull = open(os.devnull, 'r+b')
+        # SSH 채널이 닫혀도 계속 실행되도록 새 세션으로 분리하고 표준입출력은 닫음
+        subprocess.Popen([sys.executable, self.path, 'sample', str(self.interval), str(self.idle_exit)],
+                         stdin=devnull, stdout=devnull, stderr=devnull, close_fds=True, preexec_fn=os.setsid,
+                         cwd=self.directory)
+        return True
+
+    # pull
+
+    def pull(self, request):
+        self._touch()
+        started = self.ensure_sampler()
+        samples = self._drain()
+        if not samples:
+            # 샘플러가 방금 시작됐거나 샘플이 없으면 짧은 간격으로 직접 1회 측정
+            previous, _ = read_cpu()
+            time.sleep(0.5)
+            totals, _ = read_cpu()
+            samples = [[time.time(), cpu_percent(previous, totals), memory_percent(), disk_percent(),
+                        read_loadavg()[0]]]
+
+        payload = {'v': AGENT_VERSION, 'n': len(samples), 'started': started,
+                   'span': round(samples[-1][0] - samples[0][0], 1)}
+        for idx, metric in enumerate(METRICS, start=1):
+            values = [sample[idx] for sample in samples]
+            payload[metric] = [round(min(values), 2), round(sum(values) / len(values), 2), round(max(values), 2),
+                               round(values[-1], 2)]
+        payload['load'] = read_loadavg()
+        payload['uptime'] = read_uptime()
+        payload['cores'] = read_cpu()[1]
+
+        current = {'cmd': self._run_commands(request.get('commands') or {}, request.get('timeout', 30)),
+                   'svc': self._service_states(request.get('services') or [], request.get('timeout', 30))}
+        sent = self._load_sent()
+        full = request.get('base') != sent.get('gen')
+        for key, values in current.items():
+            previous = {} if full else sent.get(key) or {}
+            payload[key] = dict((name, value) for name, value in values.items() if previous.get(name) != value)
+        payload['gen'] = (sent.get('gen') or 0) + 1
+        payload['full'] = full
+        current['gen'] = payload['gen']
+        self._save_sent(current)
+        return payload
+
+    def _run_commands(self, commands, timeout):
+        outputs = {}
+        for name, cmd in commands.items():
+            output = run(cmd, timeout, shell=True)
+            outputs[name] = 'TIMEOUT' if output is None else output
+        return outputs
+
+    def _service_states(self, services, timeout):
+        """서비스 이름 -> [systemctl is-active 결과, 이름 패턴과 일치하는 프로세스 수]"""
+        if not services:
+            return {}
+        cmdlines = []
+        own = set([os.getpid(), os.getppid(), self._sampler_pid()])
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit() or int(entry) in own:
+                continue
+            try:
+                with open('/proc/%s/cmdline' % entry, 'rb') as f:
+                    cmdline = f.read().replace(b'\0', b' ').decode('utf-8', 'replace').strip()
+            except (IOError, OSError):
+                continue
+            if cmdline:
+                cmdlines.append(cmdline)
+        states = {}
+        for name in services:
+            # systemd/dbus 가 응답하지 않아도 pull 전체가 멈추지 않도록 제한 시간 적용
+            try:
+                status = run(['systemctl', 'is-active', name], timeout)
+            except OSError:
+                status = ''
+            if status is None:
+                status = 'TIMEOUT'
+            try:
+                pattern = re.compile(name)
+                count = sum(1 for cmdline in cmdlines if pattern.search(cmdline))
+            except re.error:
+                count = sum(1 for cmdline in cmdlines if name in cmdline)
+            states[name] = [status, str(count)]
+        return states
+
+    def _drain(self):
+        """샘플 파일을 가져와 비움 -> [[시각, cpu, memory, disk, load_1]]
+
+        고정된 잠금 파일로 샘플러의 추가와 배타적으로 처리하므로 pull 도중 측정된 샘플은 다음 pull 에 포함된다.
+        """
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.samples_path) as f:
+                    lines = f.readlines()
+            except (IOError, OSError):
+                return []
+            os.unlink(self.samples_path)
+        samples = []
+        for line in lines:
+            try:
+                samples.append([float(value) for value in line.split()])
+            except ValueError:
+                continue
+        return [sample for sample in samples if len(sample) == len(METRICS) + 1]
+
+    def _touch(self):
+        with open(self.stamp_path, 'w'):
+            pass
+
+    def _pulled_at(self):
+        try:
+            return os.path.getmtime(self.stamp_path)
+        except OSError:
+            return 0
+
+    def _sampler_pid(self):
+        try:
+            with open(self.pid_path) as f:
+                return int(f.read().strip())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _load_sent(self):
+        try:
+            with open(self.sent_path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _save_sent(self, sent):
+        tmp_path = self.sent_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(sent, f)
+        os.rename(tmp_path, self.sent_path)
+
+
+def checksum(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def main(argv):
+    if argv[1] == 'sample':
+        Agent(argv[0], float(argv[2]), float(argv[3])).sample_loop()
+        return 0
+    expected, interval, idle_exit, request = argv[2], float(argv[3]), float(argv[4]), argv[5]
+    actual = checksum(argv[0])
+    if actual != expected:
+        print('%s checksum %s' % (PREFIX, actual))
+        return 0
+    request = json.loads(base64.b64decode(request).decode('utf-8'))
+    payload = Agent(argv[0], interval, idle_exit).pull(request)
+    print('%s ok %s' % (PREFIX, json.dumps(payload, separators=(',', ':'))))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,166 @@
+"""임계값 규칙 엔진
+
+설정 로드 시 서버별로 기본값/공통 임계값/서버 임계값을 병합해 규칙 목록으로 미리 컴파일하고,
+점검 시에는 컴파일된 규칙 목록을 순서대로 비교만 한다.
+
+servers.yaml thresholds 형식:
+    cpu: 80                               # 경고 기준만 지정
+    memory: {warning: 85, critical: 95}   # 경고/위험 기준
+    loadavg_warning: 0.7                  # CPU 코어당 1분 부하 평균 기준
+    loadavg_critical: 0.9
+    commands:                             # 숫자를 출력하는 개별 명령어 기준
+      alerts_count: {warning: 1000, critical: 5000}
+"""
+import math
+from collections import namedtuple
+
+LEVEL_OK = 0
+LEVEL_WARNING = 1
+LEVEL_CRITICAL = 2
+LEVEL_NAMES = {LEVEL_OK: 'ok', LEVEL_WARNING: 'warning', LEVEL_CRITICAL: 'critical'}
+
+# 설정이 없을 때 사용하는 기본 경고 기준 (%)
+DEFAULT_THRESHOLDS = {'cpu': 80, 'memory': 85, 'disk': 90}
+
+# 기본 메트릭 -> 표시 이름
+METRIC_LABELS = {'cpu': 'CPU', 'memory': 'Memory', 'disk': 'Disk', 'load_per_core': 'Load'}
+
+Rule = namedtuple('Rule', 'metric label warning critical')
+Breach = namedtuple('Breach', 'metric label level value threshold')
+
+_NO_LIMIT = math.inf
+
+
+def _parse_level(value, where):
+    """임계값 1개 -> float (None 이면 기준 없음)"""
+    if value is None:
+        return _NO_LIMIT
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid threshold {where}: {value!r}') from None
+
+
+def _merge_level(base, override):
+    """스칼라는 경고 기준, dict 는 warning/critical 개별 재정의"""
+    merged = dict(base)
+    if isinstance(override, dict):
+        unknown = set(override) - {'warning', 'critical'}
+        if unknown:
+            raise ValueError(f"Unknown threshold level: {', '.join(sorted(unknown))}")
+        merged.update(override)
+    else:
+        merged['warning'] = override
+    return merged
+
+
+def compile_rules(default_thresholds, server_thresholds, server_name=''):
+    """기본값 <- 공통 임계값 <- 서버 임계값 순으로 병합한 규칙 목록"""
+    levels = {metric: {'warning': value} for metric, value in DEFAULT_THRESHOLDS.items()}
+    command_levels = {}
+    server = f' for server {server_name!r}' if server_name else ''
+    for thresholds in (default_thresholds or {}, server_thresholds or {}):
+        for key, value in thresholds.items():
+            if key in ('cpu', 'memory', 'disk'):
+                levels[key] = _merge_level(levels.get(key, {}), value)
+            elif key in ('loadavg_warning', 'loadavg_critical'):
+                levels.setdefault('load_per_core', {})[key.split('_')[1]] = value
+            elif key == 'commands':
+                for cmd_name, cmd_value in (value or {}).items():
+                    command_levels[cmd_name] = _merge_level(command_levels.get(cmd_name, {}), cmd_value)
+            else:
+                raise ValueError(f'Unknown threshold {key!r}{server}')
+
+    rules = []
+    for metric, level in list(levels.items()) + [(f'cmd.{name}', level) for name, level in command_levels.items()]:
+        where = f'{metric}{server}'
+        warning = _parse_level(level.get('warning'), where)
+        critical = _parse_level(level.get('critical'), where)
+        if warning is _NO_LIMIT and critical is _NO_LIMIT:
+            continue
+        label = METRIC_LABELS.get(metric, metric[4:] if metric.startswith('cmd.') else metric)
+        rules.append(Rule(metric, label, warning, critical))
+    return rules
+
+
+def metric_value(results, metric):
+    """규칙 평가에 사용할 값 (숫자가 아니면 NaN -> 어떤 기준도 넘지 않음)"""
+    try:
+        if metric == 'load_per_core':
+            return float(results['load_1']) / max(int(results.get('cpu_cores') or 1), 1)
+        if metric.startswith('cmd.'):
+            return float(results[metric[4:]])
+        return float(results[metric])
+    except (KeyError, TypeError, ValueError):
+        return math.nan
+
+
+class RuleEngine:
+    """서버별로 컴파일된 임계값 규칙 평가"""
+
+    def __init__(self, config):
+        default_thresholds = config['default_settings'].get('thresholds') or {}
+        self.rules = {
+            server['name']: compile_rules(default_thresholds, server.get('thresholds'), server['name'])
+            for server in config['servers']
+        }
+        self._default_rules = compile_rules(default_thresholds, None)
+
+    def rules_for(self, server_name):
+        return self.rules.get(server_name, self._default_rules)
+
+    def evaluate(self, server_name, results):
+        """서버 1대 결과 평가 -> 기준을 넘은 항목 목록"""
+        return self.evaluate_many([(server_name, results)])[server_name]
+
+    def evaluate_many(self, items):
+        """여러 서버 결과를 한 번에 평가 -> {서버이름: [Breach, ...]}
+
+        items: [(서버이름, 결과), ...]
+        서버별로 컴파일된 규칙을 순서대로 비교한다 (값이 없는 항목은 nan 이므로 기준을 넘지 않음).
+        """
+        breaches = {}
+        for server_name, results in items:
+            exceeded = breaches[server_name] = []
+            for rule in self.rules_for(server_name):
+                value = metric_value(results, rule.metric)
+                if value > rule.critical:
+                    level, threshold = LEVEL_CRITICAL, rule.critical
+                elif value > rule.warning:
+                    level, threshold = LEVEL_WARNING, rule.warning
+                else:
+                    continue
+                exceeded.append(Breach(rule.metric, rule.label, level, value, threshold))
+        return breaches
+
+    def max_ratio(self, server_name, results):
+        """경고 기준에 가장 가까운 항목의 값/기준 비율 (점검 주기 조정용, 비교할 값이 없으면 0)"""
+        ratio = 0.0
+        for rule in self.rules_for(server_name):
+            threshold = rule.warning if math.isfinite(rule.warning) else rule.critical
+            value = metric_value(results, rule.metric)
+            if math.isfinite(threshold) and threshold > 0 and not math.isnan(value):
+                ratio = max(ratio, value / threshold)
+        return ratio
+
+
+def max_level(breaches):
+    """기준을 넘은 항목 중 가장 높은 단계"""
+    return max((breach.level for breach in breaches), default=LEVEL_OK)
+
+
+def describe(breach):
+    """보고서/로그용 설명 문자열"""
+    return (f"{breach.label} exceeds {LEVEL_NAMES[breach.level]} threshold "
+            f"({breach.value:g} > {breach.threshold:g})")
+
+
+def breach_to_dict(breach):
+    """JSON 출력용 dict"""
+    return {
+        'metric': breach.metric,
+        'label': breach.label,
+        'level': LEVEL_NAMES[breach.level],
+        'value': breach.value,
+        'threshold': breach.threshold,
+    }
@@ -0,0 +1,107 @@
+"""서버별 주기 점검 스케줄러
+
+서버마다 점검 주기(interval)를 따로 두고, 가장 먼저 점검할 서버부터 꺼낼 수 있도록
+heap 으로 다음 점검 시각을 관리한다.
+- 최초 점검 시각은 start_jitter 범위 내에서 무작위로 분산 (수백대가 동시에 접속하지 않도록)
+- 다음 점검 시각은 이전 예정 시각 + interval (고정 주기), 이미 지난 회차는 건너뜀
+- 설정 재로드 시 서버 추가/삭제/주기 변경 가능 (삭제된 서버의 heap 항목은 꺼낼 때 버림)
+- 점검 결과에 따라 다음 1회의 점검 시각만 조정 가능 (reschedule, 실패 backoff/주기 자동 조정용)
+"""
+import heapq
+import itertools
+import random
+import time
+
+
+class PollScheduler:
+    """서버별 interval 기반 점검 스케줄러 (스레드 안전하지 않음, 단일 스레드에서 사용)"""
+
+    def __init__(self, servers, default_interval=300, start_jitter=30, clock=time.monotonic):
+        self.clock = clock
+        self.default_interval = default_interval
+        self.start_jitter = start_jitter
+        self.intervals = {}  # 서버이름 -> 점검 주기(초)
+        self._heap = []  # (다음 점검 시각, 순번, 서버이름)
+        self._seq = itertools.count()
+        self._entries = {}  # 서버이름 -> heap 에 있는 유효한 항목의 순번
+        self._next_at = {}  # 서버이름 -> 예약된 다음 점검 시각
+        self._last_at = {}  # 서버이름 -> 마지막으로 꺼낸 회차의 예정 시각
+        self.skipped = {}  # 서버이름 -> 건너뛴 회차 수
+
+        for server in servers:
+            self.add(server)
+
+    def add(self, server):
+        """서버 추가 (최초 점검 시각은 start_jitter 범위 내 무작위)"""
+        interval = float(server.get('interval', self.default_interval))
+        if interval <= 0:
+            raise ValueError(f"Invalid interval for server {server['name']}: {interval}")
+        self.intervals[server['name']] = interval
+        self.skipped[server['name']] = 0
+        offset = random.uniform(0, min(self.start_jitter, interval)) if self.start_jitter else 0
+        self._push(self.clock() + offset, server['name'])
+
+    def remove(self, name):
+        """서버 삭제"""
+        self.intervals.pop(name, None)
+        self.skipped.pop(name, None)
+        self._entries.pop(name, None)
+        self._next_at.pop(name, None)
+        self._last_at.pop(name, None)
+
+    def set_interval(self, name, interval):
+        """점검 주기 변경 (이미 예약된 다음 점검 이후부터 적용)"""
+        interval = float(interval)
+        if interval <= 0:
+            raise ValueError(f"Invalid interval for server {name}: {interval}")
+        self.intervals[name] = interval
+
+    def reschedule(self, name, interval):
+        """다음 점검을 마지막 회차 예정 시각 + interval 로 변경 (이후 회차는 다시 설정된 주기로 계산)"""
+        last_at = self._last_at.get(name)
+        if last_at is None or name not in self.intervals:
+            return
+        next_at = max(last_at + interval, self.clock())
+        if next_at != self._next_at.get(name):
+            self._push(next_at, name)
+
+    def _push(self, at, name):
+        seq = next(self._seq)
+        self._entries[name] = seq
+        self._next_at[name] = at
+        heapq.heappush(self._heap, (at, seq, name))
+
+    def _discard_stale(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def time_until_next(self):
+        """다음 점검까지 남은 시간(초), 예약된 서버가 없으면 None"""
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    def pop_due(self):
+        """점검 시각이 된 서버 이름 목록을 반환하고 각 서버의 다음 회차를 예약"""
+        now = self.clock()
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            scheduled_at, _, name = heapq.heappop(self._heap)
+            due.append(name)
+            self._last_at[name] = scheduled_at
+            interval = self.intervals[name]
+            next_at = scheduled_at + interval
+            if next_at <= now:
+                # 점검이 밀려 이미 지난 회차는 몰아서 실행하지 않고 건너뜀
+                missed = int((now - next_at) // interval) + 1
+                self.skipped[name] += missed
+                next_at += missed * interval
+            self._push(next_at, name)
+            self._discard_stale()
+        return due
+
+    def mark_skipped(self, name):
+        """이전 점검이 아직 진행중이라 이번 회차를 건너뛴 경우 기록"""
+        self.skipped[name] += 1
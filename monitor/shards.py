@@ -0,0 +1,356 @@
+"""다중 프로세스 샤드 수집
+
+서버 수천 대를 한 PC 에서 점검할 때 paramiko 의 암호화/패킷 처리가 프로세스 하나의 GIL 에 묶이지 않도록
+서버 목록을 여러 수집 프로세스(shard)에 나눠 점검한다. (default_settings.shards 또는 CLI --shards)
+- 서버는 이름 해시로 shard 에 고정 배정 (SSH 연결, CPU 사용률 샘플, 로그 오프셋이 같은 프로세스에 유지됨)
+- shard 는 자체 SSH 연결 풀과 스레드 풀(max_workers / shards)로 SSH 수집만 수행
+- 수집 결과, 단계별 소요 시간, 로그는 shard 별 파이프로 부모 프로세스에 전달되고
+  임계값 확인, 알림, 결과 기록, 화면 갱신은 부모 프로세스의 엔진이 기존과 같이 처리
+- shard 프로세스가 비정상 종료되면 점검중이던 서버만 오류로 처리하고, 새 프로세스를 띄워
+  대기중이던 서버를 다시 배정 (shard 당 MAX_RESTARTS 회까지)
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import QueueHandler
+from multiprocessing.connection import wait as wait_connections
+
+from monitor.stats import PhaseTimer
+
+MAX_RESTARTS = 3
+
+
+def shard_of(server_name, count):
+    """서버가 배정되는 shard 번호 (프로세스 재시작/설정 재로드 후에도 같은 값)"""
+    return zlib.crc32(server_name.encode('utf-8')) % count
+
+
+def shard_settings(default_settings, index):
+    """shard 프로세스용 default_settings (저장소/알림/통계/backoff 는 부모 프로세스에서 처리)"""
+    log_tail = dict(default_settings.get('log_tail') or {})
+    state_path = log_tail.get('state_path') or os.path.join(default_settings.get('results_dir', 'results'),
+                                                            'log_offsets.json')
+    root, ext = os.path.splitext(state_path)
+    log_tail['state_path'] = f'{root}.shard{index}{ext}'
+    return {
+        **default_settings,
+        'shards': 0,
+        'log_tail': log_tail,
+        'metric_store': {'enabled': False},
+        'alerts': {'enabled': False},
+        'self_metrics': {'enabled': False},
+        'health': {'enabled': False},
+    }
+
+
+class _PipeQueue:
+    """QueueHandler 용 어댑터 (로그 레코드를 결과 파이프로 전송)"""
+
+    def __init__(self, send):
+        self.send = send
+
+    def put_nowait(self, record):
+        self.send(('log', record))
+
+
+class _EventRecorder:
+    """shard 프로세스에서 PhaseTimer 의 단계별 기록을 모아 부모 프로세스로 전달"""
+
+    def __init__(self):
+        self.events = []  # (단계, 초, 명령어)
+
+    def observe(self, server_name, phase, seconds, command=None):
+        self.events.append((phase, seconds, command))
+
+    def count_check(self, status, new_connection=False):
+        pass
+
+
+def run_shard(index, default_settings, workers, tasks, results):
+    """shard 프로세스 진입점 (tasks: 점검 요청 수신 파이프, results: 결과 송신 파이프)"""
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            results.send(message)
+
+    # 로그는 부모 프로세스의 로그 파일/콘솔로 전달
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(_PipeQueue(send))]
+    root.setLevel(logging.INFO)
+
+    from monitor.engine import MonitoringEngine  # engine 이 이 모듈을 import 하므로 여기서 import
+    engine = MonitoringEngine({'default_settings': shard_settings(default_settings, index), 'servers': []})
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'shard{index}')
+    try:
+        while True:
+            try:
+                task = tasks.recv()
+            except EOFError:
+                break  # 부모 프로세스 종료
+            if task is None:
+                break
+            kind = task[0]
+            if kind == 'check':
+                executor.submit(_collect, engine, send, task[1], task[2])
+            elif kind == 'cancel':
+                engine.cancel_channels()
+            elif kind == 'settings':
+                engine.update_settings(shard_settings(task[1], index))
+            elif kind == 'forget':
+                engine.proc_collector.forget(task[1])
+                engine.log_tailer.forget(task[1])
+                engine.agent.forget(task[1])
+    finally:
+        engine.stop()
+        executor.shutdown(wait=True, cancel_futures=True)
+        engine.log_tailer.close()
+        engine.ssh_pool.close_all()
+
+
+def _collect(engine, send, idx, server):
+    """shard 워커 스레드에서 서버 1대 수집 후 결과 전송"""
+    from monitor.engine import classify_failure
+    name = server['name']
+    if not engine.is_running:
+        return
+    send(('start', name))
+    engine.log_start(idx, server)
+    recorder = _EventRecorder()
+    timer = PhaseTimer(recorder, name)
+    try:
+        message = ('result', name, engine.collect_server(server, timer))
+    except Exception as e:
+        message = ('failure', name, *classify_failure(e))
+    try:
+        send(message + (recorder.events, time.perf_counter() - timer.started))
+    except Exception as e:
+        engine.logger.error(f"[{name}] Failed to send result to parent : {str(e)}")
+
+
+class _Shard:
+    def __init__(self, index, process, tasks, results, restarts):
+        self.index = index
+        self.process = process
+        self.tasks = tasks  # 부모 -> shard
+        self.results = results  # shard -> 부모
+        self.restarts = restarts
+        self.send_lock = threading.Lock()
+
+
+class _Task:
+    __slots__ = ('idx', 'server', 'future', 'shard', 'started')
+
+    def __init__(self, idx, server, future, shard):
+        self.idx = idx
+        self.server = server
+        self.future = future
+        self.shard = shard
+        self.started = False  # shard 에서 수집을 시작했는지
+
+
+class ShardPool:
+    """서버 점검을 shard 프로세스에 나눠 실행 (MonitoringEngine.run 동안 executor 대신 사용)"""
+
+    def __init__(self, engine, count, workers):
+        self.engine = engine
+        self.count = count
+        self.workers = workers  # shard 당 동시 점검 서버 수
+        self.logger = logging.getLogger(__name__)
+
+        self._context = multiprocessing.get_context('spawn')  # Windows 와 동일하게 동작하도록 spawn 사용
+        self._settings = engine.server_config['default_settings']
+        self._shards = [None] * count
+        self._pending = {}  # 서버이름 -> _Task (결과를 기다리는 점검)
+        self._lock = threading.Lock()
+        self._closing = False
+        for index in range(count):
+            self._shards[index] = self._start_shard(index, restarts=0)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='shard-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    @classmethod
+    def from_settings(cls, engine, default_settings):
+        """default_settings.shards 가 2 이상이면 생성, 아니면 None (스레드 풀만 사용)"""
+        count = int(default_settings.get('shards') or 0)
+        if count <= 1:
+            return None
+        return cls(engine, count, max(1, math.ceil(engine.max_workers / count)))
+
+    def submit(self, idx, server):
+        """서버 1대 점검 요청 -> Future (결과 dict 또는 None)"""
+        future = Future()
+        name = server['name']
+        index = shard_of(name, self.count)
+        with self._lock:
+            shard = self._shards[index]
+            if shard is not None:
+                self._pending[name] = _Task(idx, server, future, index)
+        if shard is None:
+            self._fail(_Task(idx, server, future, index), f"collector shard {index} is not running")
+            return future
+        self._send(shard, ('check', idx, server))
+        return future
+
+    def cancel(self):
+        """중지 요청: 진행중인 명령어 채널을 닫고 결과를 기다리는 점검은 None 으로 완료"""
+        with self._lock:
+            tasks, self._pending = list(self._pending.values()), {}
+            shards = [shard for shard in self._shards if shard is not None]
+        for shard in shards:
+            self._send(shard, ('cancel',))
+        for task in tasks:
+            task.future.set_result(None)
+
+    def update_settings(self, default_settings):
+        """설정 재로드 시 제한 시간/일괄 수집 설정 반영"""
+        self._settings = default_settings
+        self._broadcast(('settings', default_settings))
+
+    def forget(self, server_name):
+        """삭제된 서버의 CPU 샘플/로그 오프셋 제거"""
+        shard = self._shards[shard_of(server_name, self.count)]
+        if shard is not None:
+            self._send(shard, ('forget', server_name))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """shard 프로세스 종료 (ThreadPoolExecutor.shutdown 과 같은 인자)"""
+        if cancel_futures or not wait:
+            self.cancel()
+        self._closing = True
+        shards = [shard for shard in self._shards if shard is not None]
+        self._broadcast(None)
+        deadline = time.monotonic() + (30 if wait else 5)
+        for shard in shards:
+            shard.process.join(max(0.0, deadline - time.monotonic()))
+            if shard.process.is_alive():
+                self.logger.warning(f"Collector shard {shard.index} did not stop, terminating")
+                shard.process.terminate()
+                shard.process.join(5)
+        self._dispatcher.join(5)
+        for shard in shards:
+            shard.tasks.close()
+            shard.results.close()
+
+    def _start_shard(self, index, restarts):
+        task_reader, task_writer = self._context.Pipe(duplex=False)
+        result_reader, result_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=run_shard, args=(index, self._settings, self.workers, task_reader, result_writer),
+            name=f'monitor-shard-{index}', daemon=True)
+        process.start()
+        # 자식 쪽 끝은 닫아야 자식이 종료됐을 때 EOF 로 감지됨
+        task_reader.close()
+        result_writer.close()
+        self.logger.info(f"Collector shard {index} started (pid {process.pid}, {self.workers} workers)")
+        return _Shard(index, process, task_writer, result_reader, restarts)
+
+    def _send(self, shard, message):
+        try:
+            with shard.send_lock:
+                shard.tasks.send(message)
+        except (OSError, ValueError) as e:
+            # 종료된 shard: 대기중인 점검은 재시작 처리(_handle_exit)에서 다시 배정됨
+            if not self._closing:
+                self.logger.warning(f"Failed to send to collector shard {shard.index} : {str(e)}")
+
+    def _broadcast(self, message):
+        for shard in list(self._shards):
+            if shard is not None:
+                self._send(shard, message)
+
+    def _dispatch_loop(self):
+        """shard 결과 수신 및 부모 엔진에서 후처리 (결과 수신 전용 스레드)"""
+        while True:
+            readers = {shard.results: shard for shard in self._shards if shard is not None}
+            if not readers:
+                return
+            for conn in wait_connections(list(readers), timeout=1):
+                shard = readers[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._handle_exit(shard)
+                    continue
+                try:
+                    self._handle(message)
+                except Exception as e:
+                    self.logger.error(f"Shard result handling error : {str(e)}")
+
+    def _handle(self, message):
+        kind, name = message[0], message[1]
+        if kind == 'log':
+            record = name
+            logging.getLogger(record.name).handle(record)
+            return
+        if kind == 'start':
+            with self._lock:
+                task = self._pending.get(name)
+                if task is not None:
+                    task.started = True
+            if task is not None:
+                self.engine.on_progress(f"서버 {name} 점검중...")
+            return
+
+        with self._lock:
+            task = self._pending.pop(name, None)
+        if task is None:
+            return  # 중지 요청으로 이미 완료 처리됨
+        events, elapsed = message[-2], message[-1]
+        timer = PhaseTimer(self.engine.stats, name)
+        for phase, seconds, command in events:
+            timer.record(phase, seconds, command)
+        timer.started = time.perf_counter() - elapsed  # 전체 소요 시간은 shard 에서 잰 값 사용
+        result = None
+        try:
+            if kind == 'result':
+                if message[2] is not None:
+                    result = self.engine.finish_check(task.server, message[2], timer)
+            else:
+                self.engine.report_failure(task.server, message[2], message[3], timer)
+        finally:
+            task.future.set_result(result)
+
+    def _handle_exit(self, shard):
+        """shard 프로세스 종료 감지: 점검중이던 서버는 오류 처리, 대기중이던 서버는 새 프로세스에 재배정"""
+        shard.process.join(5)
+        with self._lock:
+            if self._shards[shard.index] is shard:
+                self._shards[shard.index] = None
+            if self._closing:
+                return
+            tasks = [task for task in self._pending.values() if task.shard == shard.index]
+        shard.tasks.close()
+        shard.results.close()
+        exit_code = shard.process.exitcode
+        self.logger.error(f"Collector shard {shard.index} exited unexpectedly (exit code {exit_code})")
+
+        replacement = None
+        if shard.restarts < MAX_RESTARTS:
+            try:
+                replacement = self._start_shard(shard.index, shard.restarts + 1)
+            except Exception as e:
+                self.logger.error(f"Failed to restart collector shard {shard.index} : {str(e)}")
+        with self._lock:
+            self._shards[shard.index] = replacement
+        for task in tasks:
+            if task.started:
+                # 비정상 종료의 원인일 수 있으므로 다시 시도하지 않음
+                self._fail(task, f"collector shard {shard.index} crashed (exit code {exit_code})")
+            elif replacement is not None:
+                self._send(replacement, ('check', task.idx, task.server))
+            else:
+                self._fail(task, f"collector shard {shard.index} stopped after {MAX_RESTARTS} restarts")
+
+    def _fail(self, task, detail):
+        with self._lock:
+            self._pending.pop(task.server['name'], None)
+        try:
+            self.engine.report_failure(task.server, 'error', detail, PhaseTimer(self.engine.stats, task.server['name']))
+        finally:
+            task.future.set_result(None)
@@ -0,0 +1,251 @@
+"""SSH 연결 풀
+
+GUI/앱 수명 동안 유지되는 SSH 연결을 (ip, port, username) 단위로 재사용한다.
+- keepalive 패킷으로 유휴 연결 유지
+- idle_timeout 동안 사용되지 않은 연결 정리
+- max_size 초과 시 가장 오래 사용되지 않은 연결(LRU) 정리
+- acquire 한 연결은 release 전까지 사용 중으로 표시되어 LRU/유휴 정리 대상에서 제외
+  (사용 중인 연결이 많으면 일시적으로 max_size 를 넘을 수 있음)
+- 끊어진 transport 는 다음 요청 시 자동으로 재연결
+- timer(stats.PhaseTimer)를 전달하면 새 연결의 dns/tcp/kex/auth 단계별 소요 시간 기록
+"""
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import paramiko
+
+
+class PooledConnection:
+    """풀에 보관되는 SSH 연결 정보"""
+
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.in_use = 0  # acquire 후 release 되지 않은 수
+
+    def is_alive(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def close(self):
+        self.client.close()
+
+
+class _TimedSSHClient(paramiko.SSHClient):
+    """키 교환/인증 단계 소요 시간을 기록하는 SSHClient"""
+
+    def __init__(self, timer):
+        super().__init__()
+        self.timer = timer
+        self.connect_started = None
+
+    def _auth(self, *args, **kwargs):
+        # SSHClient.connect 는 배너/키 교환이 끝난 뒤 _auth 를 호출함
+        auth_started = time.perf_counter()
+        self.timer.record('kex', auth_started - self.connect_started)
+        try:
+            return super()._auth(*args, **kwargs)
+        finally:
+            self.timer.record('auth', time.perf_counter() - auth_started)
+
+
+class SSHConnectionPool:
+    """(ip, port, username) 키 기반의 스레드 안전한 SSH 연결 풀"""
+
+    def __init__(self, max_size=200, idle_timeout=600, keepalive=30):
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.logger = logging.getLogger(__name__)
+
+        self._connections = OrderedDict()  # key -> PooledConnection (LRU 순서)
+        self._key_locks = {}  # key -> [Lock, 대기/사용 스레드 수] (동일 서버에 대한 중복 연결 방지용)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 유휴 연결 정리 스레드
+        self._reaper = threading.Thread(target=self._reap_loop, name='ssh-pool-reaper', daemon=True)
+        self._reaper_stop = threading.Event()
+        self._reaper.start()
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        """default_settings.connection_pool 설정으로 풀 생성"""
+        settings = default_settings.get('connection_pool') or {}
+        return cls(
+            max_size=settings.get('max_size', 200),
+            idle_timeout=settings.get('idle_timeout', 600),
+            keepalive=settings.get('keepalive', 30),
+        )
+
+    @staticmethod
+    def make_key(connect_params):
+        return (connect_params['hostname'], int(connect_params['port']), connect_params['username'])
+
+    def acquire(self, connect_params, timer=None):
+        """연결 반환 (client, reused)
+
+        풀에 살아있는 연결이 있으면 재사용하고, 없거나 끊어진 경우 새로 연결한다.
+        사용이 끝나면 release(connect_params, client) 를 호출해야 정리 대상이 된다.
+        """
+        key = self.make_key(connect_params)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('SSH connection pool is closed')
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                return self._acquire_locked(key, connect_params, timer)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                self._prune_key_lock(key)
+
+    def _acquire_locked(self, key, connect_params, timer):
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is not None:
+                if conn.is_alive():
+                    conn.in_use += 1
+                    conn.last_used = time.monotonic()
+                    self._connections.move_to_end(key)
+                    return conn.client, True
+                # 끊어진 연결은 제거 후 재연결 (다른 스레드가 사용 중이어도 이미 끊어진 연결)
+                del self._connections[key]
+        if conn is not None:
+            self.logger.info(f'Reconnecting dead ssh connection {key[0]}:{key[1]}')
+            self._close_quietly(conn)
+
+        client = self._connect(connect_params, timer)
+        conn = PooledConnection(client)
+        conn.in_use = 1
+        evicted = []
+        with self._lock:
+            self._connections[key] = conn
+            # 사용 중인 연결은 건너뛰고 오래된 순서로 정리
+            for old_key, old in list(self._connections.items()):
+                if len(self._connections) <= self.max_size:
+                    break
+                if old.in_use == 0:
+                    evicted.append(self._connections.pop(old_key))
+                    self._prune_key_lock(old_key)
+        for old in evicted:
+            self._close_quietly(old)
+        return client, False
+
+    def release(self, connect_params, client):
+        """acquire 로 받은 연결 사용 종료 (이미 제거/교체된 연결이면 무시)"""
+        key = self.make_key(connect_params)
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is not None and conn.client is client and conn.in_use > 0:
+                conn.in_use -= 1
+                conn.last_used = time.monotonic()
+
+    def discard(self, connect_params):
+        """사용 중 오류가 발생한 연결을 풀에서 제거"""
+        key = self.make_key(connect_params)
+        with self._lock:
+            conn = self._connections.pop(key, None)
+            self._prune_key_lock(key)
+        if conn is not None:
+            self._close_quietly(conn)
+
+    def evict_idle(self):
+        """idle_timeout 이상 사용되지 않았거나 끊어진 연결 정리 (사용 중인 연결 제외)"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, conn in list(self._connections.items()):
+                if conn.in_use:
+                    continue
+                if now - conn.last_used > self.idle_timeout or not conn.is_alive():
+                    expired.append(self._connections.pop(key))
+                    self._prune_key_lock(key)
+        for conn in expired:
+            self._close_quietly(conn)
+        return len(expired)
+
+    def close_all(self):
+        """모든 연결 종료 (프로그램 종료 시)"""
+        with self._lock:
+            self._closed = True
+            connections = list(self._connections.values())
+            self._connections.clear()
+            for key in list(self._key_locks):
+                self._prune_key_lock(key)
+        self._reaper_stop.set()
+        for conn in connections:
+            self._close_quietly(conn)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._connections)
+
+    def _connect(self, connect_params, timer=None):
+        client = paramiko.SSHClient() if timer is None else _TimedSSHClient(timer)
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            if timer is None:
+                client.connect(**connect_params)
+            else:
+                sock = self._open_socket(connect_params, timer)
+                client.connect_started = time.perf_counter()
+                client.connect(**connect_params, sock=sock)
+        except paramiko.SSHException as e:
+            client.close()
+            if str(e) == 'No existing session':
+                # 제한 시간 내에 키 교환이 끝나지 않으면 paramiko 는 인증 단계에서 이 메시지로 실패함
+                raise TimeoutError(f"SSH negotiation timed out ({connect_params.get('timeout')}s)") from e
+            raise
+        except Exception:
+            client.close()
+            raise
+        transport = client.get_transport()
+        if transport is not None and self.keepalive:
+            transport.set_keepalive(self.keepalive)
+        return client
+
+    def _open_socket(self, connect_params, timer):
+        """이름 조회와 TCP 연결을 직접 수행해 단계별 소요 시간 기록 (paramiko 와 같은 순서로 주소 시도)"""
+        with timer.phase('dns'):
+            addresses = socket.getaddrinfo(connect_params['hostname'], connect_params['port'],
+                                           socket.AF_UNSPEC, socket.SOCK_STREAM)
+        error = None
+        with timer.phase('tcp'):
+            for family, socktype, proto, _, address in addresses:
+                sock = socket.socket(family, socktype, proto)
+                try:
+                    sock.settimeout(connect_params.get('timeout'))
+                    sock.connect(address)
+                    return sock
+                except OSError as e:
+                    sock.close()
+                    error = e
+        raise error
+
+    def _prune_key_lock(self, key):
+        """연결이 없고 대기중인 스레드도 없는 key 의 잠금 제거 (self._lock 을 잡은 상태에서 호출)"""
+        entry = self._key_locks.get(key)
+        if entry is not None and entry[1] == 0 and key not in self._connections:
+            del self._key_locks[key]
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            self.logger.error(f'Error closing pooled ssh connection : {str(e)}')
+
+    def _reap_loop(self):
+        interval = max(1, min(60, self.idle_timeout / 2))
+        while not self._reaper_stop.wait(interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                self.logger.error(f'SSH pool reaper error : {str(e)}')
@@ -0,0 +1,302 @@
+"""수집기 자체 성능 지표 (단계별 소요 시간 히스토그램)
+
+서버 1대 점검을 아래 단계로 나눠 소요 시간을 기록한다.
+- dns      : 호스트 이름 조회
+- tcp      : TCP 연결
+- kex      : SSH 배너 교환/키 교환
+- auth     : 인증
+- channel  : 명령어 채널 열기
+- command  : 명령어 실행 (명령어별 히스토그램도 별도 집계)
+- log_tail : 로그 파일 증분 수집 (SFTP)
+- host     : 서버 1대 전체 점검
+연결 풀에서 재사용한 연결은 dns~auth 단계가 기록되지 않는다.
+
+집계 결과는 GUI 통계 탭과 Prometheus 텍스트 형식(파일 또는 로컬 HTTP /metrics)으로 확인하며,
+서버별 단계 합계는 시계열 저장소에 self.<단계> 메트릭으로 저장된다.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PHASES = ('dns', 'tcp', 'kex', 'auth', 'channel', 'command', 'log_tail', 'host')
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # 히스토그램 구간 상한(초)
+METRIC_PREFIX = 'shm'
+
+
+class Histogram:
+    """고정 구간 히스토그램 (Prometheus histogram 과 같은 구간 사용)"""
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """구간 내 선형 보간으로 추정한 분위수 (histogram_quantile 과 같은 방식)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / count, self.max)
+            cumulative += count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max,
+        }
+
+
+class PhaseTimer:
+    """서버 1대 점검의 단계별 소요 시간 (점검하는 워커 스레드 1개에서만 사용)"""
+
+    def __init__(self, stats, server_name):
+        self.stats = stats
+        self.server_name = server_name
+        self.phases = {}  # 단계 -> 이번 점검의 합계(초)
+        self.started = time.perf_counter()
+
+    def record(self, phase, seconds, command=None):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        if self.stats is not None:
+            self.stats.observe(self.server_name, phase, seconds, command)
+
+    @contextmanager
+    def phase(self, phase, command=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - started, command)
+
+    def finish(self, status):
+        """점검 종료 ('ok', 'timeout', 'error'), 전체 소요 시간을 host 단계로 기록"""
+        self.record('host', time.perf_counter() - self.started)
+        if self.stats is not None:
+            self.stats.count_check(status, new_connection='auth' in self.phases)
+
+    def summary(self):
+        """로그용 요약 (예: 1.23s (tcp 0.01s, kex 0.05s, ...))"""
+        parts = ', '.join(f'{phase} {self.phases[phase]:.2f}s' for phase in PHASES
+                          if phase != 'host' and phase in self.phases)
+        return f"{self.phases.get('host', 0.0):.2f}s ({parts})"
+
+
+class CollectorStats:
+    """단계별/서버별/명령어별 소요 시간 집계 (여러 워커 스레드에서 호출됨)"""
+
+    def __init__(self, textfile=None, write_interval=15, http_port=None, http_host='127.0.0.1'):
+        self.textfile = textfile
+        self.write_interval = write_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._phases = {phase: Histogram() for phase in PHASES}
+        self._host_phases = {}  # (서버이름, 단계) -> Histogram
+        self._commands = {}  # 명령어 이름 -> Histogram
+        self._checks = Counter()  # 점검 결과 -> 건수
+        self._connections = Counter()  # 'new'/'reused' -> 건수
+        self._last_sweep = None  # (소요 시간, 서버 수)
+        self._lock = threading.Lock()
+        self._written_at = time.monotonic()
+        self._http = None
+        if http_port:
+            self._start_http(http_host, http_port)
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        """default_settings.self_metrics 설정으로 생성 (enabled: false 이면 None)"""
+        settings = default_settings.get('self_metrics') or {}
+        if not settings.get('enabled', True):
+            return None
+        textfile = settings.get('textfile')
+        if textfile is None:
+            textfile = os.path.join(default_settings.get('results_dir', 'results'), 'self_metrics.prom')
+        return cls(
+            textfile=textfile or None,  # '' 또는 false 이면 파일 기록 안함
+            write_interval=settings.get('write_interval', 15),
+            http_port=settings.get('http_port'),
+            http_host=settings.get('http_host', '127.0.0.1'),
+        )
+
+    def observe(self, server_name, phase, seconds, command=None):
+        with self._lock:
+            self._phases.setdefault(phase, Histogram()).observe(seconds)
+            histogram = self._host_phases.get((server_name, phase))
+            if histogram is None:
+                histogram = self._host_phases[(server_name, phase)] = Histogram()
+            histogram.observe(seconds)
+            if command is not None:
+                histogram = self._commands.get(command)
+                if histogram is None:
+                    histogram = self._commands[command] = Histogram()
+                histogram.observe(seconds)
+
+    def count_check(self, status, new_connection=False):
+        with self._lock:
+            self._checks[status] += 1
+            if status == 'ok':
+                self._connections['new' if new_connection else 'reused'] += 1
+        self.write_if_due()
+
+    def observe_sweep(self, seconds, hosts):
+        """전체 서버 1회 점검 소요 시간"""
+        with self._lock:
+            self._last_sweep = (seconds, hosts)
+
+    def forget(self, server_name):
+        """서버 설정이 삭제된 경우 서버별 히스토그램 제거"""
+        with self._lock:
+            for key in [key for key in self._host_phases if key[0] == server_name]:
+                del self._host_phases[key]
+
+    def snapshot(self, top=10):
+        """GUI 표시용 요약 (단계별/명령어별 분위수, 점검 시간이 긴 서버 top 개)"""
+        with self._lock:
+            hosts = [(histogram.total / histogram.count, name, histogram)
+                     for (name, phase), histogram in self._host_phases.items() if phase == 'host' and histogram.count]
+            slowest = sorted(hosts, key=lambda item: item[0], reverse=True)[:top]
+            return {
+                'phases': {phase: histogram.summary() for phase, histogram in self._phases.items()
+                           if histogram.count},
+                'commands': {command: histogram.summary() for command, histogram in sorted(self._commands.items())},
+                'slowest_hosts': [(name, histogram.summary()) for _, name, histogram in slowest],
+                'checks': dict(self._checks),
+                'connections': dict(self._connections),
+                'last_sweep': self._last_sweep,
+            }
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 노출 형식"""
+        lines = []
+        with self._lock:
+            name = f'{METRIC_PREFIX}_phase_seconds'
+            lines.append(f'# HELP {name} Time spent in each collection phase.')
+            lines.append(f'# TYPE {name} histogram')
+            for phase, histogram in self._phases.items():
+                _histogram_lines(lines, name, {'phase': phase}, histogram)
+
+            name = f'{METRIC_PREFIX}_command_seconds'
+            lines.append(f'# HELP {name} Remote command execution time by check.')
+            lines.append(f'# TYPE {name} histogram')
+            for command, histogram in sorted(self._commands.items()):
+                _histogram_lines(lines, name, {'command': command}, histogram)
+
+            # 서버별은 구간 없이 합계/건수만 (서버 수만큼 구간이 늘어나지 않도록)
+            name = f'{METRIC_PREFIX}_host_phase_seconds'
+            lines.append(f'# HELP {name} Time spent in each collection phase by server.')
+            lines.append(f'# TYPE {name} summary')
+            for (server_name, phase), histogram in sorted(self._host_phases.items()):
+                labels = _labels({'server': server_name, 'phase': phase})
+                lines.append(f'{name}_sum{labels} {histogram.total:.6f}')
+                lines.append(f'{name}_count{labels} {histogram.count}')
+
+            name = f'{METRIC_PREFIX}_checks_total'
+            lines.append(f'# HELP {name} Server checks by result.')
+            lines.append(f'# TYPE {name} counter')
+            for status in sorted(self._checks):
+                lines.append(f"{name}{_labels({'status': status})} {self._checks[status]}")
+
+            name = f'{METRIC_PREFIX}_connections_total'
+            lines.append(f'# HELP {name} Successful checks by new or reused SSH connection.')
+            lines.append(f'# TYPE {name} counter')
+            for kind in sorted(self._connections):
+                lines.append(f"{name}{_labels({'kind': kind})} {self._connections[kind]}")
+
+            if self._last_sweep is not None:
+                seconds, hosts = self._last_sweep
+                lines.append(f'# TYPE {METRIC_PREFIX}_last_sweep_seconds gauge')
+                lines.append(f'{METRIC_PREFIX}_last_sweep_seconds {seconds:.6f}')
+                lines.append(f'# TYPE {METRIC_PREFIX}_last_sweep_hosts gauge')
+                lines.append(f'{METRIC_PREFIX}_last_sweep_hosts {hosts}')
+        return '\n'.join(lines) + '\n'
+
+    def write_if_due(self):
+        if self.textfile and time.monotonic() - self._written_at >= self.write_interval:
+            self.write_textfile()
+
+    def write_textfile(self):
+        """textfile 에 기록 (node_exporter textfile collector 등에서 읽음)"""
+        if not self.textfile:
+            return
+        self._written_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.textfile) or '.', exist_ok=True)
+            tmp_path = self.textfile + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.textfile)
+        except Exception as e:
+            self.logger.error(f"Failed to write self metrics : {str(e)}")
+
+    def close(self):
+        self.write_textfile()
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+    def _start_http(self, host, port):
+        try:
+            self._http = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            self.logger.error(f"Failed to start self metrics endpoint on {host}:{port} : {str(e)}")
+            return
+        self._http.daemon_threads = True
+        self._http.stats = self
+        threading.Thread(target=self._http.serve_forever, name='self-metrics-http', daemon=True).start()
+        self.logger.info(f"Self metrics endpoint: http://{host}:{port}/metrics")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.stats.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 로그를 남기지 않음
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram_lines(lines, name, labels, histogram):
+    cumulative = 0
+    for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+    lines.append(f'{name}_sum{_labels(labels)} {histogram.total:.6f}')
+    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
@@ -0,0 +1,349 @@
+"""점검 결과 시계열 저장소 (SQLite)
+
+서버/메트릭 이름은 정수 id 로 치환하고 (server_id, metric_id, ts) 를 기본키로 하는
+WITHOUT ROWID 테이블에 저장해 파일 크기와 범위 조회 비용을 줄인다.
+- samples   : 원본 값 (raw_retention_days 보관)
+- rollup_1m : 1분 단위 count/sum/min/max (rollup_1m_retention_days 보관)
+- rollup_1h : 1시간 단위 count/sum/min/max (rollup_1h_retention_days 보관)
+- rollup_1d : 1일(현지 시각 자정 기준) 단위 count/sum/min/max (rollup_1d_retention_days 보관)
+
+add() 로 쌓인 값은 batch_size 또는 flush_interval 마다 하나의 트랜잭션으로 기록된다.
+1시간/1일 롤업에는 (metric_id, ts) 인덱스가 있어 전체 서버의 같은 메트릭을 한 번에 조회할 수 있다. (history 보고서)
+"""
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+ROLLUPS = {'1m': 60, '1h': 3600, '1d': 86400}  # 롤업 이름 -> 구간 길이(초)
+FLEET_INDEXED = ('1h', '1d')  # 전체 서버 조회용 (metric_id, ts) 인덱스가 있는 롤업
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS samples (
+    server_id INTEGER NOT NULL, metric_id INTEGER NOT NULL, ts INTEGER NOT NULL, value REAL NOT NULL,
+    PRIMARY KEY (server_id, metric_id, ts)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_{name} (
+    server_id INTEGER NOT NULL, metric_id INTEGER NOT NULL, ts INTEGER NOT NULL,
+    count INTEGER NOT NULL, sum REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL,
+    PRIMARY KEY (server_id, metric_id, ts)
+) WITHOUT ROWID;
+"""
+
+_FLEET_INDEX = """
+CREATE INDEX IF NOT EXISTS rollup_{name}_metric_ts ON rollup_{name} (metric_id, ts);
+"""
+
+_ROLLUP_UPSERT = """
+INSERT INTO rollup_{name} (server_id, metric_id, ts, count, sum, min, max) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (server_id, metric_id, ts) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+def bucket_start(ts, width):
+    """ts 가 속한 롤업 구간의 시작 시각 (1일 구간은 현지 시각 자정 기준)"""
+    if width == 86400:
+        # 시간 단위로 캐시 (일광 절약 시간 전환은 정시에 일어나므로 같은 시간 안에서는 자정이 같음)
+        hour = ts - ts % 3600
+        return _local_day_start(hour)
+    return ts - ts % width
+
+
+@functools.lru_cache(maxsize=4096)
+def _local_day_start(ts):
+    """ts 가 속한 날의 현지 시각 자정 (일광 절약 시간 적용)"""
+    midnight = datetime.fromtimestamp(ts).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(midnight.timestamp())
+
+
+def flatten_metrics(results):
+    """점검 결과 dict 에서 저장할 숫자 메트릭만 추출 -> {메트릭 이름: 값}
+
+    - 최상위 숫자 값 (cpu, memory, disk, load_1 ...)
+    - 숫자로 변환되는 개별 명령어 결과 (cmd.<이름>)
+    - 서비스 활성 여부/프로세스 수 (service.<이름>.active, service.<이름>.process_count)
+    """
+    metrics = {}
+    for key, value in results.items():
+        if key in ('services', 'cpu_cores'):  # 코어 수는 거의 변하지 않으므로 저장하지 않음
+            continue
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            metrics[key] = float(value)
+        elif isinstance(value, str):
+            try:
+                metrics[f'cmd.{key}'] = float(value)
+            except ValueError:
+                pass
+    for service_name, info in (results.get('services') or {}).items():
+        metrics[f'service.{service_name}.active'] = 1.0 if info.get('status') == 'active' else 0.0
+        try:
+            metrics[f'service.{service_name}.process_count'] = float(info.get('process_count'))
+        except (TypeError, ValueError):
+            pass
+    return metrics
+
+
+class MetricStore:
+    """서버/메트릭별 시계열 저장 및 조회 (스레드 안전)"""
+
+    def __init__(self, path, raw_retention_days=2, rollup_1m_retention_days=7,
+                 rollup_1h_retention_days=400, rollup_1d_retention_days=1830, batch_size=500, flush_interval=5):
+        self.path = path
+        self.retention = {
+            'raw': raw_retention_days * 86400,
+            '1m': rollup_1m_retention_days * 86400,
+            '1h': rollup_1h_retention_days * 86400,
+            '1d': rollup_1d_retention_days * 86400,
+        }
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA + ''.join(_ROLLUP_SCHEMA.format(name=name) for name in ROLLUPS)
+                                 + ''.join(_FLEET_INDEX.format(name=name) for name in FLEET_INDEXED))
+        self._ids = {'servers': {}, 'metrics': {}}
+        self._load_ids()
+
+        self._buffer = []  # (server, metric, ts, value)
+        self._last_flush = time.monotonic()
+        self._last_prune = 0.0
+
+    @classmethod
+    def from_settings(cls, default_settings):
+        """default_settings.metric_store 설정으로 저장소 생성 (enabled: false 이면 None)"""
+        settings = default_settings.get('metric_store') or {}
+        if not settings.get('enabled', True):
+            return None
+        path = settings.get('path') or os.path.join(default_settings.get('results_dir', 'results'), 'metrics.db')
+        return cls(
+            path,
+            raw_retention_days=settings.get('raw_retention_days', 2),
+            rollup_1m_retention_days=settings.get('rollup_1m_retention_days', 7),
+            rollup_1h_retention_days=settings.get('rollup_1h_retention_days', 400),
+            rollup_1d_retention_days=settings.get('rollup_1d_retention_days', 1830),
+            batch_size=settings.get('batch_size', 500),
+            flush_interval=settings.get('flush_interval', 5),
+        )
+
+    def add(self, server_name, results, ts=None):
+        """점검 결과 1건을 버퍼에 추가 (batch_size 또는 flush_interval 도달 시 기록)"""
+        ts = int(ts if ts is not None else time.time())
+        rows = [(server_name, metric, ts, value) for metric, value in flatten_metrics(results).items()]
+        with self._lock:
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush_if_due(self):
+        with self._lock:
+            if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """버퍼의 값을 원본/롤업 테이블에 한 트랜잭션으로 기록"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+
+            self._write_rows(rows)
+
+            # 보관 기간이 지난 데이터 정리 (1시간에 1번)
+            if time.monotonic() - self._last_prune >= 3600:
+                self.prune()
+            return len(rows)
+
+    def backfill(self, server_name, records, before=None):
+        """과거 점검 결과 일괄 기록 (records: (ts, 결과 dict) 목록)
+
+        before(기본: 이미 저장된 가장 오래된 시각) 이전의 결과만 한 트랜잭션으로 기록하므로
+        반복 실행해도 중복되지 않는다. 기록한 결과 수를 반환한다.
+        """
+        with self._lock:
+            self.flush()
+            if before is None:
+                before = self.first_timestamp(server_name)
+            rows = []
+            count = 0
+            for ts, results in records:
+                ts = int(ts)
+                if before is not None and ts >= before:
+                    continue
+                rows.extend((server_name, metric, ts, value) for metric, value in flatten_metrics(results).items())
+                count += 1
+            if rows:
+                self._write_rows(rows)
+            return count
+
+    def _write_rows(self, rows):
+        """(서버, 메트릭, ts, 값) 목록을 원본/롤업 테이블에 한 트랜잭션으로 기록 (보관 기간이 지난 값은 제외)
+
+        이미 저장된 (서버, 메트릭, ts) 는 처음 값을 유지하고 롤업에 다시 더하지 않는다.
+        (실시간 점검 후 같은 결과를 import 하는 경우 등, 원본 보관 기간이 지난 값은 같은 배치 안에서만 중복 제거)
+        """
+        now = time.time()
+        keyed = {}
+        for server_name, metric, ts, value in rows:
+            keyed.setdefault((self._id('servers', server_name), self._id('metrics', metric), ts), value)
+
+        rollups = {name: defaultdict(lambda: [0, 0.0, None, None]) for name in ROLLUPS}
+        with self._conn:
+            for (server_id, metric_id, ts), value in keyed.items():
+                if ts >= now - self.retention['raw']:
+                    cursor = self._conn.execute(
+                        'INSERT OR IGNORE INTO samples (server_id, metric_id, ts, value) VALUES (?, ?, ?, ?)',
+                        (server_id, metric_id, ts, value))
+                    if not cursor.rowcount:
+                        continue
+                for name, width in ROLLUPS.items():
+                    if ts < now - self.retention[name]:
+                        continue
+                    bucket = rollups[name][(server_id, metric_id, bucket_start(ts, width))]
+                    bucket[0] += 1
+                    bucket[1] += value
+                    bucket[2] = value if bucket[2] is None else min(bucket[2], value)
+                    bucket[3] = value if bucket[3] is None else max(bucket[3], value)
+            for name, buckets in rollups.items():
+                self._conn.executemany(
+                    _ROLLUP_UPSERT.format(name=name),
+                    [(*key, count, total, low, high) for key, (count, total, low, high) in buckets.items()])
+
+    def prune(self, now=None):
+        """보관 기간이 지난 원본/롤업 데이터 삭제"""
+        now = int(now if now is not None else time.time())
+        with self._lock:
+            self._last_prune = time.monotonic()
+            with self._conn:
+                self._conn.execute('DELETE FROM samples WHERE ts < ?', (now - self.retention['raw'],))
+                for name in ROLLUPS:
+                    self._conn.execute(f'DELETE FROM rollup_{name} WHERE ts < ?', (now - self.retention[name],))
+
+    def query(self, server_name, metric, start, end=None, resolution='auto'):
+        """서버/메트릭의 [start, end) 구간 조회
+
+        resolution 이 'raw' 이면 (ts, value) 목록,
+        '1m'/'1h'/'1d' 이면 (ts, min, avg, max, count) 목록을 반환한다.
+        'auto' 는 구간 길이와 보관 기간에 맞춰 가장 세밀한 해상도를 선택한다.
+        """
+        end = int(end if end is not None else time.time())
+        start = int(start)
+        if resolution == 'auto':
+            resolution = self.pick_resolution(start, end)
+        with self._lock:
+            self.flush()
+            server_id = self._ids['servers'].get(server_name)
+            metric_id = self._ids['metrics'].get(metric)
+            if server_id is None or metric_id is None:
+                return []
+            if resolution == 'raw':
+                sql = ('SELECT ts, value FROM samples '
+                       'WHERE server_id = ? AND metric_id = ? AND ts >= ? AND ts < ? ORDER BY ts')
+            elif resolution in ROLLUPS:
+                sql = (f'SELECT ts, min, sum / count, max, count FROM rollup_{resolution} '
+                       'WHERE server_id = ? AND metric_id = ? AND ts >= ? AND ts < ? ORDER BY ts')
+            else:
+                raise ValueError(f'Unknown resolution: {resolution}')
+            return self._conn.execute(sql, (server_id, metric_id, start, end)).fetchall()
+
+    def fleet_query(self, metric, start, end=None, resolution='1d'):
+        """전체 서버의 같은 메트릭 [start, end) 구간 조회 -> {서버이름: [(ts, min, avg, max, count)]}"""
+        if resolution not in FLEET_INDEXED:
+            raise ValueError(f'Unknown resolution: {resolution}')
+        end = int(end if end is not None else time.time())
+        with self._lock:
+            self.flush()
+            metric_id = self._ids['metrics'].get(metric)
+            if metric_id is None:
+                return {}
+            names = {row_id: name for name, row_id in self._ids['servers'].items()}
+            series = defaultdict(list)
+            for server_id, *row in self._conn.execute(
+                    f'SELECT server_id, ts, min, sum / count, max, count FROM rollup_{resolution} '
+                    'WHERE metric_id = ? AND ts >= ? AND ts < ? ORDER BY ts', (metric_id, int(start), end)):
+                series[names[server_id]].append(tuple(row))
+            return dict(series)
+
+    def first_timestamp(self, server_name):
+        """서버의 가장 오래된 저장 시각 (첫날 원본 값이 남아있으면 원본 기준, 아니면 1일 롤업 구간 시작, 없으면 None)"""
+        with self._lock:
+            server_id = self._ids['servers'].get(server_name)
+            if server_id is None:
+                return None
+            first_day = self._conn.execute('SELECT MIN(ts) FROM rollup_1d WHERE server_id = ?',
+                                           (server_id,)).fetchone()[0]
+            if first_day is None:
+                return None
+            first_raw = self._conn.execute('SELECT MIN(ts) FROM samples WHERE server_id = ?', (server_id,)).fetchone()[0]
+            if first_raw is not None and first_raw < first_day + ROLLUPS['1d']:
+                return first_raw
+            return first_day
+
+    def pick_resolution(self, start, end, max_points=2000):
+        """조회 구간에 맞는 해상도 선택 (보관 기간 내이면서 max_points 이하)"""
+        age = time.time() - start
+        span = end - start
+        if age <= self.retention['raw'] and span <= max_points * 60:
+            return 'raw'
+        if age <= self.retention['1m'] and span / ROLLUPS['1m'] <= max_points:
+            return '1m'
+        if age <= self.retention['1h'] and span / ROLLUPS['1h'] <= max_points:
+            return '1h'
+        return '1d'
+
+    def server_names(self):
+        with self._lock:
+            return sorted(self._ids['servers'])
+
+    def metric_names(self, server_name=None):
+        """저장된 메트릭 이름 (server_name 지정 시 해당 서버의 1시간 롤업에 존재하는 메트릭)"""
+        with self._lock:
+            if server_name is None:
+                return sorted(self._ids['metrics'])
+            server_id = self._ids['servers'].get(server_name)
+            if server_id is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT DISTINCT m.name FROM rollup_1h r JOIN metrics m ON m.id = r.metric_id '
+                'WHERE r.server_id = ? ORDER BY m.name', (server_id,)).fetchall()
+            return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                self._conn.close()
+
+    def _load_ids(self):
+        for table in ('servers', 'metrics'):
+            self._ids[table] = {name: row_id for row_id, name in self._conn.execute(f'SELECT id, name FROM {table}')}
+
+    def _id(self, table, name):
+        row_id = self._ids[table].get(name)
+        if row_id is None:
+            cursor = self._conn.execute(f'INSERT INTO {table} (name) VALUES (?)', (name,))
+            row_id = cursor.lastrowid
+            self._ids[table][name] = row_id
+        return row_id
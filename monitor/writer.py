@@ -0,0 +1,213 @@
+"""점검 결과 파일 기록 전용 스레드
+
+SSH 점검 워커는 결과를 큐에 넣기만 하고, 파일 기록은 이 스레드가 모아서 처리한다.
+- 큐에 쌓인 결과를 한 번에 꺼내 일괄 기록 후 flush
+- 파일 핸들은 열어둔 채 재사용하고 날짜가 바뀌면 새 날짜 폴더로 교체
+- 형식: text (기존 서버별 보고서), jsonl (날짜별 results.jsonl, 1줄 1결과)
+- 시계열 저장소가 지정되면 같은 스레드에서 저장소 기록도 처리
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from monitor.rules import breach_to_dict, describe
+
+_STOP = object()
+
+
+def format_text_report(record):
+    """결과 1건을 기존 텍스트 보고서 형식으로 변환"""
+    server = record['server']
+    results = record['results']
+    lines = [
+        f"=== System Monitoring at {record['time'].strftime('%Y-%m-%d %H:%M:%S')} ===",
+        f"Server: {server['name']} ({server['ip']})",
+        f"CPU Usage: {results['cpu']:.1f}%",
+        f"Memory Usage: {results['memory']:.2f}%",
+        f"Disk Usage: {results['disk']:.1f}%",
+        f"Load Average: {results['load_avg']}",
+        f"Uptime: {results['uptime']}",
+    ]
+
+    # 서버별 개별 명령어/로그 감시 결과 기록
+    check_names = list(server.get('commands') or {}) + [watch['name'] for watch in server.get('log_watches') or []]
+    if check_names:
+        lines.append("\n=== Additional Checks ===")
+        for cmd_name in check_names:
+            if cmd_name in results:
+                lines.append(f"{cmd_name}: {results[cmd_name]}")
+        lines.append("")
+
+    if 'services' in results:
+        lines.append("\n=== Service Status ===")
+        for service_name, service_info in results['services'].items():
+            lines.append(f"{service_name}:")
+            lines.append(f"  Status: {service_info['status']}")
+            lines.append(f"  Process Count: {service_info['process_count']}")
+
+    # 임계값 초과 항목이 있으면 추가 기록
+    if record['warnings']:
+        lines.append("\n!!! WARNINGS !!!")
+        for breach in record['warnings']:
+            lines.append(f"{describe(breach)}!")
+
+    lines.append("=" * 50 + "\n\n")
+    return '\n'.join(lines)
+
+
+def format_json_line(record):
+    """결과 1건을 JSON Lines 1줄로 변환"""
+    server = record['server']
+    return json.dumps({
+        'time': record['time'].isoformat(timespec='seconds'),
+        'server': server['name'],
+        'ip': server['ip'],
+        'results': record['results'],
+        'warnings': [breach_to_dict(breach) for breach in record['warnings']],
+    }, ensure_ascii=False, default=str) + '\n'
+
+
+class ResultWriter:
+    """큐 기반 결과 기록 스레드"""
+
+    def __init__(self, results_dir, formats=('text',), metric_store=None, max_open_files=256, batch_size=200):
+        unknown = set(formats) - {'text', 'jsonl'}
+        if unknown:
+            raise ValueError(f"Unknown result format: {', '.join(sorted(unknown))}")
+        self.results_dir = results_dir
+        self.formats = tuple(formats)
+        self.metric_store = metric_store
+        self.max_open_files = max_open_files
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = queue.Queue()
+        self._files = OrderedDict()  # 파일 경로 -> 열린 파일 (LRU 순서)
+        self._day = None
+        self._thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+
+    @classmethod
+    def from_settings(cls, default_settings, metric_store=None):
+        return cls(
+            default_settings['results_dir'],
+            formats=default_settings.get('result_formats', ['text']),
+            metric_store=metric_store,
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, server, results, warnings, timestamp=None, timings=None):
+        """결과 1건 기록 요청 (호출 스레드는 대기하지 않음, timings: 단계별 소요 시간은 저장소에만 기록)"""
+        self._queue.put({
+            'time': timestamp or datetime.now(),
+            'server': server,
+            'results': results,
+            'warnings': list(warnings),
+            'timings': timings,
+        })
+
+    def close(self, timeout=None):
+        """남은 결과를 모두 기록한 뒤 스레드 종료"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=1)]
+            except queue.Empty:
+                # 새 결과가 없어도 저장소 버퍼는 주기적으로 기록
+                if self.metric_store is not None:
+                    self._flush_store()
+                continue
+            # 대기중인 결과를 batch_size 까지 한 번에 꺼냄
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not _STOP]
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self.logger.error(f'Result writer error : {str(e)}')
+        self._close_files()
+
+    def _write_batch(self, batch):
+        touched = set()
+        for record in batch:
+            # 결과 1건의 오류가 같은 묶음의 나머지 결과를 버리지 않도록 건별로 처리
+            try:
+                self._write_record(record, touched)
+            except Exception as e:
+                self.logger.error(f"Result writer error [{record['server'].get('name')}] : {str(e)}")
+        for f in touched:
+            try:
+                f.flush()
+            except Exception as e:
+                self.logger.error(f'Result file flush error : {str(e)}')
+        if self.metric_store is not None:
+            self._flush_store()
+
+    def _write_record(self, record, touched):
+        self._rotate(record['time'])
+        server = record['server']
+        if 'text' in self.formats:
+            f = self._file(f"{server['name']}_{server['ip']}.txt")
+            f.write(format_text_report(record))
+            touched.add(f)
+        if 'jsonl' in self.formats:
+            f = self._file('results.jsonl')
+            f.write(format_json_line(record))
+            touched.add(f)
+        if self.metric_store is not None:
+            self.metric_store.add(server['name'], record['results'], ts=record['time'].timestamp())
+            if record['timings']:
+                self.metric_store.add(server['name'],
+                                      {f'self.{phase}': seconds for phase, seconds in record['timings'].items()},
+                                      ts=record['time'].timestamp())
+
+    def _flush_store(self):
+        try:
+            self.metric_store.flush_if_due()
+        except Exception as e:
+            self.logger.error(f'Metric store flush error : {str(e)}')
+
+    def _rotate(self, timestamp):
+        """날짜가 바뀌면 열린 파일을 닫고 새 날짜 폴더 사용"""
+        day = timestamp.strftime('%Y%m%d')
+        if day != self._day:
+            self._close_files()
+            self._day = day
+            os.makedirs(os.path.join(self.results_dir, day), exist_ok=True)
+
+    def _file(self, filename):
+        path = os.path.join(self.results_dir, self._day, filename)
+        f = self._files.get(path)
+        if f is not None:
+            self._files.move_to_end(path)
+            return f
+        if len(self._files) >= self.max_open_files:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        f = open(path, 'a', encoding='utf-8')
+        self._files[path] = f
+        return f
+
+    def _close_files(self):
+        while self._files:
+            _, f = self._files.popitem(last=False)
+            try:
+                f.close()
+            except Exception as e:
+                self.logger.error(f'Error closing result file : {str(e)}')